@@ -0,0 +1,111 @@
+"""Acceptance policy for stock images that narrowly miss the score thresholds."""
+from __future__ import annotations
+
+import logging
+from typing import Optional
+
+from .config import config
+from .models import QualityScore, ScoredImage
+
+# Near-miss rules: "always" (accept within the tolerance band), "budget" (only when
+# generation does not fit the latency budget) or "never"
+NEAR_MISS_RULES = ("always", "budget", "never")
+
+logger = logging.getLogger(__name__)
+
+
+def parse_rules(spec: Optional[str]) -> dict[str, str]:
+    """
+    Parse an ACCEPT_NEAR_MISS_RULES string.
+
+    Format: ``mode=rule`` entries separated by commas, e.g.
+    ``auto=always,stock_only=budget``. Malformed entries are ignored.
+    """
+    rules: dict[str, str] = {}
+    for entry in (spec or "").split(","):
+        mode, _, rule = entry.partition("=")
+        rule = rule.strip()
+        if not mode.strip() or rule not in NEAR_MISS_RULES:
+            if entry.strip():
+                logger.warning("Ignoring malformed near-miss rule: %s", entry)
+            continue
+        rules[mode.strip()] = rule
+    return rules
+
+
+class AcceptancePolicy:
+    """
+    Decides whether a stock candidate that failed ``filter_and_sort`` is good enough.
+
+    A near-miss is safe, has every thresholded score within the tolerance band
+    below its minimum and reaches the minimum weighted composite score.
+    Whether near-misses are returned depends on the image mode's rule. When
+    generation does not fit the latency budget at all, the best safe candidate
+    is returned regardless of the band.
+    """
+
+    def __init__(self):
+        """Initialize the policy from configuration."""
+        self.weights = {
+            "quality": config.accept_weight_quality,
+            "presentation": config.accept_weight_presentation,
+            "safety": config.accept_weight_safety,
+        }
+        self.tolerance = config.accept_tolerance
+        self.min_composite = config.accept_min_composite
+        self.rules = parse_rules(config.accept_near_miss_rules)
+
+    def composite(self, scores: QualityScore) -> float:
+        """Weighted mean of the available scores (missing presentation/safety scores are left out)."""
+        components = {"quality": scores.quality_score}
+        if scores.presentation_score is not None:
+            components["presentation"] = scores.presentation_score
+        if scores.nudity_score is not None:
+            components["safety"] = scores.nudity_score
+
+        total_weight = sum(self.weights[name] for name in components)
+        if total_weight <= 0:
+            return scores.quality_score
+        return sum(self.weights[name] * value for name, value in components.items()) / total_weight
+
+    def is_near_miss(self, scores: QualityScore) -> bool:
+        """Whether a candidate lies within the tolerance band of all thresholds."""
+        if not scores.is_safe:
+            return False
+        if scores.quality_score < config.min_quality_score - self.tolerance:
+            return False
+        if scores.presentation_score is not None and (
+            scores.presentation_score < config.min_presentation_score - self.tolerance
+        ):
+            return False
+        return self.composite(scores) >= self.min_composite
+
+    def select_near_miss(
+        self,
+        scored_images: list[ScoredImage],
+        image_mode: str,
+        generation_affordable: bool = True
+    ) -> tuple[Optional[ScoredImage], Optional[str]]:
+        """
+        Pick the candidate to return instead of generating (or returning nothing).
+
+        Args:
+            scored_images: Candidates that did not pass filter_and_sort
+            image_mode: Slide image mode ("auto", "stock_only")
+            generation_affordable: Whether AI generation fits the latency budget
+
+        Returns:
+            Tuple of (candidate, reason) where reason is "tolerance" or "budget";
+            (None, None) when the slow path should run
+        """
+        rule = self.rules.get(image_mode, "never")
+        if rule == "always" or (rule == "budget" and not generation_affordable):
+            near_misses = [img for img in scored_images if self.is_near_miss(img.scores)]
+            if near_misses:
+                return max(near_misses, key=lambda img: self.composite(img.scores)), "tolerance"
+
+        if image_mode == "auto" and not generation_affordable:
+            safe = [img for img in scored_images if img.scores.is_safe]
+            if safe:
+                return max(safe, key=lambda img: self.composite(img.scores)), "budget"
+        return None, None
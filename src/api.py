@@ -1,21 +1,89 @@
 """FastAPI application for the image generator service."""
+import asyncio
+import secrets
+import time
+from contextlib import asynccontextmanager, suppress
 from pathlib import Path
-from typing import Optional, List
-from fastapi import FastAPI, HTTPException, Query, Response
+from typing import Any, Awaitable, Optional, List
+from fastapi import Depends, FastAPI, Header, HTTPException, Query, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse
 from fastapi.staticfiles import StaticFiles
 
 from .config import config
-from .models import SlideInput, ImageResult, ColorConfig
+from .models import SlideInput, ImageResult, ColorConfig, PrefetchRequest
 from .orchestrator import ImageOrchestrator
+from .prefetch import DeckPrefetcher
+from .request_timing import server_timing
 from . import generated_cache
+from .bulkhead import bulkhead_stats
+from .generation_scheduler import generation_scheduler
+from .metrics import metrics
+from .flight_recorder import flight_recorder
+from .profiling import loop_monitor, request_profiler
+from . import flux_webhooks
+from . import local_quality
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Run the event-loop lag monitor while the app is serving.
+
+    The local quality process pool is created before serving and stopped on
+    shutdown, together with flushing the score cache.
+    """
+    local_quality.start_executor()
+    loop_monitor.start()
+    yield
+    await loop_monitor.stop()
+    await asyncio.to_thread(orchestrator.score_cache.close)
+    await asyncio.to_thread(local_quality.shutdown_executor)
+
 
 app = FastAPI(
     title="NPE1 Colecture Image Generator",
     description="AI-powered image finder and generator for PowerPoint presentations",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
+
+class MetricsMiddleware:
+    """Counts HTTP requests and their duration per route template, method and status."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started_at = time.monotonic()
+        response_status = {"code": 500}
+
+        async def send_with_status(message):
+            if message["type"] == "http.response.start":
+                response_status["code"] = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            # Route templates (e.g. /generated/{image_id}) keep the label set bounded
+            route = scope.get("route")
+            labels = {
+                "endpoint": getattr(route, "path", None) or "unmatched",
+                "method": scope["method"],
+                "status": str(response_status["code"]),
+            }
+            metrics.inc("imagegen_http_requests_total", labels)
+            metrics.observe("imagegen_http_request_duration_seconds", time.monotonic() - started_at, labels)
+
+
+app.add_middleware(MetricsMiddleware)
+
 # Enable CORS
 app.add_middleware(
     CORSMiddleware,
@@ -23,6 +91,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Server-Timing", "X-Profile-Id"],
 )
 
 # Serve static assets (e.g., error.png)
@@ -32,10 +101,166 @@ if static_dir.exists():
 
 # Initialize orchestrator
 orchestrator = ImageOrchestrator()
+prefetcher = DeckPrefetcher(orchestrator)
+
+
+def _register_metrics() -> None:
+    """Expose cache, generated image store and queue state as scrape-time metrics."""
+    caches = {
+        "prompt": orchestrator.image_generator.prompt_cache,
+        "image_buffers": orchestrator.image_fetcher.buffers,
+        "scores": orchestrator.score_cache,
+        "prefetch_results": prefetcher.results,
+    }
+
+    def cache_ratio(cache) -> float:
+        total = cache.hits + cache.misses
+        return cache.hits / total if total else 0.0
+
+    metrics.register_collector(
+        "imagegen_cache_hits_total", "counter", "Cache lookups served from the cache",
+        lambda: [({"cache": name}, cache.hits) for name, cache in caches.items()]
+    )
+    metrics.register_collector(
+        "imagegen_cache_misses_total", "counter", "Cache lookups that missed",
+        lambda: [({"cache": name}, cache.misses) for name, cache in caches.items()]
+    )
+    metrics.register_collector(
+        "imagegen_cache_hit_ratio", "gauge", "Fraction of cache lookups served from the cache since start",
+        lambda: [({"cache": name}, cache_ratio(cache)) for name, cache in caches.items()]
+    )
+    metrics.register_collector(
+        "imagegen_generated_cache_bytes", "gauge", "Resident bytes of generated images held in memory",
+        lambda: [({}, generated_cache.stats()["bytes"])]
+    )
+    metrics.register_collector(
+        "imagegen_generated_cache_images", "gauge", "Generated images held in memory",
+        lambda: [({}, generated_cache.stats()["images"])]
+    )
+    metrics.register_collector(
+        "imagegen_bulkhead_active", "gauge", "Calls running per upstream bulkhead",
+        lambda: [({"bulkhead": name}, stats["active"]) for name, stats in bulkhead_stats().items()]
+    )
+    metrics.register_collector(
+        "imagegen_bulkhead_queued", "gauge", "Calls waiting per upstream bulkhead",
+        lambda: [({"bulkhead": name}, stats["queued"]) for name, stats in bulkhead_stats().items()]
+    )
+    metrics.register_collector(
+        "imagegen_bulkhead_rejected_total", "counter", "Calls rejected because the bulkhead queue was full",
+        lambda: [({"bulkhead": name}, stats["rejected"]) for name, stats in bulkhead_stats().items()]
+    )
+    metrics.register_collector(
+        "imagegen_generation_active", "gauge", "Generations running per scheduler lane",
+        lambda: [({"lane": name}, stats["active"]) for name, stats in generation_scheduler.stats().items()]
+    )
+    metrics.register_collector(
+        "imagegen_generation_queued", "gauge", "Generations waiting per scheduler lane and priority",
+        lambda: [
+            ({"lane": name, "priority": priority}, count)
+            for name, stats in generation_scheduler.stats().items()
+            for priority, count in stats["queued"].items()
+        ]
+    )
+
+
+_register_metrics()
 
 # Log PUBLIC_BASE_URL for visibility at startup
 print(f"[config] PUBLIC_BASE_URL={getattr(config, 'public_base_url', None)}")
 
+# Seconds between client disconnect checks while a request is processed
+DISCONNECT_POLL_INTERVAL = 0.5
+
+
+class ClientDisconnected(Exception):
+    """The client went away before the response was ready."""
+
+
+async def run_until_disconnect(request: Request, work: Awaitable[Any]) -> Any:
+    """
+    Run request work, cancelling it when the client disconnects.
+
+    Cancellation propagates through the orchestrator's task tree: in-flight
+    httpx and LLM calls are aborted and queued generations leave the scheduler.
+
+    Args:
+        request: Incoming request (polled for disconnects)
+        work: Coroutine producing the response
+
+    Returns:
+        Result of the work
+
+    Raises:
+        ClientDisconnected: If the client disconnected first
+    """
+    task = asyncio.ensure_future(work)
+    try:
+        while True:
+            done, _ = await asyncio.wait({task}, timeout=DISCONNECT_POLL_INTERVAL)
+            if done:
+                return task.result()
+            if await request.is_disconnected():
+                print(f"Client disconnected, cancelling {request.url.path}")
+                task.cancel()
+                with suppress(asyncio.CancelledError):
+                    await task
+                raise ClientDisconnected()
+    finally:
+        if not task.done():
+            task.cancel()
+
+
+def require_admin(x_admin_token: Optional[str] = Header(None, description="ADMIN_TOKEN")) -> None:
+    """Allow debug endpoints only with the configured ADMIN_TOKEN (hidden when unset)."""
+    if not config.admin_token:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not x_admin_token or not secrets.compare_digest(x_admin_token, config.admin_token):
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+
+
+def require_prefetch_token(x_prefetch_token: Optional[str] = Header(None, description="PREFETCH_TOKEN")) -> None:
+    """Allow the prefetch endpoints only with the configured PREFETCH_TOKEN (hidden when unset)."""
+    if not config.prefetch_token:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not x_prefetch_token or not secrets.compare_digest(x_prefetch_token, config.prefetch_token):
+        raise HTTPException(status_code=403, detail="Invalid prefetch token")
+
+
+def profile_requested(request: Request) -> bool:
+    """
+    Whether the caller asked to profile this request (X-Profile header or ?profile=1).
+
+    Profiling is an admin feature: the request must also carry a valid
+    X-Admin-Token, otherwise it is rejected like the debug endpoints.
+    """
+    flag = request.headers.get("x-profile") or request.query_params.get("profile")
+    if not flag or flag.lower() in ("0", "false", "no", "off"):
+        return False
+    require_admin(request.headers.get("x-admin-token"))
+    return True
+
+
+async def serve_slide(request: Request, response: Response, slide: SlideInput, profile: bool) -> ImageResult:
+    """
+    Process a slide for an endpoint, optionally under the profiler.
+
+    Sets the Server-Timing header and, for profiled requests, X-Profile-Id
+    (absent if another profile was already running).
+
+    Raises:
+        ClientDisconnected: If the client disconnected first
+    """
+    work = run_until_disconnect(request, prefetcher.process_slide(slide))
+    if profile:
+        result, profile_id = await request_profiler.run(work, label=f"{request.method} {request.url.path}")
+        if profile_id:
+            response.headers["X-Profile-Id"] = profile_id
+    else:
+        result = await work
+    if result.timings:
+        response.headers["Server-Timing"] = server_timing(result.timings)
+    return result
+
 
 @app.get("/")
 async def root():
@@ -43,24 +268,112 @@ async def root():
     return {
         "service": "NPE1 Colecture Image Generator",
         "status": "running",
-        "version": "1.0.0"
+        "version": "1.0.0",
+        "bulkheads": bulkhead_stats(),
+        "generation_scheduler": generation_scheduler.stats(),
+        "event_loop": {
+            "max_lag_seconds": round(loop_monitor.max_lag, 4),
+            "stalls": len(loop_monitor.stalls)
+        }
+    }
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    """
+    Metrics in the Prometheus text exposition format.
+
+    Request counts and latency histograms per endpoint, pipeline stage and
+    upstream provider (with status labels), cache hit ratios, generated image
+    memory and queue depths.
+    """
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+
+@app.get("/debug/traces", dependencies=[Depends(require_admin)])
+async def list_traces():
+    """Summaries of the recorded slow or failed requests, newest first."""
+    return {
+        "slow_ms": config.flight_recorder_slow_ms,
+        "capacity": flight_recorder.size,
+        "recorded": flight_recorder.recorded,
+        "traces": flight_recorder.traces(),
+    }
+
+
+@app.get("/debug/traces/{trace_id}", dependencies=[Depends(require_admin)])
+async def get_trace(
+    trace_id: str,
+    format: str = Query("json", description="json, or chrome (load in chrome://tracing or ui.perfetto.dev)")
+):
+    """Full trace of a recorded request: every stage, upstream call and branch taken."""
+    trace = flight_recorder.get(trace_id)
+    if trace is None:
+        raise HTTPException(status_code=404, detail="Trace not found")
+    if format == "chrome":
+        return JSONResponse(
+            trace.to_chrome_trace(),
+            headers={"Content-Disposition": f'attachment; filename="trace-{trace_id}.json"'}
+        )
+    return trace.to_dict()
+
+
+@app.get("/debug/profiles", dependencies=[Depends(require_admin)])
+async def list_profiles():
+    """Summaries of the stored request profiles, newest first."""
+    return {
+        "stall_threshold_ms": config.loop_stall_threshold_ms,
+        "max_loop_lag_seconds": round(loop_monitor.max_lag, 4),
+        "profiles": request_profiler.list(),
     }
 
 
+@app.get("/debug/profiles/{profile_id}", dependencies=[Depends(require_admin)])
+async def get_profile(
+    profile_id: str,
+    format: str = Query("json", description="json, or pstats (open with snakeviz or python -m pstats)")
+):
+    """Profile of one request: hottest functions and event-loop stalls while it ran."""
+    report = request_profiler.get(profile_id)
+    if report is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    if format == "pstats":
+        return Response(
+            content=report["_pstats"],
+            media_type="application/octet-stream",
+            headers={"Content-Disposition": f'attachment; filename="profile-{profile_id}.prof"'}
+        )
+    return {key: value for key, value in report.items() if key != "_pstats"}
+
+
 @app.post("/generate-image", response_model=ImageResult)
-async def generate_image(slide: SlideInput):
+async def generate_image(
+    slide: SlideInput,
+    request: Request,
+    response: Response,
+    x_latency_budget_ms: Optional[int] = Header(None, description="Latency budget in milliseconds")
+):
     """
     Generate or find a suitable image for a slide.
 
+    The stage/upstream breakdown is returned in ``timings`` and as a
+    Server-Timing header. Admins can profile the request with ``X-Profile: 1``.
+
     Args:
         slide: Slide content with title, keywords, and bullets
+        x_latency_budget_ms: X-Latency-Budget-Ms header (used if the body has no latency_budget_ms)
 
     Returns:
         Image result with URL and source information
     """
+    profile = profile_requested(request)
     try:
-        result = await orchestrator.process_slide(slide)
-        return result
+        if slide.latency_budget_ms is None and x_latency_budget_ms is not None:
+            slide.latency_budget_ms = x_latency_budget_ms
+        return await serve_slide(request, response, slide, profile)
+    except ClientDisconnected:
+        # Nobody reads the body; 499 mirrors nginx's "client closed request"
+        return Response(status_code=499)
     except Exception as e:
         # Return error image instead of raising exception
         print(f"API error: {e}")
@@ -76,13 +389,19 @@ async def generate_image(slide: SlideInput):
 
 @app.get("/generate-image-simple", response_model=ImageResult)
 async def generate_image_simple(
+    request: Request,
+    response: Response,
     title: Optional[str] = Query(None, description="Slide title (optional if keywords provided)"),
     style: Optional[str] = Query(None, description="Style value or scenario key (e.g., 'flat_illustration')"),
     image_mode: str = Query("auto", description="Image mode: stock_only, ai_only, or auto"),
     ai_model: str = Query("auto", description="AI model: auto/flux (both map to google_banana), banana/imagen (OpenRouter), or google_banana (AI Studio)"),
     primary_color: Optional[str] = Query(None, description="Primary color (e.g., '#0066CC' or 'blue')"),
     secondary_color: Optional[str] = Query(None, description="Secondary color"),
-    keywords: Optional[str] = Query(None, description="Comma-separated keywords (overrides auto-extraction)")
+    keywords: Optional[str] = Query(None, description="Comma-separated keywords (overrides auto-extraction)"),
+    deck_id: Optional[str] = Query(None, description="Deck identifier (scope for reusing identical generations)"),
+    force_fresh: bool = Query(False, description="Generate a new image even if an identical one exists"),
+    priority: str = Query("interactive", description="Generation priority: interactive or background"),
+    latency_budget_ms: Optional[int] = Query(None, description="Latency budget in milliseconds")
 ):
     """
     Simple GET endpoint for image generation with query parameters.
@@ -90,6 +409,7 @@ async def generate_image_simple(
     Example:
         GET /generate-image-simple?title=Digital%20Transformation&style=modern,minimal&image_mode=ai_only&ai_model=imagen
     """
+    profile = profile_requested(request)
     try:
         # Parse keywords
         keywords_list = None
@@ -108,11 +428,16 @@ async def generate_image_simple(
             image_mode=image_mode,  # type: ignore
             ai_model=ai_model,  # type: ignore
             colors=colors,
-            image_keywords=keywords_list
+            image_keywords=keywords_list,
+            deck_id=deck_id,
+            force_fresh=force_fresh,
+            priority=priority,  # type: ignore
+            latency_budget_ms=latency_budget_ms
         )
 
-        result = await orchestrator.process_slide(slide)
-        return result
+        return await serve_slide(request, response, slide, profile)
+    except ClientDisconnected:
+        return Response(status_code=499)
     except Exception as e:
         # Return error image instead of raising exception
         print(f"API error: {e}")
@@ -126,8 +451,39 @@ async def generate_image_simple(
         )
 
 
+@app.post("/prefetch", dependencies=[Depends(require_prefetch_token)])
+async def prefetch_deck(request: PrefetchRequest):
+    """
+    Process a deck's slides in the background so later requests are served from cache.
+
+    Requires the X-Prefetch-Token header: prefetching spends generation budget.
+
+    Args:
+        request: Deck identifier and slides
+
+    Returns:
+        Counts of accepted, already cached and over-budget slides
+    """
+    return prefetcher.prefetch(request.deck_id, request.slides)
+
+
+@app.get("/prefetch/{deck_id}", dependencies=[Depends(require_prefetch_token)])
+async def prefetch_status(deck_id: str):
+    """Progress of a deck's prefetch."""
+    status = prefetcher.status(deck_id)
+    if status is None:
+        raise HTTPException(status_code=404, detail="No prefetch for this deck")
+    return status
+
+
+@app.delete("/prefetch/{deck_id}", dependencies=[Depends(require_prefetch_token)])
+async def cancel_prefetch(deck_id: str):
+    """Cancel a deck's pending prefetch work."""
+    return {"deck_id": deck_id, "cancelled": prefetcher.cancel(deck_id)}
+
+
 @app.post("/extract-keywords")
-async def extract_keywords(slide: SlideInput):
+async def extract_keywords(slide: SlideInput, request: Request):
     """
     Extract keywords from slide content.
 
@@ -138,11 +494,15 @@ async def extract_keywords(slide: SlideInput):
         Extracted keywords
     """
     try:
-        extraction_result, refined_keywords = orchestrator.keyword_extractor.extract_keywords(slide)
+        extraction_result, refined_keywords = await run_until_disconnect(
+            request, orchestrator.keyword_extractor.extract_keywords(slide)
+        )
         return {
             "detailed": extraction_result.dict(),
             "refined": refined_keywords
         }
+    except ClientDisconnected:
+        return Response(status_code=499)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -154,3 +514,21 @@ async def get_generated_image(image_id: str):
     if not cached:
         raise HTTPException(status_code=404, detail="Image not found")
     return Response(content=cached.data, media_type=cached.media_type)
+
+
+@app.post("/flux/webhook")
+async def flux_webhook(request: Request, token: Optional[str] = Query(None)):
+    """Receive FLUX completion callbacks and wake the waiting generation."""
+    if not config.flux_webhook_url or not config.flux_webhook_secret:
+        # Push mode is off; never accept unauthenticated completions
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not token or not secrets.compare_digest(token, config.flux_webhook_secret):
+        raise HTTPException(status_code=403, detail="Invalid webhook token")
+    try:
+        payload = await request.json()
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid JSON payload")
+    if not isinstance(payload, dict):
+        raise HTTPException(status_code=400, detail="Invalid JSON payload")
+    delivered = flux_webhooks.resolve(payload)
+    return {"received": True, "delivered": delivered}
@@ -0,0 +1,134 @@
+"""Named bulkheads: per-service concurrency limits with bounded queues."""
+from __future__ import annotations
+
+import asyncio
+import logging
+from typing import Optional
+
+from .config import config
+
+# Default limits per upstream service: (max concurrent calls, max queued callers)
+DEFAULT_LIMITS: dict[str, tuple[int, int]] = {
+    "sightengine": (8, 64),
+    "scoring_service": (4, 128),
+    "nudity_service": (4, 128),
+    "unsplash": (4, 32),
+    "pexels": (4, 32),
+    "openrouter_image": (4, 32),
+    "ai_studio": (4, 32),
+    "flux": (4, 32),
+}
+
+logger = logging.getLogger(__name__)
+
+
+class BulkheadRejected(RuntimeError):
+    """Raised when a bulkhead's queue is full and the call is rejected."""
+
+    def __init__(self, name: str, max_concurrent: int, max_queue: int):
+        super().__init__(
+            f"Bulkhead '{name}' rejected call: {max_concurrent} calls active and {max_queue} queued"
+        )
+        self.name = name
+
+
+class Bulkhead:
+    """
+    Limits concurrent calls to one upstream service.
+
+    At most ``max_concurrent`` calls run at once and at most ``max_queue``
+    callers wait; further callers fail fast with BulkheadRejected.
+    Use as ``async with get_bulkhead("sightengine"): ...``.
+    """
+
+    def __init__(self, name: str, max_concurrent: int, max_queue: int):
+        """
+        Initialize the bulkhead.
+
+        Args:
+            name: Service name
+            max_concurrent: Maximum calls in flight
+            max_queue: Maximum callers waiting for a slot
+        """
+        self.name = name
+        self.max_concurrent = max(1, max_concurrent)
+        self.max_queue = max(0, max_queue)
+        self._semaphore = asyncio.Semaphore(self.max_concurrent)
+        self.active = 0
+        self.queued = 0
+        self.completed = 0
+        self.rejected = 0
+
+    async def __aenter__(self) -> "Bulkhead":
+        if self.active >= self.max_concurrent and self.queued >= self.max_queue:
+            self.rejected += 1
+            logger.warning(
+                "Bulkhead %s full (active=%d queued=%d), rejecting call",
+                self.name,
+                self.active,
+                self.queued,
+            )
+            raise BulkheadRejected(self.name, self.max_concurrent, self.max_queue)
+
+        self.queued += 1
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self.queued -= 1
+        self.active += 1
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        self.active -= 1
+        self.completed += 1
+        self._semaphore.release()
+
+    def stats(self) -> dict:
+        """Current counters for this bulkhead."""
+        return {
+            "max_concurrent": self.max_concurrent,
+            "max_queue": self.max_queue,
+            "active": self.active,
+            "queued": self.queued,
+            "completed": self.completed,
+            "rejected": self.rejected,
+        }
+
+
+def parse_limits(spec: Optional[str]) -> dict[str, tuple[int, int]]:
+    """
+    Parse a BULKHEAD_LIMITS string.
+
+    Format: ``name=concurrent:queue`` entries separated by commas, e.g.
+    ``sightengine=8:64,flux=2:16``. Malformed entries are ignored.
+    """
+    limits: dict[str, tuple[int, int]] = {}
+    for entry in (spec or "").split(","):
+        if "=" not in entry:
+            continue
+        name, _, value = entry.partition("=")
+        concurrent, _, queue = value.partition(":")
+        try:
+            limits[name.strip()] = (int(concurrent), int(queue) if queue else 0)
+        except ValueError:
+            logger.warning("Ignoring malformed bulkhead limit: %s", entry)
+    return limits
+
+
+_LIMITS = {**DEFAULT_LIMITS, **parse_limits(config.bulkhead_limits)}
+_BULKHEADS: dict[str, Bulkhead] = {}
+
+
+def get_bulkhead(name: str) -> Bulkhead:
+    """Return the shared bulkhead for a service, creating it on first use."""
+    bulkhead = _BULKHEADS.get(name)
+    if bulkhead is None:
+        max_concurrent, max_queue = _LIMITS.get(name, (8, 64))
+        bulkhead = Bulkhead(name, max_concurrent, max_queue)
+        _BULKHEADS[name] = bulkhead
+    return bulkhead
+
+
+def bulkhead_stats() -> dict[str, dict]:
+    """Counters of all bulkheads created so far."""
+    return {name: bulkhead.stats() for name, bulkhead in _BULKHEADS.items()}
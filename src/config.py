@@ -20,12 +20,48 @@ class Config(BaseModel):
     google_ai_studio_api_key: str = os.getenv("GOOGLE_AI_STUDIO_API_KEY", "")
     # FLUX model endpoint path (e.g., "flux-2-pro", "flux-2-flex", "flux-pro-1.1")
     flux_model: str = os.getenv("FLUX_MODEL", "flux-2-pro")
+    flux_api_base: str = os.getenv("FLUX_API_BASE", "https://api.eu.bfl.ai/v1")
+    # Adaptive polling: first delay is tuned from observed completion times per model
+    flux_poll_initial_delay: float = float(os.getenv("FLUX_POLL_INITIAL_DELAY", "1.0"))
+    flux_poll_interval: float = float(os.getenv("FLUX_POLL_INTERVAL", "0.5"))
+    flux_poll_max_interval: float = float(os.getenv("FLUX_POLL_MAX_INTERVAL", "4.0"))
+    flux_poll_backoff: float = float(os.getenv("FLUX_POLL_BACKOFF", "1.5"))
+    flux_poll_deadline: float = float(os.getenv("FLUX_POLL_DEADLINE", "120"))
+    # Optional push mode: public URL of our /flux/webhook endpoint (polling stays as safety net);
+    # only enabled together with the secret
+    flux_webhook_url: Optional[str] = os.getenv("FLUX_WEBHOOK_URL")
+    flux_webhook_secret: Optional[str] = os.getenv("FLUX_WEBHOOK_SECRET")
 
     # Service URLs
     scoring_service_url: Optional[str] = os.getenv("SCORING_SERVICE_URL")
     nudity_service_url: Optional[str] = os.getenv("NUDITY_SERVICE_URL", "http://192.168.100.20:8101")
     nudity_service_threshold: float = float(os.getenv("NUDITY_SERVICE_THRESHOLD", "0.5"))
     nudity_service_model: str = os.getenv("NUDITY_SERVICE_MODEL", "ViT-L/14")
+    # In-process nudity classifier hook "module:function", called with (bytes, media_type)
+    nudity_classifier: Optional[str] = os.getenv("NUDITY_CLASSIFIER")
+
+    # Micro-batching of requests to the scoring and local nudity services
+    scoring_batch_enabled: bool = os.getenv("SCORING_BATCH_ENABLED", "true").lower() in ("1", "true", "yes")
+    scoring_batch_window_ms: float = float(os.getenv("SCORING_BATCH_WINDOW_MS", "5"))
+    scoring_batch_max: int = int(os.getenv("SCORING_BATCH_MAX", "16"))
+
+    # Bulkhead overrides per upstream service, e.g. "sightengine=8:64,flux=2:16"
+    # (max concurrent calls : max queued callers); see src/bulkhead.py for defaults
+    bulkhead_limits: str = os.getenv("BULKHEAD_LIMITS", "")
+    # Generation scheduler per provider lane, e.g. "flux=4:60,ai_studio=2:30"
+    # (max concurrent generations : max starts per minute); see src/generation_scheduler.py
+    generation_scheduler_enabled: bool = os.getenv("GENERATION_SCHEDULER_ENABLED", "true").lower() in ("1", "true", "yes")
+    generation_limits: str = os.getenv("GENERATION_LIMITS", "")
+
+    # Deck prefetch (background processing of slides before they are viewed)
+    prefetch_concurrency: int = int(os.getenv("PREFETCH_CONCURRENCY", "2"))
+    prefetch_max_slides_per_deck: int = int(os.getenv("PREFETCH_MAX_SLIDES_PER_DECK", "100"))
+    prefetch_result_ttl: float = float(os.getenv("PREFETCH_RESULT_TTL", "1800"))
+    prefetch_max_results: int = int(os.getenv("PREFETCH_MAX_RESULTS", "2000"))
+    # Slides prefetched per hour over all decks (new deck IDs do not bring new budget)
+    prefetch_max_slides_per_hour: int = int(os.getenv("PREFETCH_MAX_SLIDES_PER_HOUR", "500"))
+    # Token clients send as X-Prefetch-Token; the /prefetch endpoints are disabled without it
+    prefetch_token: Optional[str] = os.getenv("PREFETCH_TOKEN")
 
     # OpenRouter metadata (optional but recommended by OpenRouter)
     openrouter_referer: Optional[str] = os.getenv("OPENROUTER_REFERER")
@@ -36,11 +72,75 @@ class Config(BaseModel):
     min_quality_score: float = float(os.getenv("MIN_QUALITY_SCORE", "0.7"))
     min_nudity_safe_score: float = float(os.getenv("MIN_NUDITY_SAFE_SCORE", "0.99"))
 
+    # Quality scorer: "sightengine", "local", "prefilter" (local first, SightEngine only
+    # above LOCAL_QUALITY_PREFILTER_MIN) or "fallback" (local when SightEngine fails)
+    quality_scorer: str = os.getenv("QUALITY_SCORER", "fallback")
+    local_quality_prefilter_min: float = float(os.getenv("LOCAL_QUALITY_PREFILTER_MIN", "0.4"))
+    local_quality_workers: int = int(os.getenv("LOCAL_QUALITY_WORKERS", "2"))
+
+    # Persistent score cache for stock images (SQLite file + in-memory front)
+    score_cache_enabled: bool = os.getenv("SCORE_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+    score_cache_path: str = os.getenv("SCORE_CACHE_PATH", "data/score_cache.sqlite3")
+    score_cache_memory_entries: int = int(os.getenv("SCORE_CACHE_MEMORY_ENTRIES", "100000"))
+
+    # Near-duplicate detection of stock candidates via perceptual hash (dHash)
+    phash_dedup_enabled: bool = os.getenv("PHASH_DEDUP_ENABLED", "true").lower() in ("1", "true", "yes")
+    phash_max_distance: int = int(os.getenv("PHASH_MAX_DISTANCE", "6"))
+
+    # Candidate image download (fetched once, shared by all scorers)
+    image_fetch_max_concurrency: int = int(os.getenv("IMAGE_FETCH_MAX_CONCURRENCY", "8"))
+    image_fetch_max_bytes: int = int(os.getenv("IMAGE_FETCH_MAX_BYTES", str(15 * 1024 * 1024)))
+    image_fetch_cache_ttl: float = float(os.getenv("IMAGE_FETCH_CACHE_TTL", "120"))
+    image_fetch_cache_max_bytes: int = int(os.getenv("IMAGE_FETCH_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+
     # Model configurations
     gemini_model: str = "google/gemini-2.0-flash-001"
     claude_model: str = "anthropic/claude-3.5-haiku"
     gemini_image_model: str = "google/gemini-2.5-flash-image-preview"
 
+    # Cache of LLM-built generation prompts
+    prompt_cache_size: int = int(os.getenv("PROMPT_CACHE_SIZE", "512"))
+    prompt_cache_ttl: float = float(os.getenv("PROMPT_CACHE_TTL", "86400"))
+
+    # Reuse of generated images for identical (model, prompt, size): "global", "deck" or "off"
+    generation_reuse_scope: str = os.getenv("GENERATION_REUSE_SCOPE", "global")
+
+    # Acceptance of stock near-misses (composite of quality, presentation fit and safety)
+    accept_weight_quality: float = float(os.getenv("ACCEPT_WEIGHT_QUALITY", "0.4"))
+    accept_weight_presentation: float = float(os.getenv("ACCEPT_WEIGHT_PRESENTATION", "0.5"))
+    accept_weight_safety: float = float(os.getenv("ACCEPT_WEIGHT_SAFETY", "0.1"))
+    accept_tolerance: float = float(os.getenv("ACCEPT_TOLERANCE", "0.05"))
+    accept_min_composite: float = float(os.getenv("ACCEPT_MIN_COMPOSITE", "0.65"))
+    # Per image mode: budget (only when generation does not fit the latency budget) / never / always (opt-in)
+    accept_near_miss_rules: str = os.getenv("ACCEPT_NEAR_MISS_RULES", "auto=budget,stock_only=budget")
+
+    # Default request latency budget in milliseconds (0 = none); overridden per request
+    default_latency_budget_ms: int = int(os.getenv("DEFAULT_LATENCY_BUDGET_MS", "0"))
+
+    # Speculative generation in auto mode: generate alongside stock search when stock likely misses
+    speculative_generation: bool = os.getenv("SPECULATIVE_GENERATION", "false").lower() in ("1", "true", "yes")
+    speculative_miss_threshold: float = float(os.getenv("SPECULATIVE_MISS_THRESHOLD", "0.4"))
+    speculative_max_per_hour: int = int(os.getenv("SPECULATIVE_MAX_PER_HOUR", "60"))
+
+    # Hedged generation: race providers, keep the first image that passes the safety check
+    hedged_generation: bool = os.getenv("HEDGED_GENERATION", "false").lower() in ("1", "true", "yes")
+    hedge_providers: str = os.getenv("HEDGE_PROVIDERS", "google_banana,banana,flux")
+    hedge_percentile: float = float(os.getenv("HEDGE_PERCENTILE", "90"))
+    hedge_default_delay: float = float(os.getenv("HEDGE_DEFAULT_DELAY", "30"))
+    hedge_min_delay: float = float(os.getenv("HEDGE_MIN_DELAY", "5"))
+    hedge_max_parallel: int = int(os.getenv("HEDGE_MAX_PARALLEL", "2"))
+
+    # Flight recorder: traces of the last N slow (>= FLIGHT_RECORDER_SLOW_MS) or failed requests
+    flight_recorder_size: int = int(os.getenv("FLIGHT_RECORDER_SIZE", "50"))
+    flight_recorder_slow_ms: int = int(os.getenv("FLIGHT_RECORDER_SLOW_MS", "10000"))
+    # Token for admin/debug endpoints (X-Admin-Token header); unset disables them
+    admin_token: Optional[str] = os.getenv("ADMIN_TOKEN")
+
+    # Event-loop lag monitor (0 = off) and stall threshold; per-request profiles kept (admin X-Profile header)
+    loop_lag_interval_ms: int = int(os.getenv("LOOP_LAG_INTERVAL_MS", "100"))
+    loop_stall_threshold_ms: int = int(os.getenv("LOOP_STALL_THRESHOLD_MS", "100"))
+    profile_max_stored: int = int(os.getenv("PROFILE_MAX_STORED", "20"))
+
     # Public base URL for serving generated images (optional, hardcoded fallback)
     public_base_url: Optional[str] = os.getenv("PUBLIC_BASE_URL") or "https://langchain.gurk.li"
 
@@ -56,4 +156,6 @@ print(f"  PEXELS_API_KEY: {'✓ set' if config.pexels_api_key else '✗ missing'
 print(f"  FLUX_API_KEY: {'✓ set' if config.flux_api_key else '✗ missing'}")
 print(f"  GOOGLE_AI_STUDIO_API_KEY: {'✓ set (length: ' + str(len(config.google_ai_studio_api_key)) + ')' if config.google_ai_studio_api_key else '✗ missing'}")
 print(f"  SIGHTENGINE_API_USER: {'✓ set' if config.sightengine_api_user else '✗ missing'}")
+if config.flux_webhook_url and not config.flux_webhook_secret:
+    print("  FLUX_WEBHOOK_URL is set without FLUX_WEBHOOK_SECRET: webhook disabled, polling only")
 print("=" * 50)
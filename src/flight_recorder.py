@@ -0,0 +1,207 @@
+"""Always-on span recorder keeping the traces of recent slow or failed requests."""
+from __future__ import annotations
+
+import asyncio
+import contextvars
+import time
+import uuid
+from collections import deque
+from typing import Any, Optional
+
+from .config import config
+
+# Spans kept per trace; later spans are counted but dropped
+MAX_SPANS_PER_TRACE = 500
+
+
+class Span:
+    """One finished operation (stage, upstream call) or instant event (branch taken)."""
+
+    __slots__ = ("name", "category", "start", "end", "attrs", "task")
+
+    def __init__(self, name: str, category: str, start: float, attrs: dict[str, Any], task: str):
+        self.name = name
+        self.category = category
+        self.start = start
+        self.end: Optional[float] = None
+        self.attrs = attrs
+        self.task = task
+
+    def to_dict(self, origin: float) -> dict:
+        """Span with times in milliseconds relative to the trace start."""
+        return {
+            "name": self.name,
+            "category": self.category,
+            "start_ms": round((self.start - origin) * 1000, 2),
+            "duration_ms": round((self.end - self.start) * 1000, 2) if self.end is not None else None,
+            "task": self.task,
+            **({"attrs": self.attrs} if self.attrs else {}),
+        }
+
+
+class Trace:
+    """Spans of one request."""
+
+    def __init__(self, name: str, attrs: dict[str, Any]):
+        self.trace_id = uuid.uuid4().hex[:16]
+        self.name = name
+        self.attrs = attrs
+        self.wall_start = time.time()
+        self.start = time.monotonic()
+        self.end: Optional[float] = None
+        self.status = "running"
+        self.spans: list[Span] = []
+        self.dropped = 0
+
+    def add(self, span: Span) -> None:
+        if len(self.spans) < MAX_SPANS_PER_TRACE:
+            self.spans.append(span)
+        else:
+            self.dropped += 1
+
+    @property
+    def duration(self) -> float:
+        return (self.end or time.monotonic()) - self.start
+
+    def summary(self) -> dict:
+        """Trace metadata without spans."""
+        return {
+            "trace_id": self.trace_id,
+            "name": self.name,
+            "status": self.status,
+            "started_at": self.wall_start,
+            "duration_ms": round(self.duration * 1000, 1),
+            "spans": len(self.spans),
+            **self.attrs,
+        }
+
+    def to_dict(self) -> dict:
+        """Full trace as JSON-serializable dict."""
+        return {
+            **self.summary(),
+            "dropped_spans": self.dropped,
+            "span_list": [span.to_dict(self.start) for span in sorted(self.spans, key=lambda s: s.start)],
+        }
+
+    def to_chrome_trace(self) -> dict:
+        """
+        Trace in the Chrome trace event format (chrome://tracing, Perfetto).
+
+        Each asyncio task becomes a thread row so concurrent calls do not overlap.
+        """
+        thread_ids: dict[str, int] = {}
+        events: list[dict] = [{
+            "name": self.name, "cat": "request", "ph": "X", "pid": 1, "tid": 0,
+            "ts": 0, "dur": round(self.duration * 1e6), "args": self.attrs,
+        }]
+        for span in self.spans:
+            tid = thread_ids.setdefault(span.task, len(thread_ids) + 1)
+            event = {
+                "name": span.name, "cat": span.category, "pid": 1, "tid": tid,
+                "ts": round((span.start - self.start) * 1e6), "args": span.attrs,
+            }
+            if span.end is None:
+                event.update(ph="i", s="t")
+            else:
+                event.update(ph="X", dur=round((span.end - span.start) * 1e6))
+            events.append(event)
+        for task, tid in thread_ids.items():
+            events.append({"name": "thread_name", "ph": "M", "pid": 1, "tid": tid, "args": {"name": task}})
+        return {"traceEvents": events, "displayTimeUnit": "ms", "otherData": self.summary()}
+
+
+# Trace of the request handled by the current task (shared with its subtasks)
+current_trace: contextvars.ContextVar[Optional[Trace]] = contextvars.ContextVar("current_trace", default=None)
+
+
+def _clean(attrs: dict[str, Any]) -> dict[str, Any]:
+    return {key: value for key, value in attrs.items() if value is not None}
+
+
+def _task_label() -> str:
+    """Name of the running asyncio task (spans of concurrent tasks go to separate rows)."""
+    try:
+        task = asyncio.current_task()
+    except RuntimeError:
+        task = None
+    return task.get_name() if task is not None else "main"
+
+
+def add_span(name: str, category: str, seconds: float, /, **attrs: Any) -> None:
+    """Record a span that just finished and took ``seconds``."""
+    trace = current_trace.get()
+    if trace is None:
+        return
+    now = time.monotonic()
+    record = Span(name, category, now - seconds, _clean(attrs), _task_label())
+    record.end = now
+    trace.add(record)
+
+
+def event(name: str, /, **attrs: Any) -> None:
+    """Record an instant event, e.g. the branch taken in the pipeline."""
+    trace = current_trace.get()
+    if trace is not None:
+        trace.add(Span(name, "event", time.monotonic(), _clean(attrs), _task_label()))
+
+
+class FlightRecorder:
+    """
+    Ring buffer of the most recent slow or failed request traces.
+
+    Every request is traced (appending to a list per span is cheap); when it
+    finishes, the trace is kept only if it took at least FLIGHT_RECORDER_SLOW_MS
+    or did not succeed. The oldest kept trace is dropped once
+    FLIGHT_RECORDER_SIZE traces are stored.
+    """
+
+    def __init__(self, size: Optional[int] = None, slow_ms: Optional[int] = None):
+        """
+        Initialize the recorder.
+
+        Args:
+            size: Number of traces kept (defaults to FLIGHT_RECORDER_SIZE)
+            slow_ms: Duration from which a successful trace is kept (defaults to FLIGHT_RECORDER_SLOW_MS)
+        """
+        self.size = size if size is not None else config.flight_recorder_size
+        self.slow_seconds = (slow_ms if slow_ms is not None else config.flight_recorder_slow_ms) / 1000.0
+        self._traces: deque[Trace] = deque(maxlen=max(1, self.size))
+        self.recorded = 0
+
+    def start(self, name: str, **attrs: Any) -> tuple[Trace, contextvars.Token]:
+        """Begin a trace and make it current; pass the result to ``finish``."""
+        trace = Trace(name, attrs)
+        return trace, current_trace.set(trace)
+
+    def finish(self, handle: tuple[Trace, contextvars.Token], status: str, **attrs: Any) -> None:
+        """
+        End a trace and keep it if it was slow or unsuccessful.
+
+        Args:
+            handle: Return value of ``start``
+            status: "ok", "failed", "error" or "cancelled"
+            attrs: Outcome details (source, error, degradations, ...)
+        """
+        trace, token = handle
+        current_trace.reset(token)
+        trace.end = time.monotonic()
+        trace.status = status
+        trace.attrs.update(attrs)
+        if self.size > 0 and (status != "ok" or trace.duration >= self.slow_seconds):
+            self._traces.append(trace)
+            self.recorded += 1
+
+    def traces(self) -> list[dict]:
+        """Summaries of the kept traces, newest first."""
+        return [trace.summary() for trace in reversed(self._traces)]
+
+    def get(self, trace_id: str) -> Optional[Trace]:
+        """A kept trace by ID."""
+        for trace in self._traces:
+            if trace.trace_id == trace_id:
+                return trace
+        return None
+
+
+# Process-wide recorder shared by the orchestrator and the debug endpoints
+flight_recorder = FlightRecorder()
@@ -0,0 +1,65 @@
+"""Registry connecting FLUX completion webhooks to waiting generations."""
+from __future__ import annotations
+
+import asyncio
+from typing import Optional
+
+from .ttl_cache import TTLCache
+
+# Generations currently waiting for a webhook, keyed by FLUX task ID
+_WAITERS: dict[str, asyncio.Future] = {}
+# Webhooks that arrived before their generation started waiting
+_EARLY: TTLCache[dict] = TTLCache(max_entries=256, ttl=300.0)
+
+
+def task_id_of(payload: dict) -> Optional[str]:
+    """Extract the task ID from a FLUX webhook payload."""
+    task_id = payload.get("task_id") or payload.get("id")
+    return str(task_id) if task_id else None
+
+
+def expect(task_id: str) -> asyncio.Future:
+    """
+    Register interest in a task's completion webhook.
+
+    Args:
+        task_id: FLUX task ID returned on submit
+
+    Returns:
+        Future resolved with the webhook payload
+    """
+    future = asyncio.get_running_loop().create_future()
+    early = _EARLY.pop(task_id)
+    if early is not None:
+        future.set_result(early)
+    else:
+        _WAITERS[task_id] = future
+    return future
+
+
+def discard(task_id: str) -> None:
+    """Stop waiting for a task (completed by polling, failed or cancelled)."""
+    _WAITERS.pop(task_id, None)
+
+
+def resolve(payload: dict) -> bool:
+    """
+    Deliver a webhook payload to the waiting generation.
+
+    Args:
+        payload: JSON body posted by FLUX
+
+    Returns:
+        True if a waiting generation received it
+    """
+    task_id = task_id_of(payload)
+    if not task_id:
+        return False
+
+    future = _WAITERS.pop(task_id, None)
+    if future is None:
+        _EARLY.set(task_id, payload)
+        return False
+    if not future.done():
+        future.set_result(payload)
+    return True
@@ -1,7 +1,6 @@
-"""In-memory cache for generated images (data URLs -> short IDs)."""
+"""In-memory cache for generated images (bytes -> short IDs)."""
 from __future__ import annotations
 
-import base64
 import uuid
 from typing import NamedTuple, Optional
 
@@ -16,38 +15,8 @@ class CachedImage(NamedTuple):
 # Simple in-memory store; note: not bounded/evicted.
 _STORE: dict[str, CachedImage] = {}
 
-
-def store_data_url(data_url: str) -> str:
-    """
-    Store a data URL and return a short ID.
-
-    Args:
-        data_url: Data URL string (e.g., data:image/jpeg;base64,...)
-
-    Returns:
-        Image ID usable in generated image endpoint
-    """
-    if not data_url.startswith("data:"):
-        raise ValueError("Not a data URL")
-
-    if "," not in data_url:
-        raise ValueError("Invalid data URL format")
-
-    header, b64_data = data_url.split(",", 1)
-    media_type = "application/octet-stream"
-    if ";" in header:
-        media_type = header.split(";")[0][5:] or media_type
-    elif header.startswith("data:"):
-        media_type = header[5:] or media_type
-
-    try:
-        data_bytes = base64.b64decode(b64_data)
-    except Exception as exc:
-        raise ValueError(f"Invalid base64 data: {exc}") from exc
-
-    image_id = uuid.uuid4().hex
-    _STORE[image_id] = CachedImage(data=data_bytes, media_type=media_type)
-    return image_id
+# Generation reuse index: (scope, model, final prompt, size) -> image ID
+_GENERATION_INDEX: dict[tuple, str] = {}
 
 
 def get_image(image_id: str) -> Optional[CachedImage]:
@@ -69,3 +38,48 @@ def store_bytes(data: bytes, media_type: str = "application/octet-stream") -> st
     image_id = uuid.uuid4().hex
     _STORE[image_id] = CachedImage(data=data, media_type=media_type or "application/octet-stream")
     return image_id
+
+
+def generation_key(scope: str, model: str, prompt: str, width: int, height: int) -> tuple:
+    """
+    Key of the generation reuse index.
+
+    Args:
+        scope: "global" or a deck identifier
+        model: Generation model
+        prompt: Final prompt sent to the model
+        width: Image width
+        height: Image height
+    """
+    return (scope, model, prompt, width, height)
+
+
+def stats() -> dict[str, int]:
+    """Number of stored images and their total size in bytes."""
+    return {
+        "images": len(_STORE),
+        "bytes": sum(len(image.data) for image in list(_STORE.values())),
+        "reuse_entries": len(_GENERATION_INDEX),
+    }
+
+
+def lookup_generation(key: tuple) -> Optional[str]:
+    """Image ID previously generated for this key, if the image is still stored."""
+    image_id = _GENERATION_INDEX.get(key)
+    if image_id is None:
+        return None
+    if image_id not in _STORE:
+        _GENERATION_INDEX.pop(key, None)
+        return None
+    return image_id
+
+
+def record_generation(key: tuple, image_id: str) -> None:
+    """Remember which stored image a generation produced."""
+    _GENERATION_INDEX[key] = image_id
+
+
+def forget_generation(image_id: str) -> None:
+    """Remove an image from the reuse index (e.g. after it failed the safety check)."""
+    for key in [k for k, v in _GENERATION_INDEX.items() if v == image_id]:
+        _GENERATION_INDEX.pop(key, None)
@@ -0,0 +1,277 @@
+"""Priority scheduler in front of the AI generation providers."""
+from __future__ import annotations
+
+import asyncio
+import contextvars
+import logging
+import time
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Optional
+
+from .bulkhead import parse_limits
+from .config import config
+from .latency_stats import latency_tracker
+
+# Priorities: lower values are served first
+INTERACTIVE = 0
+BACKGROUND = 10
+PRIORITY_NAMES = {INTERACTIVE: "interactive", BACKGROUND: "background"}
+
+# Default limits per provider lane: (max concurrent generations, max starts per minute)
+DEFAULT_LIMITS: dict[str, tuple[int, int]] = {
+    "flux": (4, 60),
+    "openrouter_image": (4, 60),
+    "ai_studio": (4, 30),
+}
+
+# Generation model -> provider lane
+MODEL_LANES = {
+    "auto": "flux",
+    "flux": "flux",
+    "banana": "openrouter_image",
+    "imagen": "openrouter_image",
+    "google_banana": "ai_studio",
+}
+
+
+class PriorityTicket:
+    """
+    Priority shared by all generations of one request.
+
+    The ticket is mutable so a background request can be promoted while its
+    generations wait in a lane (see ``GenerationScheduler.promote``).
+    """
+
+    __slots__ = ("priority",)
+
+    def __init__(self, priority: int):
+        self.priority = priority
+
+
+# Ticket of generations started in the current context (None = interactive)
+generation_priority: contextvars.ContextVar[Optional[PriorityTicket]] = contextvars.ContextVar(
+    "generation_priority", default=None
+)
+
+logger = logging.getLogger(__name__)
+
+
+class _Lane:
+    """
+    Concurrency and rate limit for one provider.
+
+    Waiters are served by priority; within a priority, tenants (decks) take
+    turns so one large deck cannot starve the others.
+    """
+
+    def __init__(self, name: str, max_concurrent: int, per_minute: int):
+        self.name = name
+        self.max_concurrent = max(1, max_concurrent)
+        # Token bucket: bursts up to max_concurrent starts, refilled at per_minute / 60 per second
+        self.rate = per_minute / 60.0 if per_minute > 0 else None
+        self.tokens = float(self.max_concurrent)
+        self._refilled_at = time.monotonic()
+        self._timer: Optional[asyncio.TimerHandle] = None
+        # priority -> tenant -> waiting (future, ticket) pairs
+        self._waiting: dict[int, OrderedDict[str, deque]] = {}
+        self.active = 0
+        self.started = 0
+
+    def _refill(self) -> None:
+        if self.rate is None:
+            return
+        now = time.monotonic()
+        self.tokens = min(float(self.max_concurrent), self.tokens + (now - self._refilled_at) * self.rate)
+        self._refilled_at = now
+
+    def _take_token(self) -> bool:
+        if self.rate is None:
+            return True
+        self._refill()
+        if self.tokens >= 1.0:
+            self.tokens -= 1.0
+            return True
+        return False
+
+    def _next_waiter(self) -> Optional[asyncio.Future]:
+        for priority in sorted(self._waiting):
+            tenants = self._waiting[priority]
+            while tenants:
+                tenant, waiters = next(iter(tenants.items()))
+                future, _ = waiters.popleft()
+                if waiters:
+                    tenants.move_to_end(tenant)
+                else:
+                    del tenants[tenant]
+                if not future.done():
+                    return future
+            del self._waiting[priority]
+        return None
+
+    def queued(self) -> dict[str, int]:
+        """Number of waiters per priority name."""
+        return {
+            PRIORITY_NAMES.get(priority, str(priority)): sum(
+                1 for waiters in tenants.values() for future, _ in waiters if not future.done()
+            )
+            for priority, tenants in self._waiting.items()
+        }
+
+    def _dispatch(self) -> None:
+        self._timer = None
+        while self.active < self.max_concurrent and self._waiting:
+            if not self._take_token():
+                delay = (1.0 - self.tokens) / self.rate
+                self._timer = asyncio.get_running_loop().call_later(delay, self._dispatch)
+                return
+            future = self._next_waiter()
+            if future is None:
+                # Only cancelled waiters were left; give the token back
+                if self.rate is not None:
+                    self.tokens += 1.0
+                return
+            self.active += 1
+            self.started += 1
+            future.set_result(None)
+
+    async def acquire(self, priority: int, tenant: str, ticket: Optional[PriorityTicket] = None) -> None:
+        if self.active < self.max_concurrent and not self._waiting and self._take_token():
+            self.active += 1
+            self.started += 1
+            return
+
+        future = asyncio.get_running_loop().create_future()
+        self._waiting.setdefault(priority, OrderedDict()).setdefault(tenant, deque()).append((future, ticket))
+        if self._timer is None:
+            self._dispatch()
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # Slot was granted just before the caller went away
+                self.release()
+            raise
+
+    def release(self) -> None:
+        self.active -= 1
+        if self._timer is None:
+            self._dispatch()
+
+    def promote(self, ticket: PriorityTicket, priority: int) -> None:
+        """Move a ticket's waiters from lower priorities to ``priority`` (keeping their tenant)."""
+        for current in [p for p in self._waiting if p > priority]:
+            tenants = self._waiting[current]
+            for tenant, waiters in list(tenants.items()):
+                moving = [waiter for waiter in waiters if waiter[1] is ticket]
+                if not moving:
+                    continue
+                remaining = deque(waiter for waiter in waiters if waiter[1] is not ticket)
+                if remaining:
+                    tenants[tenant] = remaining
+                else:
+                    del tenants[tenant]
+                self._waiting.setdefault(priority, OrderedDict()).setdefault(tenant, deque()).extend(moving)
+            if not tenants:
+                del self._waiting[current]
+
+
+class GenerationScheduler:
+    """
+    Admits AI generations per provider lane.
+
+    Use as ``async with generation_scheduler.slot("flux", tenant=deck_id): ...``.
+    The priority comes from the ticket in the ``generation_priority`` context
+    variable (interactive without one).
+    Queue time is recorded per lane and priority in the latency tracker.
+    """
+
+    def __init__(self, limits: dict[str, tuple[int, int]], enabled: bool = True):
+        """
+        Initialize the scheduler.
+
+        Args:
+            limits: Lane name -> (max concurrent, max starts per minute)
+            enabled: When False, slots are granted immediately
+        """
+        self.enabled = enabled
+        self.limits = limits
+        self._lanes: dict[str, _Lane] = {}
+
+    def _lane(self, name: str) -> _Lane:
+        lane = self._lanes.get(name)
+        if lane is None:
+            max_concurrent, per_minute = self.limits.get(name, (4, 0))
+            lane = _Lane(name, max_concurrent, per_minute)
+            self._lanes[name] = lane
+        return lane
+
+    @asynccontextmanager
+    async def slot(self, lane_name: str, tenant: Optional[str] = None) -> AsyncIterator[None]:
+        """
+        Wait for a generation slot on a provider lane.
+
+        Args:
+            lane_name: Provider lane (see MODEL_LANES)
+            tenant: Deck or tenant identifier used for fair sharing
+        """
+        if not self.enabled:
+            yield
+            return
+
+        lane = self._lane(lane_name)
+        ticket = generation_priority.get()
+        priority = ticket.priority if ticket is not None else INTERACTIVE
+        queued_at = time.monotonic()
+        await lane.acquire(priority, tenant or "", ticket)
+        waited = time.monotonic() - queued_at
+        latency_tracker.record(f"queue:{lane_name}:{PRIORITY_NAMES.get(priority, priority)}", waited)
+        if waited > 1.0:
+            logger.info("Generation waited %.1fs for lane %s (priority %s)", waited, lane_name, priority)
+        try:
+            yield
+        finally:
+            lane.release()
+
+    def promote(self, ticket: PriorityTicket, priority: int = INTERACTIVE) -> None:
+        """
+        Raise the priority of a request, including generations already queued.
+
+        Args:
+            ticket: The request's ticket
+            priority: New priority (ignored if not higher than the current one)
+        """
+        if ticket.priority <= priority:
+            return
+        ticket.priority = priority
+        for lane in self._lanes.values():
+            lane.promote(ticket, priority)
+
+    def stats(self) -> dict[str, dict]:
+        """Per-lane counters and queue-time percentiles."""
+        stats = {}
+        for name, lane in self._lanes.items():
+            queue_time = {}
+            for priority_name in PRIORITY_NAMES.values():
+                key = f"queue:{name}:{priority_name}"
+                if latency_tracker.count(key):
+                    queue_time[priority_name] = {
+                        "p50": latency_tracker.percentile(key, 50, min_samples=1),
+                        "p95": latency_tracker.percentile(key, 95, min_samples=1),
+                    }
+            stats[name] = {
+                "max_concurrent": lane.max_concurrent,
+                "per_minute": self.limits.get(name, (4, 0))[1],
+                "active": lane.active,
+                "queued": lane.queued(),
+                "started": lane.started,
+                "queue_seconds": queue_time,
+            }
+        return stats
+
+
+# Process-wide scheduler shared by all generations
+generation_scheduler = GenerationScheduler(
+    {**DEFAULT_LIMITS, **parse_limits(config.generation_limits)},
+    enabled=config.generation_scheduler_enabled,
+)
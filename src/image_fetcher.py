@@ -0,0 +1,127 @@
+"""Fetch-once download of candidate image bytes shared by all scorers."""
+from __future__ import annotations
+
+import asyncio
+import logging
+from typing import NamedTuple, Optional
+
+import httpx
+
+from .config import config
+from .request_timing import upstream_call
+from .ttl_cache import TTLCache
+
+
+class FetchedImage(NamedTuple):
+    """Downloaded image data."""
+
+    data: bytes
+    media_type: str
+
+
+class ImageFetcher:
+    """
+    Downloads candidate images once and keeps them in a short-lived buffer cache.
+
+    Downloads are streamed with a size cap and bounded concurrency. Concurrent
+    requests for the same URL share one download.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: Optional[int] = None,
+        max_bytes: Optional[int] = None,
+        cache_ttl: Optional[float] = None,
+        cache_max_bytes: Optional[int] = None,
+    ):
+        """
+        Initialize the image fetcher.
+
+        Args:
+            max_concurrency: Maximum simultaneous downloads
+            max_bytes: Maximum size of a single image; larger downloads are aborted
+            cache_ttl: Seconds a downloaded image stays in the buffer cache
+            cache_max_bytes: Total size bound of the buffer cache
+        """
+        self.logger = logging.getLogger(__name__)
+        self.max_bytes = max_bytes or config.image_fetch_max_bytes
+        self._semaphore = asyncio.Semaphore(max_concurrency or config.image_fetch_max_concurrency)
+        self.buffers: TTLCache[FetchedImage] = TTLCache(
+            max_entries=512,
+            ttl=cache_ttl if cache_ttl is not None else config.image_fetch_cache_ttl,
+            max_bytes=cache_max_bytes or config.image_fetch_cache_max_bytes,
+            sizeof=lambda item: len(item.data),
+        )
+        self._inflight: dict[str, asyncio.Task] = {}
+
+    async def fetch(self, url: str) -> Optional[FetchedImage]:
+        """
+        Return the bytes of an image, downloading it at most once.
+
+        The download runs in its own task that callers only shield, so a caller
+        cancelled on client disconnect does not abort it for the other waiters.
+
+        Args:
+            url: Image URL
+
+        Returns:
+            Fetched image or None if the download failed or exceeded the size cap
+        """
+        cached = self.buffers.get(url)
+        if cached is not None:
+            return cached
+
+        task = self._inflight.get(url)
+        if task is None:
+            task = asyncio.create_task(self._download_and_cache(url))
+            self._inflight[url] = task
+            task.add_done_callback(lambda done: self._download_finished(url, done))
+        return await asyncio.shield(task)
+
+    async def _download_and_cache(self, url: str) -> Optional[FetchedImage]:
+        """Download an image and keep it in the buffer cache."""
+        result = await self._download(url)
+        if result is not None:
+            self.buffers.set(url, result)
+        return result
+
+    def _download_finished(self, url: str, task: asyncio.Task) -> None:
+        """Drop a finished download from the in-flight map."""
+        if self._inflight.get(url) is task:
+            del self._inflight[url]
+        if not task.cancelled():
+            # Mark retrieved so a download nobody waits for any more does not log
+            # "exception never retrieved"
+            task.exception()
+
+    async def _download(self, url: str) -> Optional[FetchedImage]:
+        """Stream an image into memory, aborting above the size cap."""
+        async with self._semaphore:
+            try:
+                with upstream_call("image_download") as call:
+                    async with httpx.AsyncClient(timeout=30.0, follow_redirects=True) as client, \
+                            client.stream("GET", url) as response:
+                        call.status = str(response.status_code)
+                        response.raise_for_status()
+                        declared = response.headers.get("content-length")
+                        if declared and declared.isdigit() and int(declared) > self.max_bytes:
+                            self.logger.warning(
+                                "Image fetch skipped (too large: %s bytes): %s", declared, url
+                            )
+                            return None
+
+                        buffer = bytearray()
+                        async for chunk in response.aiter_bytes():
+                            buffer.extend(chunk)
+                            if len(buffer) > self.max_bytes:
+                                self.logger.warning(
+                                    "Image fetch aborted (exceeds %d bytes): %s", self.max_bytes, url
+                                )
+                                return None
+
+                        call.bytes = len(buffer)
+                        media_type = response.headers.get("content-type", "image/jpeg").split(";")[0]
+                        return FetchedImage(data=bytes(buffer), media_type=media_type)
+            except httpx.HTTPError as exc:
+                self.logger.warning("Image fetch failed: url=%s error=%s", url, exc)
+                return None
@@ -2,6 +2,7 @@
 import httpx
 import asyncio
 import json
+import time
 from typing import Optional, Literal
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import StrOutputParser
@@ -10,21 +11,58 @@ from google import genai
 from google.genai import types
 
 from .config import config
-from .models import ColorConfig, SlideInput
+from .bulkhead import get_bulkhead
+from .latency_stats import latency_tracker
+from .generation_scheduler import MODEL_LANES, generation_scheduler
+from . import flux_webhooks
+from .ttl_cache import TTLCache
+from . import generated_cache
+from .models import ColorConfig, SlideInput, ImagePayload, GenerationResult
+from .openrouter_stream import ImageResponseScanner
+from .request_timing import record_stage, upstream_call, upstream_request
 from .prompts import (
     SCENARIO_CONFIGS,
     SCENARIO_PROMPTS,
     GENERATION_PROMPT_SYSTEM,
-    NEGATIVE_PROMPT
+    NEGATIVE_PROMPT,
+    PROMPT_VERSION
 )
 
 
+# Terminal FLUX task statuses (polling uses "Ready"/"succeeded", webhooks may send "SUCCESS")
+FLUX_READY_STATUSES = {"succeeded", "Ready", "SUCCESS"}
+FLUX_FAILED_STATUSES = {
+    "failed", "Failed", "FAILED", "Error", "ERROR",
+    "Content Moderated", "Request Moderated", "Task not found",
+}
+
+# Slide fields describing its content; the rest (mode, model, deck, priority,
+# budget) only steer the request and must not change the generated prompt
+SLIDE_CONTENT_FIELDS = {"title", "sources", "image_keywords", "bullets"}
+
+# One long-lived Google GenAI client per process (keyed by API key)
+_GENAI_CLIENTS: dict[str, genai.Client] = {}
+
+
+def _get_genai_client(api_key: str) -> genai.Client:
+    """
+    Return the shared Google GenAI client for an API key.
+
+    The SDK expects either the api_key parameter or GEMINI_API_KEY/GOOGLE_API_KEY env var;
+    we pass the key explicitly. Reusing the client keeps its connection pool warm.
+    """
+    client = _GENAI_CLIENTS.get(api_key)
+    if client is None:
+        client = genai.Client(api_key=api_key)
+        _GENAI_CLIENTS[api_key] = client
+    return client
+
+
 class ImageGenerator:
     """Generates images using AI when stock photos do not match."""
 
     def __init__(self):
         """Initialize the image generator."""
-        self.last_error: Optional[str] = None
         self.llm = ChatOpenAI(
             model=config.claude_model,
             openai_api_base="https://openrouter.ai/api/v1",
@@ -36,6 +74,12 @@ class ImageGenerator:
             ("human", "Keywords: {keywords}")
         ])
 
+        # Generated prompts keyed by the inputs of the prompt and the prompt version
+        self.prompt_cache: TTLCache[str] = TTLCache(
+            max_entries=config.prompt_cache_size,
+            ttl=config.prompt_cache_ttl
+        )
+
     def _select_scenario(self, style: Optional[str]) -> Optional[str]:
         """Pick a scenario key if present in style string."""
         if not style:
@@ -45,6 +89,39 @@ class ImageGenerator:
             return key
         return None
 
+    @staticmethod
+    def _scenario_payload(keywords: str, slide: Optional[SlideInput]) -> dict:
+        """Slide content sent to the LLM for scenario prompts."""
+        if slide is None:
+            return {"keywords": keywords}
+        return slide.model_dump(include=SLIDE_CONTENT_FIELDS, exclude_none=True)
+
+    def _prompt_cache_key(
+        self,
+        keywords: str,
+        style: Optional[str],
+        colors: Optional[ColorConfig],
+        slide: Optional[SlideInput]
+    ) -> tuple:
+        """
+        Cache key covering exactly the inputs of the generated prompt.
+
+        Scenario prompts are built from the slide content, other styles from the
+        keywords and the style string; colors shape both.
+        """
+        scenario = self._select_scenario(style)
+        if scenario:
+            inputs = ("scenario", scenario, json.dumps(self._scenario_payload(keywords, slide), sort_keys=True))
+        else:
+            inputs = ("keywords", style or "", keywords)
+        return (
+            PROMPT_VERSION,
+            config.claude_model,
+            *inputs,
+            colors.primary if colors else None,
+            colors.secondary if colors else None,
+        )
+
     async def create_generation_prompt(
         self,
         keywords: str,
@@ -55,6 +132,10 @@ class ImageGenerator:
         """
         Create an image generation prompt from keywords, style, and colors.
 
+        Results are cached (LRU + TTL) by the prompt's inputs (scenario and slide
+        content, or keywords and style; colors) and PROMPT_VERSION, so repeats
+        skip the LLM round trip.
+
         For scenario-based styles (flat_illustration, fine_line, photorealistic):
         Combines content_prompt + style_prompt + layout_prompt from SCENARIO_CONFIGS.
 
@@ -67,78 +148,93 @@ class ImageGenerator:
         Returns:
             Generated prompt for image generation (content + style + layout)
         """
-        self.last_error = None
-        try:
-            scenario = self._select_scenario(style)
-            if scenario:
-                # Get scenario configuration
-                scenario_config = SCENARIO_CONFIGS[scenario]
-
-                # Step 1: Generate content prompt using LLM
-                slide_payload = slide.model_dump() if slide else {"keywords": keywords}
-                prompt_template = ChatPromptTemplate.from_messages([
-                    ("system", scenario_config["content_prompt_instructions"]),
-                    ("human", "{slide_json}")
-                ])
-                chain = prompt_template | self.llm | StrOutputParser()
+        key = self._prompt_cache_key(keywords, style, colors, slide)
+        cached = self.prompt_cache.get(key)
+        if cached is not None:
+            print("Generation prompt served from cache")
+            return cached
+
+        prompt = await self._compose_generation_prompt(keywords, style, colors, slide)
+        self.prompt_cache.set(key, prompt)
+        return prompt
+
+    async def _compose_generation_prompt(
+        self,
+        keywords: str,
+        style: Optional[str] = None,
+        colors: Optional[ColorConfig] = None,
+        slide: Optional[SlideInput] = None
+    ) -> str:
+        """Build the content + style + layout prompt with the LLM (uncached)."""
+        scenario = self._select_scenario(style)
+        if scenario:
+            # Get scenario configuration
+            scenario_config = SCENARIO_CONFIGS[scenario]
+
+            # Step 1: Generate content prompt using LLM
+            slide_payload = self._scenario_payload(keywords, slide)
+            prompt_template = ChatPromptTemplate.from_messages([
+                ("system", scenario_config["content_prompt_instructions"]),
+                ("human", "{slide_json}")
+            ])
+            chain = prompt_template | self.llm | StrOutputParser()
+            with upstream_call("openrouter"):
                 content_prompt = await chain.ainvoke({"slide_json": json.dumps(slide_payload)})
-                content_prompt = content_prompt.strip()
-
-                # Step 2: Combine with style and layout prompts
-                # Apply color customization to style/layout if provided
-                style_prompt = scenario_config["style_prompt"]
-                layout_prompt = scenario_config["layout_prompt"]
-
-                if colors:
-                    # Replace default colors with custom colors if provided
-                    if colors.primary:
-                        style_prompt = style_prompt.replace("#125456", colors.primary)
-                        layout_prompt = layout_prompt.replace("#125456", colors.primary)
-                    if colors.secondary:
-                        style_prompt = style_prompt.replace("#F2C945", colors.secondary)
-                        layout_prompt = layout_prompt.replace("#F2C945", colors.secondary)
-                    if colors.primary or colors.secondary:
-                        # Also update background tint if colors are customized
-                        layout_prompt = layout_prompt.replace("#F9F8F7", colors.secondary or "#F9F8F7")
-
-                # Combine all parts
-                full_prompt = f"{content_prompt} {style_prompt} {layout_prompt}".strip()
-                return full_prompt
-
-            # Fallback: Non-scenario mode (legacy behavior)
-            # Build style instruction
-            style_instruction = ""
-            if style:
-                style_instruction = f"Style-Anforderungen: {style}"
-
-            # Build color instruction
-            color_instruction = ""
+            content_prompt = content_prompt.strip()
+
+            # Step 2: Combine with style and layout prompts
+            # Apply color customization to style/layout if provided
+            style_prompt = scenario_config["style_prompt"]
+            layout_prompt = scenario_config["layout_prompt"]
+
             if colors:
-                color_parts = []
+                # Replace default colors with custom colors if provided
                 if colors.primary:
-                    color_parts.append(f"Primary color: {colors.primary}")
+                    style_prompt = style_prompt.replace("#125456", colors.primary)
+                    layout_prompt = layout_prompt.replace("#125456", colors.primary)
                 if colors.secondary:
-                    color_parts.append(f"Secondary color: {colors.secondary}")
-                if color_parts:
-                    color_instruction = "Farbanforderungen: " + ", ".join(color_parts)
-
-            chain = self.prompt_template | self.llm | StrOutputParser()
+                    style_prompt = style_prompt.replace("#F2C945", colors.secondary)
+                    layout_prompt = layout_prompt.replace("#F2C945", colors.secondary)
+                if colors.primary or colors.secondary:
+                    # Also update background tint if colors are customized
+                    layout_prompt = layout_prompt.replace("#F9F8F7", colors.secondary or "#F9F8F7")
+
+            # Combine all parts
+            full_prompt = f"{content_prompt} {style_prompt} {layout_prompt}".strip()
+            return full_prompt
+
+        # Fallback: Non-scenario mode (legacy behavior)
+        # Build style instruction
+        style_instruction = ""
+        if style:
+            style_instruction = f"Style-Anforderungen: {style}"
+
+        # Build color instruction
+        color_instruction = ""
+        if colors:
+            color_parts = []
+            if colors.primary:
+                color_parts.append(f"Primary color: {colors.primary}")
+            if colors.secondary:
+                color_parts.append(f"Secondary color: {colors.secondary}")
+            if color_parts:
+                color_instruction = "Farbanforderungen: " + ", ".join(color_parts)
+
+        chain = self.prompt_template | self.llm | StrOutputParser()
+        with upstream_call("openrouter"):
             prompt = await chain.ainvoke({
                 "keywords": keywords,
                 "style_instruction": style_instruction,
                 "color_instruction": color_instruction
             })
-            return prompt.strip()
-        except Exception as e:
-            self.last_error = f"Prompt generation failed: {e}"
-            raise
+        return prompt.strip()
 
     async def generate_with_flux(
         self,
         prompt: str,
         width: int = 1024,
         height: int = 1024
-    ) -> Optional[str]:
+    ) -> GenerationResult:
         """
         Generate an image using FLUX API.
 
@@ -148,29 +244,34 @@ class ImageGenerator:
             height: Image height
 
         Returns:
-            URL of generated image or None if failed
+            Result with the FLUX delivery URL or the error
         """
         try:
-            self.last_error = None
-            endpoint = f"https://api.eu.bfl.ai/v1/{config.flux_model}"
-            async with httpx.AsyncClient(timeout=150.0) as client:
+            endpoint = f"{config.flux_api_base.rstrip('/')}/{config.flux_model}"
+            payload = {
+                "prompt": f"{prompt}. Keinen Text im Bild generieren.",
+                "width": width,
+                "height": height,
+                "steps": 28,
+                "guidance": 3,
+                "safety_tolerance": 2,
+                "output_format": "jpeg"
+            }
+            webhook_url = self._flux_webhook_url()
+            if webhook_url:
+                payload["webhook_url"] = webhook_url
+
+            async with get_bulkhead("flux"), httpx.AsyncClient(timeout=150.0) as client:
                 # Submit generation request
-                response = await client.post(
+                submitted_at = time.monotonic()
+                response = await upstream_request("flux", client.post(
                     endpoint,
                     headers={
                         "Content-Type": "application/json",
                         "x-key": config.flux_api_key
                     },
-                    json={
-                        "prompt": f"{prompt}. Keinen Text im Bild generieren.",
-                        "width": width,
-                        "height": height,
-                        "steps": 28,
-                        "guidance": 3,
-                        "safety_tolerance": 2,
-                        "output_format": "jpeg"
-                    }
-                )
+                    json=payload
+                ))
                 print(f"[Flux] submit url={endpoint} status={response.status_code}")
                 submit_body = response.text[:500] if hasattr(response, "text") else ""
                 if submit_body:
@@ -180,54 +281,132 @@ class ImageGenerator:
 
                 polling_url = data.get("polling_url")
                 if not polling_url:
-                    return None
-
-                # Wait for generation to complete
-                await asyncio.sleep(20)
-
-                # Poll for result
-                for attempt in range(20):
-                    poll_response = await client.get(polling_url)
-                    print(f"[Flux] poll attempt={attempt+1} status={poll_response.status_code}")
-                    poll_text = poll_response.text[:500] if hasattr(poll_response, "text") else ""
-                    if poll_text:
-                        print(f"[Flux] poll body (trunc): {poll_text}")
-                    poll_response.raise_for_status()
-                    poll_data = poll_response.json()
-
-                    status = poll_data.get("status")
-
-                    # Some Flux responses use "Ready" instead of "succeeded" and put the URL under result.sample
-                    if status in ("succeeded", "Ready"):
-                        result = poll_data.get("result", {}) or {}
-                        sample_url = result.get("sample") or poll_data.get("sample")
-                        if sample_url:
-                            return sample_url
-                        # Fallback: return whatever URL is available
-                        return None
-                    elif status == "failed":
-                        return None
-
-                    await asyncio.sleep(4)
+                    return GenerationResult(error="FLUX submit response has no polling URL")
 
-                return None
+                task_id = data.get("id")
+                webhook = flux_webhooks.expect(task_id) if webhook_url and task_id else None
+                try:
+                    result_data = await self._await_flux_result(client, polling_url, webhook, submitted_at)
+                finally:
+                    if task_id:
+                        flux_webhooks.discard(task_id)
+
+                if result_data is None:
+                    return GenerationResult(error=f"FLUX generation timed out after {config.flux_poll_deadline:.0f}s")
+
+                status = result_data.get("status")
+                if status in FLUX_READY_STATUSES:
+                    latency_tracker.record(f"flux:{config.flux_model}", time.monotonic() - submitted_at)
+                    # Some Flux responses put the URL under result.sample, others at top level
+                    result = result_data.get("result", {}) or {}
+                    sample_url = result.get("sample") or result_data.get("sample")
+                    if sample_url:
+                        return GenerationResult(image=ImagePayload(url=sample_url))
+                    return GenerationResult(error="FLUX result has no image URL")
+
+                return GenerationResult(error=f"FLUX generation ended with status {status}")
 
         except Exception as e:
             msg = f"FLUX generation failed: {e}"
-            self.last_error = msg
             print(msg)
+            return GenerationResult(error=msg)
+
+    def _flux_webhook_url(self) -> Optional[str]:
+        """
+        Public webhook URL for FLUX completions, with the shared secret as token.
+
+        Without FLUX_WEBHOOK_SECRET push mode stays off (polling only): the
+        endpoint would otherwise accept forged completions with arbitrary image URLs.
+        """
+        if not config.flux_webhook_url or not config.flux_webhook_secret:
             return None
+        separator = "&" if "?" in config.flux_webhook_url else "?"
+        return f"{config.flux_webhook_url}{separator}token={config.flux_webhook_secret}"
+
+    def _flux_initial_delay(self) -> float:
+        """
+        First poll delay, tuned from observed completion times of the current model.
+
+        Starts slightly before the fastest typical completions (p10) so fast
+        generations are not held back, and never waits longer than the poll cap.
+        """
+        observed = latency_tracker.percentile(f"flux:{config.flux_model}", 10)
+        if observed is None:
+            return config.flux_poll_initial_delay
+        return max(config.flux_poll_initial_delay, min(observed * 0.8, config.flux_poll_deadline / 4))
+
+    async def _await_flux_result(
+        self,
+        client: httpx.AsyncClient,
+        polling_url: str,
+        webhook: Optional[asyncio.Future],
+        submitted_at: float
+    ) -> Optional[dict]:
+        """
+        Wait for a FLUX task to finish.
+
+        Polls with exponential backoff until a terminal status or the deadline.
+        With a webhook registered, completion is pushed and polling only runs
+        at the slowest interval as a safety net.
+
+        Args:
+            client: HTTP client for polling
+            polling_url: Polling URL returned on submit
+            webhook: Future resolved by the webhook receiver (or None)
+            submitted_at: monotonic time of submission
+
+        Returns:
+            Final task payload or None if the deadline passed
+        """
+        deadline = submitted_at + config.flux_poll_deadline
+        delay = self._flux_initial_delay()
+        interval = config.flux_poll_max_interval if webhook is not None else config.flux_poll_interval
+        attempt = 0
+
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return None
+            wait = min(delay, remaining)
+
+            if webhook is not None:
+                try:
+                    payload = await asyncio.wait_for(asyncio.shield(webhook), timeout=wait)
+                    print(f"[Flux] webhook received status={payload.get('status')}")
+                    if payload.get("status") in FLUX_READY_STATUSES | FLUX_FAILED_STATUSES:
+                        return payload
+                    webhook = None
+                except asyncio.TimeoutError:
+                    pass
+            else:
+                await asyncio.sleep(wait)
+
+            attempt += 1
+            poll_response = await upstream_request("flux", client.get(polling_url), attempt=attempt)
+            print(f"[Flux] poll attempt={attempt} status={poll_response.status_code}")
+            poll_text = poll_response.text[:500] if hasattr(poll_response, "text") else ""
+            if poll_text:
+                print(f"[Flux] poll body (trunc): {poll_text}")
+            poll_response.raise_for_status()
+            poll_data = poll_response.json()
+
+            if poll_data.get("status") in FLUX_READY_STATUSES | FLUX_FAILED_STATUSES:
+                return poll_data
+
+            delay = interval
+            interval = min(interval * config.flux_poll_backoff, config.flux_poll_max_interval)
 
     async def generate_with_google_ai_studio(
         self,
         prompt: str,
         width: int = 1024,
         height: int = 1024
-    ) -> Optional[str]:
+    ) -> GenerationResult:
         """
         Generate an image using Google AI Studio with Gemini 3 Pro Image (Nano Banana Pro).
 
-        Uses the official google-genai Python SDK for better authentication and error handling.
+        Uses the official google-genai Python SDK (async interface, one shared client per
+        process) so many generations can overlap in a single worker.
 
         Args:
             prompt: Text prompt for generation
@@ -235,81 +414,68 @@ class ImageGenerator:
             height: Image height (unused, kept for parity)
 
         Returns:
-            Data URL of generated image or None if failed
+            Result with the raw image bytes or the error
         """
         try:
-            self.last_error = None
-
             # Validate API key
             api_key = config.google_ai_studio_api_key
             if not api_key or api_key.strip() == "":
-                self.last_error = "Google AI Studio API key not configured (empty or missing)"
-                print(f"[Google AI Studio SDK] {self.last_error}")
-                return None
+                error = "Google AI Studio API key not configured (empty or missing)"
+                print(f"[Google AI Studio SDK] {error}")
+                return GenerationResult(error=error)
 
             # Debug: Log API key length (not the actual key for security)
             print(f"[Google AI Studio SDK] API key configured (length: {len(api_key)})")
 
-            # Initialize Google GenAI client with explicit API key
-            # The SDK expects either api_key parameter or GEMINI_API_KEY/GOOGLE_API_KEY env var
-            client = genai.Client(api_key=api_key)
-
-            # Generate image using official SDK
-            response = client.models.generate_content(
-                model="gemini-3-pro-image-preview",
-                contents=prompt,
-                config=types.GenerateContentConfig(
-                    response_modalities=['IMAGE'],
-                    image_config=types.ImageConfig(
-                        aspect_ratio="1:1",
-                        image_size="1K"
-                    ),
-                )
-            )
+            client = _get_genai_client(api_key)
+
+            # Generate image using the SDK's async interface so the event loop stays free
+            async with get_bulkhead("ai_studio"):
+                with upstream_call("ai_studio"):
+                    response = await client.aio.models.generate_content(
+                        model="gemini-3-pro-image-preview",
+                        contents=prompt,
+                        config=types.GenerateContentConfig(
+                            response_modalities=['IMAGE'],
+                            image_config=types.ImageConfig(
+                                aspect_ratio="1:1",
+                                image_size="1K"
+                            ),
+                        )
+                    )
 
             print(f"[Google AI Studio SDK] Response received")
 
-            # Extract image from response
-            # The SDK returns base64-encoded image data in part.inline_data
+            # Extract image from response; the SDK returns raw bytes in part.inline_data
             for part in response.parts:
                 if part.inline_data is not None:
-                    # Access the base64 data directly (already encoded)
-                    img_base64 = part.inline_data.data
+                    img_data = part.inline_data.data
                     mime_type = part.inline_data.mime_type or "image/jpeg"
 
-                    # Debug: Check if data is bytes or string
-                    print(f"[Google AI Studio SDK] Data type: {type(img_base64)}")
-                    print(f"[Google AI Studio SDK] Data length: {len(img_base64)}")
-                    print(f"[Google AI Studio SDK] MIME type: {mime_type}")
-
-                    # If data is bytes, encode to base64 string
-                    if isinstance(img_base64, bytes):
+                    # Older SDK versions hand out base64 text instead of bytes
+                    if isinstance(img_data, str):
                         import base64
-                        img_base64 = base64.b64encode(img_base64).decode('utf-8')
-                        print(f"[Google AI Studio SDK] Converted bytes to base64 (length: {len(img_base64)})")
+                        img_data = base64.b64decode(img_data)
 
-                    # Return as data URL
-                    data_url = f"data:{mime_type};base64,{img_base64}"
-                    print(f"[Google AI Studio SDK] Generated image (data URL, {len(data_url)} chars)")
-                    return data_url
+                    print(f"[Google AI Studio SDK] Generated image ({len(img_data)} bytes, {mime_type})")
+                    return GenerationResult(image=ImagePayload(data=img_data, media_type=mime_type))
 
             # No image found in response
-            self.last_error = "No image found in Google AI Studio response"
-            print(f"[Google AI Studio SDK] {self.last_error}")
-            return None
+            error = "No image found in Google AI Studio response"
+            print(f"[Google AI Studio SDK] {error}")
+            return GenerationResult(error=error)
 
         except Exception as e:
             msg = f"Google AI Studio SDK generation failed: {e}"
-            self.last_error = msg
             print(msg)
-            return None
+            return GenerationResult(error=msg)
 
     async def generate_with_imagen(
         self,
         prompt: str,
         width: int = 1024,
         height: int = 1024
-    ) -> Optional[str]:
+    ) -> GenerationResult:
         """
         Generate an image using Gemini image preview via OpenRouter (chat/completions).
 
@@ -319,10 +485,9 @@ class ImageGenerator:
             height: Image height (unused by OpenRouter chat endpoint, kept for parity)
 
         Returns:
-            URL of generated image or None if failed
+            Result with decoded image bytes (or the image URL) or the error
         """
         try:
-            self.last_error = None
             headers = {
                 "Authorization": f"Bearer {config.openrouter_api_key}",
                 "Content-Type": "application/json"
@@ -342,101 +507,110 @@ class ImageGenerator:
                 "modalities": ["image", "text"]
             }
 
-            async with httpx.AsyncClient(timeout=120.0) as client:
-                response = await client.post(
-                    "https://openrouter.ai/api/v1/chat/completions",
-                    headers=headers,
-                    json=payload
-                )
-                response.raise_for_status()
-
-                try:
-                    data = response.json()
-                except Exception:
-                    text = response.text[:500]
-                    self.last_error = f"OpenRouter JSON parse failed (status {response.status_code}): {text}"
-                    return None
-
-                choices = data.get("choices") or []
-                if not choices:
-                    self.last_error = f"No choices in OpenRouter response: {data}"
-                    return None
-
-                message = choices[0].get("message", {}) or {}
-                images = message.get("images") or []
-                if images:
-                    first_image = images[0] or {}
-                    image_url = (first_image.get("image_url") or {}).get("url")
-                    if image_url:
-                        return image_url
-
-                self.last_error = f"No image returned by OpenRouter: {data}"
-                return None
+            async with get_bulkhead("openrouter_image"), httpx.AsyncClient(timeout=120.0) as client:
+                # Stream the body: the inline image is decoded as it arrives instead of
+                # holding the text, the parsed dict and the decoded bytes at once
+                with upstream_call("openrouter_image") as call:
+                    async with client.stream(
+                        "POST",
+                        "https://openrouter.ai/api/v1/chat/completions",
+                        headers=headers,
+                        json=payload
+                    ) as response:
+                        call.status = str(response.status_code)
+                        if response.is_error:
+                            body = (await response.aread())[:500].decode("utf-8", "replace")
+                            error = f"OpenRouter request failed (status {response.status_code}): {body}"
+                            print(error)
+                            return GenerationResult(error=error)
+
+                        scanner = ImageResponseScanner()
+                        async for chunk in response.aiter_bytes():
+                            scanner.feed(chunk)
+                        call.bytes = response.num_bytes_downloaded
+
+            image = scanner.image
+            if scanner.found_image and not image.error:
+                if image.is_data_url and image.data:
+                    return GenerationResult(image=ImagePayload(data=image.data, media_type=image.media_type))
+                if image.url:
+                    return GenerationResult(image=ImagePayload(url=image.url))
+
+            return GenerationResult(error=scanner.describe_failure())
 
         except Exception as e:
             msg = f"Gemini image generation failed: {e}"
-            self.last_error = msg
             print(msg)
-            return None
+            return GenerationResult(error=msg)
 
     async def generate_image(
         self,
         prompt: str,
         model: Literal["auto", "flux", "banana", "imagen", "google_banana"] = "auto",
         width: int = 1024,
-        height: int = 1024
-    ) -> Optional[str]:
+        height: int = 1024,
+        tenant: Optional[str] = None
+    ) -> GenerationResult:
         """
         Generate an image using specified AI model.
 
+        The call waits for a slot on the provider's scheduler lane first; the
+        priority comes from the ``generation_priority`` context variable.
+
         Args:
             prompt: Text prompt for generation
             model: AI model to use ("auto", "flux", "banana", "imagen", "google_banana")
             width: Image width
             height: Image height
+            tenant: Deck or tenant identifier for fair scheduling
 
         Returns:
-            URL of generated image or None if failed
+            Result with the generated image (bytes or URL) or the error, provider and timings
         """
-        self.last_error = None
-        if model in ("auto", "flux"):
-            return await self.generate_with_flux(prompt, width, height)
-        elif model in ("banana", "imagen"):
-            return await self.generate_with_imagen(prompt, width, height)
-        elif model == "google_banana":
-            return await self.generate_with_google_ai_studio(prompt, width, height)
-        else:
+        if model not in MODEL_LANES:
             print(f"Unknown model: {model}")
-            self.last_error = f"Unknown model: {model}"
-            return None
-
-    async def generate_from_keywords(
+            return GenerationResult(model=model, error=f"Unknown model: {model}")
+
+        provider = MODEL_LANES[model]
+        queued_at = time.monotonic()
+        async with generation_scheduler.slot(provider, tenant=tenant):
+            started_at = time.monotonic()
+            if model in ("auto", "flux"):
+                result = await self.generate_with_flux(prompt, width, height)
+            elif model in ("banana", "imagen"):
+                result = await self.generate_with_imagen(prompt, width, height)
+            else:
+                result = await self.generate_with_google_ai_studio(prompt, width, height)
+        finished_at = time.monotonic()
+
+        result.model = model
+        result.provider = provider
+        result.timings = {"queue": started_at - queued_at, "generate": finished_at - started_at}
+        record_stage("generation_queue", result.timings["queue"])
+        if result.ok:
+            # Feeds the percentile-based hedging delay in the orchestrator
+            latency_tracker.record(f"generate:{model}", finished_at - started_at)
+        return result
+
+    async def build_final_prompt(
         self,
         keywords: str,
-        model: Literal["auto", "flux", "banana", "imagen", "google_banana"] = "auto",
         style: Optional[str] = None,
         colors: Optional[ColorConfig] = None,
-        width: int = 1024,
-        height: int = 1024,
         slide: Optional[SlideInput] = None
-    ) -> Optional[str]:
+    ) -> str:
         """
-        Generate image from keywords with style and color support.
+        Build the full generation prompt (content + style + layout + negative).
 
         Args:
             keywords: Keywords describing the desired image
-            model: AI model to use ("auto", "flux", "banana", "imagen", "google_banana")
-            style: Style attributes
+            style: Style attributes or scenario key
             colors: Color configuration
-            width: Image width
-            height: Image height
             slide: Slide payload (used for scenario prompts)
 
         Returns:
-            URL of generated image or None if failed
+            Final prompt passed to the image model
         """
-        self.last_error = None
-
         # Generate content + style + layout prompt
         prompt = await self.create_generation_prompt(keywords, style, colors, slide)
 
@@ -449,12 +623,89 @@ class ImageGenerator:
 
         final_prompt = f"{prompt} {negative_prompt}".strip()
 
-        print(f"Generated prompt for {model}:")
+        print("Generated prompt:")
         print(f"  Content+Style+Layout: {prompt}")
         print(f"  Negative: {negative_prompt}")
         print(f"  Final: {final_prompt}")
+        return final_prompt
+
+    async def generate_from_keywords(
+        self,
+        keywords: str,
+        model: Literal["auto", "flux", "banana", "imagen", "google_banana"] = "auto",
+        style: Optional[str] = None,
+        colors: Optional[ColorConfig] = None,
+        width: int = 1024,
+        height: int = 1024,
+        slide: Optional[SlideInput] = None,
+        final_prompt: Optional[str] = None,
+        deck_id: Optional[str] = None,
+        force_fresh: bool = False
+    ) -> GenerationResult:
+        """
+        Generate image from keywords with style and color support.
+
+        Images delivered as bytes are stored in generated_cache right away (the
+        payload carries the image_id); URL payloads carry the reuse key so the
+        image can be indexed once it is stored. Identical generations (model, final prompt,
+        size) within the reuse scope return the stored image instead of calling
+        the provider again.
 
-        url = await self.generate_image(final_prompt, model, width, height)
-        if url is None and self.last_error is None:
-            self.last_error = "Image generation returned no result"
-        return url
+        Args:
+            keywords: Keywords describing the desired image
+            model: AI model to use ("auto", "flux", "banana", "imagen", "google_banana")
+            style: Style attributes
+            colors: Color configuration
+            width: Image width
+            height: Image height
+            slide: Slide payload (used for scenario prompts)
+            final_prompt: Prompt from a previous build_final_prompt call (skips prompt creation)
+            deck_id: Deck identifier for the "deck" reuse scope
+            force_fresh: Always call the provider, ignoring earlier identical generations
+
+        Returns:
+            Result with the generated image payload or the error
+        """
+        if final_prompt is None:
+            final_prompt = await self.build_final_prompt(keywords, style, colors, slide)
+
+        reuse_key = self._reuse_key(model, final_prompt, width, height, deck_id)
+        if reuse_key is not None and not force_fresh:
+            image_id = generated_cache.lookup_generation(reuse_key)
+            if image_id:
+                print(f"Reusing generated image {image_id} for identical {model} prompt")
+                cached = generated_cache.get_image(image_id)
+                image = ImagePayload(
+                    data=cached.data if cached else None,
+                    media_type=cached.media_type if cached else "image/jpeg",
+                    image_id=image_id
+                )
+                return GenerationResult(image=image, model=model, provider=MODEL_LANES.get(model), reused=True)
+
+        print(f"Generating with {model}")
+        result = await self.generate_image(final_prompt, model, width, height, tenant=deck_id)
+        payload = result.image
+        if payload is not None and payload.data is not None:
+            payload.image_id = generated_cache.store_bytes(payload.data, payload.media_type)
+            if reuse_key is not None:
+                generated_cache.record_generation(reuse_key, payload.image_id)
+        elif payload is not None:
+            # URL delivery (FLUX): recorded once the orchestrator has downloaded and stored it
+            payload.reuse_key = reuse_key
+        return result
+
+    def _reuse_key(
+        self,
+        model: str,
+        final_prompt: str,
+        width: int,
+        height: int,
+        deck_id: Optional[str]
+    ) -> Optional[tuple]:
+        """Reuse index key for the configured scope, or None if reuse does not apply."""
+        scope = config.generation_reuse_scope
+        if scope == "global":
+            return generated_cache.generation_key("global", model, final_prompt, width, height)
+        if scope == "deck" and deck_id:
+            return generated_cache.generation_key(f"deck:{deck_id}", model, final_prompt, width, height)
+        return None
@@ -1,21 +1,64 @@
 """Image quality and suitability scoring."""
+import importlib
+import inspect
+import json
 import logging
 import httpx
-from typing import Optional, Any
+from typing import Callable, Optional, Any
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import StrOutputParser
 from langchain_openai import ChatOpenAI
 
 from .config import config
 from .models import ImageRef, QualityScore, ScoredImage
+from .score_cache import ScoreCache
+from .image_fetcher import ImageFetcher, FetchedImage
+from .local_quality import score_quality_local
+from .micro_batcher import MicroBatcher
+from .bulkhead import get_bulkhead
+from .request_timing import upstream_request
 
 
 class ImageScorer:
     """Scores images for quality and presentation suitability."""
 
-    def __init__(self):
-        """Initialize the image scorer."""
+    def __init__(
+        self,
+        score_cache: Optional[ScoreCache] = None,
+        fetcher: Optional[ImageFetcher] = None
+    ):
+        """
+        Initialize the image scorer.
+
+        Args:
+            score_cache: Persistent score cache (a default one is created if omitted)
+            fetcher: Shared candidate image downloader (a default one is created if omitted)
+        """
         self.logger = logging.getLogger(__name__)
+        self.score_cache = score_cache or ScoreCache()
+        self.fetcher = fetcher or ImageFetcher()
+
+        # Micro-batchers for the self-hosted CLIP services (shared by concurrent slides)
+        self.presentation_batcher: Optional[MicroBatcher] = None
+        self.nudity_batcher: Optional[MicroBatcher] = None
+        if config.scoring_batch_enabled:
+            self.presentation_batcher = MicroBatcher(
+                "Presentation scoring",
+                "scoring_service",
+                self._score_presentation_batch,
+                self._score_presentation_single,
+                window_ms=config.scoring_batch_window_ms,
+                max_batch=config.scoring_batch_max,
+            )
+            self.nudity_batcher = MicroBatcher(
+                "Local nudity",
+                "nudity_service",
+                self._analyze_nudity_batch,
+                self._analyze_nudity_single,
+                window_ms=config.scoring_batch_window_ms,
+                max_batch=config.scoring_batch_max,
+            )
+        self.nudity_classifier = self._load_nudity_classifier()
         self.llm = ChatOpenAI(
             model=config.gemini_model,
             openai_api_base="https://openrouter.ai/api/v1",
@@ -32,8 +75,8 @@ class ImageScorer:
         Returns:
             Quality score (0-1)
         """
-        async with httpx.AsyncClient() as client:
-            response = await client.get(
+        async with get_bulkhead("sightengine"), httpx.AsyncClient() as client:
+            response = await upstream_request("sightengine", client.get(
                 "https://api.sightengine.com/1.0/check.json",
                 params={
                     "models": "quality",
@@ -41,7 +84,7 @@ class ImageScorer:
                     "api_secret": config.sightengine_api_secret,
                     "url": image_url
                 }
-            )
+            ))
             response.raise_for_status()
             data = response.json()
 
@@ -50,27 +93,93 @@ class ImageScorer:
 
         return quality_score
 
-    async def check_nudity_sightengine(self, image_url: str) -> dict:
+    async def score_quality(
+        self,
+        image_url: str,
+        image_data: Optional[FetchedImage] = None,
+        original_size: Optional[tuple[int, int]] = None
+    ) -> tuple[float, Optional[str]]:
+        """
+        Score image quality with the scorer selected by QUALITY_SCORER.
+
+        Args:
+            image_url: URL of the image
+            image_data: Downloaded image (required for local scoring)
+            original_size: (width, height) of the original image, for the local scorer
+
+        Returns:
+            Tuple of (quality score, score cache kind to persist it under or None):
+            "quality" for SightEngine scores, "quality_local" for local ones
+        """
+        mode = config.quality_scorer
+
+        if mode == "local" or (mode == "prefilter" and image_data is not None):
+            if image_data is None:
+                raise RuntimeError("Local quality scoring needs the image bytes")
+            local_score = await score_quality_local(image_data.data, original_size)
+            self.logger.info("Local quality: url=%s score=%.3f", image_url, local_score)
+            if mode == "local" or local_score < config.local_quality_prefilter_min:
+                return local_score, "quality_local"
+
+        try:
+            return await self.score_quality_sightengine(image_url), "quality"
+        except Exception as exc:
+            if mode != "fallback" or image_data is None:
+                raise
+            local_score = await score_quality_local(image_data.data, original_size)
+            self.logger.warning(
+                "SightEngine quality failed (%s); using local score %.3f", exc, local_score
+            )
+            # Fallback scores are not persisted so SightEngine can score the image later
+            return local_score, None
+
+    def _cached_quality(self, image_ref: ImageRef) -> Optional[float]:
+        """
+        Cached quality score comparable with the configured QUALITY_SCORER.
+
+        Local scores are stored apart from SightEngine scores; they are only
+        reused by the modes that produce them ("local", "prefilter").
+        """
+        mode = config.quality_scorer
+        if mode != "local":
+            score = self.score_cache.get_quality(image_ref.source, image_ref.id)
+            if score is not None or mode != "prefilter":
+                return score
+        return self.score_cache.get_local_quality(image_ref.source, image_ref.id)
+
+    async def check_nudity_sightengine(
+        self,
+        image_url: str,
+        image_data: Optional[FetchedImage] = None
+    ) -> dict:
         """
         Check image for nudity/inappropriate content using SightEngine.
 
         Args:
             image_url: URL of the image
+            image_data: Image bytes; uploaded instead of letting SightEngine fetch the URL
 
         Returns:
             Nudity check results
         """
-        async with httpx.AsyncClient() as client:
+        params = {
+            "models": "nudity-2.1",
+            "api_user": config.sightengine_api_user,
+            "api_secret": config.sightengine_api_secret,
+        }
+        async with get_bulkhead("sightengine"), httpx.AsyncClient() as client:
             try:
-                response = await client.get(
-                    "https://api.sightengine.com/1.0/check.json",
-                    params={
-                        "models": "nudity-2.1",
-                        "api_user": config.sightengine_api_user,
-                        "api_secret": config.sightengine_api_secret,
-                        "url": image_url
-                    }
-                )
+                if image_data is not None:
+                    response = await upstream_request("sightengine", client.post(
+                        "https://api.sightengine.com/1.0/check.json",
+                        data=params,
+                        files={"media": ("image", image_data.data, image_data.media_type)}
+                    ))
+                else:
+                    response = await upstream_request("sightengine", client.get(
+                        "https://api.sightengine.com/1.0/check.json",
+                        params={**params, "url": image_url}
+                    ))
                 response.raise_for_status()
                 data = response.json()
             except httpx.HTTPStatusError as exc:
@@ -94,56 +203,184 @@ class ImageScorer:
 
         return nudity_data
 
-    async def check_nudity_local(self, image_url: str) -> dict:
+    def _load_nudity_classifier(self) -> Optional[Callable]:
+        """Import the in-process classifier named by NUDITY_CLASSIFIER ("module:function")."""
+        if not config.nudity_classifier:
+            return None
+        module_name, _, attr = config.nudity_classifier.partition(":")
+        try:
+            return getattr(importlib.import_module(module_name), attr or "classify")
+        except (ImportError, AttributeError) as exc:
+            self.logger.warning("Nudity classifier %s unavailable: %s", config.nudity_classifier, exc)
+            return None
+
+    async def check_nudity_inprocess(self, image_data: FetchedImage) -> dict:
         """
-        Check image for nudity using the local analyzer service.
+        Check image bytes with the in-process classifier hook.
+
+        The hook is called as ``classify(data, media_type)`` and returns a payload
+        in any format understood by extract_nudity_safe_score, or a safe score.
+        Synchronous hooks run in a worker thread.
 
         Args:
-            image_url: URL of the image
+            image_data: Image bytes and media type
 
         Returns:
-            Nudity check results from the local service
+            Nudity check results
         """
-        if not config.nudity_service_url:
-            raise RuntimeError("NUDITY_SERVICE_URL not configured")
+        import asyncio
 
+        classifier = self.nudity_classifier
+        if inspect.iscoroutinefunction(classifier):
+            result = await classifier(image_data.data, image_data.media_type)
+        else:
+            result = await asyncio.to_thread(classifier, image_data.data, image_data.media_type)
+
+        if isinstance(result, (int, float)):
+            result = {"safe_score": float(result)}
+        self.logger.info("In-process nudity check: raw=%s", result)
+        return result
+
+    def _nudity_endpoint(self) -> str:
+        """Local analyzer /analyze endpoint."""
         endpoint = config.nudity_service_url.rstrip("/")
         if not endpoint.endswith("/analyze"):
             endpoint = f"{endpoint}/analyze"
+        return endpoint
+
+    def _nudity_form(self) -> dict:
+        """Form fields forwarded to the local analyzer."""
+        payload = {}
+        # Service accepts threshold/model as form fields (curl -F), not query params
+        if config.nudity_service_threshold is not None:
+            payload["threshold"] = str(config.nudity_service_threshold)
+        if config.nudity_service_model:
+            payload["clip_model"] = config.nudity_service_model
+        return payload
+
+    @staticmethod
+    def _batch_upload(items: list[tuple]) -> tuple[list, list[dict]]:
+        """
+        Build multipart files and a manifest for a batch request.
 
-        async with httpx.AsyncClient(timeout=60.0) as client:
-            payload = {"image_url": image_url}
-            # Service accepts threshold/model as form fields (curl -F), not query params
-            if config.nudity_service_threshold is not None:
-                payload["threshold"] = str(config.nudity_service_threshold)
-            if config.nudity_service_model:
-                payload["clip_model"] = config.nudity_service_model
-
-            response = await client.post(
-                endpoint,
-                data=payload
-            )
+        Each item starts with (image_url, image_data); items with bytes are
+        uploaded as a "files" part and referenced by name in the manifest.
+        """
+        files = []
+        manifest = []
+        for idx, item in enumerate(items):
+            image_url, image_data = item[0], item[1]
+            entry: dict[str, Any] = {"image_url": image_url}
+            if image_data is not None:
+                name = f"image_{idx}"
+                files.append(("files", (name, image_data.data, image_data.media_type)))
+                entry["file"] = name
+            manifest.append(entry)
+        return files, manifest
+
+    async def _analyze_nudity_single(self, item: tuple[str, Optional[FetchedImage]]) -> dict:
+        """Send one image to the local analyzer."""
+        image_url, image_data = item
+        endpoint = self._nudity_endpoint()
+        payload = self._nudity_form()
+
+        async with get_bulkhead("nudity_service"), httpx.AsyncClient(timeout=60.0) as client:
+            response = None
+            if image_data is not None:
+                # Upload the bytes we already hold so the service does not re-download
+                try:
+                    response = await upstream_request("nudity_service", client.post(
+                        endpoint,
+                        data=payload,
+                        files={"file": ("image", image_data.data, image_data.media_type)}
+                    ))
+                    response.raise_for_status()
+                except httpx.HTTPError as exc:
+                    self.logger.warning("Local nudity upload failed, retrying with URL: %s", exc)
+                    response = None
+
+            if response is None:
+                response = await upstream_request("nudity_service", client.post(
+                    endpoint,
+                    data={**payload, "image_url": image_url}
+                ), fallback="url" if image_data is not None else None)
+                response.raise_for_status()
+            return response.json()
+
+    async def _analyze_nudity_batch(self, items: list[tuple[str, Optional[FetchedImage]]]) -> list[dict]:
+        """Send several images to the local analyzer's /analyze/batch endpoint."""
+        files, manifest = self._batch_upload(items)
+        payload = {**self._nudity_form(), "items": json.dumps(manifest)}
+
+        async with get_bulkhead("nudity_service"), httpx.AsyncClient(timeout=120.0) as client:
+            response = await upstream_request("nudity_service", client.post(
+                f"{self._nudity_endpoint()}/batch",
+                data=payload,
+                files=files or None
+            ))
             response.raise_for_status()
-            data = response.json()
+            return response.json().get("results", [])
+
+    async def check_nudity_local(
+        self,
+        image_url: str,
+        image_data: Optional[FetchedImage] = None
+    ) -> dict:
+        """
+        Check image for nudity using the local analyzer service.
+
+        Concurrent checks are micro-batched when SCORING_BATCH_ENABLED is set.
+
+        Args:
+            image_url: URL of the image
+            image_data: Already downloaded image; uploaded instead of the URL if given
+
+        Returns:
+            Nudity check results from the local service
+        """
+        if not config.nudity_service_url:
+            raise RuntimeError("NUDITY_SERVICE_URL not configured")
+
+        item = (image_url, image_data)
+        if self.nudity_batcher is not None:
+            data = await self.nudity_batcher.submit(item)
+        else:
+            data = await self._analyze_nudity_single(item)
 
         self.logger.info("Local nudity check: url=%s raw=%s", image_url, data)
         return data
 
-    async def check_nudity(self, image_url: str) -> dict:
+    async def check_nudity(
+        self,
+        image_url: str,
+        image_data: Optional[FetchedImage] = None,
+        sightengine_upload: bool = False
+    ) -> dict:
         """
         Check image for nudity, preferring local analyzer and falling back to SightEngine.
 
+        With image bytes, the in-process classifier hook (NUDITY_CLASSIFIER) is
+        tried first and the bytes are uploaded instead of sending the URL.
+
         Args:
             image_url: URL of the image
+            image_data: Already downloaded image for the classifier hook and local analyzer
+            sightengine_upload: Upload image_data to SightEngine too (for URLs it cannot reach)
 
         Returns:
             Nudity check results
         """
         local_error: Optional[Exception] = None
 
+        if image_data is not None and self.nudity_classifier is not None:
+            try:
+                return await self.check_nudity_inprocess(image_data)
+            except Exception as exc:
+                self.logger.warning("In-process nudity classifier failed: %s", exc)
+
         if config.nudity_service_url:
             try:
-                return await self.check_nudity_local(image_url)
+                return await self.check_nudity_local(image_url, image_data)
             except Exception as exc:
                 local_error = exc
                 self.logger.warning(
@@ -152,7 +389,7 @@ class ImageScorer:
                 )
 
         try:
-            return await self.check_nudity_sightengine(image_url)
+            return await self.check_nudity_sightengine(image_url, image_data if sightengine_upload else None)
         except Exception as exc:
             if local_error:
                 raise RuntimeError(
@@ -227,17 +464,68 @@ class ImageScorer:
 
         return 1.0
 
+    async def _score_presentation_single(
+        self,
+        item: tuple[str, Optional[FetchedImage], str]
+    ) -> dict:
+        """Send one image to the scoring service."""
+        image_url, image_data, topic = item
+        async with get_bulkhead("scoring_service"), httpx.AsyncClient(timeout=30.0) as client:
+            response = None
+            if image_data is not None:
+                try:
+                    response = await upstream_request("scoring_service", client.post(
+                        f"{config.scoring_service_url}/score",
+                        data={"topic": topic},
+                        files={"file": ("image", image_data.data, image_data.media_type)}
+                    ))
+                    response.raise_for_status()
+                except httpx.HTTPError as exc:
+                    self.logger.warning("Presentation upload failed, retrying with URL: %s", exc)
+                    response = None
+
+            if response is None:
+                response = await upstream_request("scoring_service", client.post(
+                    f"{config.scoring_service_url}/score",
+                    json={"image_url": image_url, "topic": topic},
+                    headers={"Content-Type": "application/json"}
+                ), fallback="url" if image_data is not None else None)
+                response.raise_for_status()
+            return response.json()
+
+    async def _score_presentation_batch(
+        self,
+        items: list[tuple[str, Optional[FetchedImage], str]]
+    ) -> list[dict]:
+        """Send several images to the scoring service's /score/batch endpoint."""
+        files, manifest = self._batch_upload(items)
+        for entry, item in zip(manifest, items):
+            entry["topic"] = item[2]
+
+        async with get_bulkhead("scoring_service"), httpx.AsyncClient(timeout=60.0) as client:
+            response = await upstream_request("scoring_service", client.post(
+                f"{config.scoring_service_url}/score/batch",
+                data={"items": json.dumps(manifest)},
+                files=files or None
+            ))
+            response.raise_for_status()
+            return response.json().get("results", [])
+
     async def score_presentation_fit(
         self,
         image_url: str,
-        topic: str
+        topic: str,
+        image_data: Optional[FetchedImage] = None
     ) -> Optional[float]:
         """
         Score image fit for presentation topic using local scoring service.
 
+        Concurrent requests are micro-batched when SCORING_BATCH_ENABLED is set.
+
         Args:
             image_url: URL of the image
             topic: Topic/keywords to match
+            image_data: Already downloaded image; uploaded instead of the URL if given
 
         Returns:
             Presentation fit score (0-1) or None if service unavailable
@@ -247,14 +535,11 @@ class ImageScorer:
             return None
 
         try:
-            async with httpx.AsyncClient(timeout=30.0) as client:
-                response = await client.post(
-                    f"{config.scoring_service_url}/score",
-                    json={"image_url": image_url, "topic": topic},
-                    headers={"Content-Type": "application/json"}
-                )
-                response.raise_for_status()
-                data = response.json()
+            item = (image_url, image_data, topic)
+            if self.presentation_batcher is not None:
+                data = await self.presentation_batcher.submit(item)
+            else:
+                data = await self._score_presentation_single(item)
 
             presentation_score = data.get("presentation_score", 0.5)
             self.logger.info(
@@ -271,7 +556,8 @@ class ImageScorer:
     async def score_image(
         self,
         image_ref: ImageRef,
-        topic: str
+        topic: str,
+        skip_presentation: bool = False
     ) -> ScoredImage:
         """
         Score an image comprehensively.
@@ -279,16 +565,45 @@ class ImageScorer:
         Args:
             image_ref: Image reference
             topic: Topic to match against
+            skip_presentation: Do not call the presentation fit service (cached scores are still used)
 
         Returns:
             Scored image with all quality metrics
         """
         import asyncio
 
-        # Run scoring tasks in parallel
-        quality_task = self.score_quality_sightengine(image_ref.regular_url)
-        presentation_task = self.score_presentation_fit(image_ref.regular_url, topic)
-        nudity_task = self.check_nudity(image_ref.regular_url)
+        cache = self.score_cache
+        # One threaded SELECT; the lookups below are then answered from memory
+        await cache.load_scores(image_ref.source, image_ref.id, topic)
+        cached_quality = self._cached_quality(image_ref)
+        cached_presentation = cache.get_presentation(image_ref.source, image_ref.id, topic)
+        cached_nudity = cache.get_nudity(image_ref.source, image_ref.id)
+
+        async def cached(value):
+            return value
+
+        # Download once for the scorers that accept uploads (local quality/nudity, presentation)
+        needs_upload = (
+            (cached_quality is None and config.quality_scorer != "sightengine")
+            or (cached_nudity is None and config.nudity_service_url)
+            or (cached_presentation is None and config.scoring_service_url and not skip_presentation)
+        )
+        image_data = await self.fetcher.fetch(image_ref.regular_url) if needs_upload else None
+
+        # Run scoring tasks in parallel; cached scores cost no network call
+        original_size = (image_ref.width, image_ref.height) if image_ref.width and image_ref.height else None
+        quality_task = (
+            cached((cached_quality, None)) if cached_quality is not None
+            else self.score_quality(image_ref.regular_url, image_data, original_size)
+        )
+        presentation_task = (
+            cached(cached_presentation) if cached_presentation is not None or skip_presentation
+            else self.score_presentation_fit(image_ref.regular_url, topic, image_data)
+        )
+        nudity_task = (
+            cached(None) if cached_nudity is not None
+            else self.check_nudity(image_ref.regular_url, image_data)
+        )
 
         quality_score, presentation_score, nudity_data = await asyncio.gather(
             quality_task, presentation_task, nudity_task,
@@ -304,16 +619,30 @@ class ImageScorer:
             else:
                 self.logger.warning("Quality scoring failed: %s", quality_score)
                 quality_score = 0.5
+        else:
+            quality_score, quality_kind = quality_score
+            if quality_kind == "quality_local":
+                cache.set_local_quality(image_ref.source, image_ref.id, quality_score)
+            elif quality_kind == "quality":
+                cache.set_quality(image_ref.source, image_ref.id, quality_score)
 
         if isinstance(presentation_score, Exception):
             presentation_score = None
+        elif presentation_score is not None and cached_presentation is None:
+            cache.set_presentation(image_ref.source, image_ref.id, topic, presentation_score)
 
         if isinstance(nudity_data, Exception):
             self.logger.warning("Nudity check failed: %s", nudity_data)
             nudity_data = {}
 
         # Check if image is safe (no inappropriate content)
-        nudity_safe_score = self.extract_nudity_safe_score(nudity_data)
+        if cached_nudity is not None:
+            nudity_safe_score = cached_nudity
+        else:
+            nudity_safe_score = self.extract_nudity_safe_score(nudity_data)
+            # Empty payloads mean the check was skipped (quota/error); do not persist those
+            if nudity_data:
+                cache.set_nudity(image_ref.source, image_ref.id, nudity_safe_score)
 
         is_safe = nudity_safe_score >= config.min_nudity_safe_score
 
@@ -347,7 +676,8 @@ class ImageScorer:
     async def score_images(
         self,
         images: list[ImageRef],
-        topic: str
+        topic: str,
+        skip_presentation: bool = False
     ) -> list[ScoredImage]:
         """
         Score multiple images.
@@ -355,13 +685,14 @@ class ImageScorer:
         Args:
             images: List of image references
             topic: Topic to match against
+            skip_presentation: Do not call the presentation fit service
 
         Returns:
             List of scored images
         """
         import asyncio
 
-        tasks = [self.score_image(img, topic) for img in images]
+        tasks = [self.score_image(img, topic, skip_presentation) for img in images]
         return await asyncio.gather(*tasks)
 
     def filter_and_sort(
@@ -1,15 +1,32 @@
 """Image search across stock photo services."""
 import httpx
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Tuple
 from .config import config
 from .models import ImageRef
+from .image_fetcher import ImageFetcher
+from .score_cache import ScoreCache
+from .perceptual_hash import dhash, hamming_distance
+from .bulkhead import get_bulkhead
+from .request_timing import upstream_request
 
 
 class ImageSearcher:
     """Searches for images on Unsplash and Pexels."""
 
-    def __init__(self):
-        """Initialize the image searcher."""
+    def __init__(
+        self,
+        fetcher: Optional[ImageFetcher] = None,
+        score_cache: Optional[ScoreCache] = None
+    ):
+        """
+        Initialize the image searcher.
+
+        Args:
+            fetcher: Shared image downloader (for thumbnails used in near-duplicate detection)
+            score_cache: Persistent cache that also stores perceptual hashes
+        """
+        self.fetcher = fetcher or ImageFetcher()
+        self.score_cache = score_cache or ScoreCache()
         self.unsplash_headers = {
             "Authorization": f"Client-ID {config.unsplash_access_key}"
         }
@@ -28,12 +45,12 @@ class ImageSearcher:
         Returns:
             List of image references
         """
-        async with httpx.AsyncClient() as client:
-            response = await client.get(
+        async with get_bulkhead("unsplash"), httpx.AsyncClient() as client:
+            response = await upstream_request("unsplash", client.get(
                 "https://api.unsplash.com/search/photos",
                 headers=self.unsplash_headers,
                 params={"query": query, "per_page": per_page}
-            )
+            ))
             response.raise_for_status()
             data = response.json()
 
@@ -46,6 +63,9 @@ class ImageSearcher:
                 regular_url=photo["urls"].get("regular") or photo["urls"].get("full"),
                 full_url=photo["urls"].get("full") or photo["urls"].get("raw"),
                 source="unsplash",
+                thumb_url=photo["urls"].get("thumb") or photo["urls"].get("small"),
+                width=photo.get("width"),
+                height=photo.get("height"),
                 photographer=photo.get("user", {}).get("name"),
                 photographer_url=photo.get("user", {}).get("links", {}).get("html")
             ))
@@ -63,12 +83,12 @@ class ImageSearcher:
         Returns:
             List of image references
         """
-        async with httpx.AsyncClient() as client:
-            response = await client.get(
+        async with get_bulkhead("pexels"), httpx.AsyncClient() as client:
+            response = await upstream_request("pexels", client.get(
                 "https://api.pexels.com/v1/search",
                 headers=self.pexels_headers,
                 params={"query": query, "per_page": per_page}
-            )
+            ))
             response.raise_for_status()
             data = response.json()
 
@@ -81,6 +101,9 @@ class ImageSearcher:
                 regular_url=photo["src"].get("large2x") or photo["src"].get("large"),
                 full_url=photo["src"].get("original") or photo["src"].get("large2x"),
                 source="pexels",
+                thumb_url=photo["src"].get("small") or photo["src"].get("medium"),
+                width=photo.get("width"),
+                height=photo.get("height"),
                 photographer=photo.get("photographer"),
                 photographer_url=photo.get("photographer_url")
             ))
@@ -127,4 +150,75 @@ class ImageSearcher:
                 result.index = len(all_results)
                 all_results.append(result)
 
+        if config.phash_dedup_enabled:
+            all_results = await self.collapse_near_duplicates(all_results)
+
         return all_results
+
+    async def image_hash(self, image_ref: ImageRef) -> Optional[int]:
+        """
+        Perceptual hash of a stock image, computed from its thumbnail and stored for reuse.
+
+        Args:
+            image_ref: Image reference
+
+        Returns:
+            dHash value or None if the thumbnail could not be loaded
+        """
+        await self.score_cache.load_hash(image_ref.source, image_ref.id)
+        stored = self.score_cache.get_hash(image_ref.source, image_ref.id)
+        if stored is not None:
+            return stored
+
+        fetched = await self.fetcher.fetch(image_ref.thumb_url or image_ref.regular_url)
+        if fetched is None:
+            return None
+        try:
+            value = dhash(fetched.data)
+        except Exception as exc:
+            print(f"Perceptual hash failed for {image_ref.source}:{image_ref.id}: {exc}")
+            return None
+
+        self.score_cache.set_hash(image_ref.source, image_ref.id, value)
+        return value
+
+    async def collapse_near_duplicates(self, images: List[ImageRef]) -> List[ImageRef]:
+        """
+        Drop images whose perceptual hash is close to an earlier result.
+
+        Catches the same photo uploaded to both Unsplash and Pexels as well as
+        near-duplicate crops, so they are not scored twice.
+
+        Args:
+            images: Image references in preference order
+
+        Returns:
+            Image references with near-duplicates removed (re-indexed)
+        """
+        import asyncio
+
+        hashes = await asyncio.gather(*[self.image_hash(img) for img in images])
+
+        kept: List[ImageRef] = []
+        # (image, hash) of kept images that could be hashed
+        hashed: List[Tuple[ImageRef, int]] = []
+        for image_ref, value in zip(images, hashes):
+            if value is not None:
+                duplicate_of = next(
+                    (
+                        other_ref for other_ref, other in hashed
+                        if hamming_distance(value, other) <= config.phash_max_distance
+                    ),
+                    None
+                )
+                if duplicate_of is not None:
+                    print(
+                        f"Near-duplicate dropped: {image_ref.source}:{image_ref.id} "
+                        f"~ {duplicate_of.source}:{duplicate_of.id}"
+                    )
+                    continue
+                hashed.append((image_ref, value))
+            image_ref.index = len(kept)
+            kept.append(image_ref)
+
+        return kept
@@ -1,5 +1,7 @@
 """Keyword extraction using LangChain and LLMs."""
 import json
+import re
+from collections import Counter
 from typing import Optional
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import StrOutputParser
@@ -8,6 +10,15 @@ from langchain_openai import ChatOpenAI
 from .config import config
 from .models import SlideInput, KeywordExtractionResult
 from .prompts import KEYWORD_EXTRACTION_PROMPT, KEYWORD_REFINEMENT_PROMPT
+from .request_timing import upstream_call
+
+# Words ignored by the local (LLM-free) keyword extraction
+STOPWORDS = {
+    "the", "and", "for", "with", "from", "that", "this", "into", "your", "our", "are", "was",
+    "were", "will", "can", "how", "what", "why", "when", "which", "their", "about", "over",
+    "der", "die", "das", "und", "mit", "für", "von", "den", "dem", "des", "ein", "eine",
+    "einer", "eines", "ist", "sind", "auf", "aus", "bei", "wie", "was", "im", "zum", "zur",
+}
 
 
 class KeywordExtractor:
@@ -31,7 +42,7 @@ class KeywordExtractor:
             ("human", "All found keywords: {keywords}")
         ])
 
-    def extract_keywords(self, slide: SlideInput) -> tuple[KeywordExtractionResult, str]:
+    async def extract_keywords(self, slide: SlideInput) -> tuple[KeywordExtractionResult, str]:
         """
         Extract keywords from slide content.
 
@@ -67,7 +78,8 @@ class KeywordExtractor:
 
         # Step 1: Extract detailed keywords
         extraction_chain = self.extraction_prompt | self.llm | StrOutputParser()
-        extraction_result = extraction_chain.invoke({"text": text})
+        with upstream_call("openrouter"):
+            extraction_result = await extraction_chain.ainvoke({"text": text})
 
         try:
             extracted_data = json.loads(extraction_result)
@@ -82,6 +94,37 @@ class KeywordExtractor:
         # Step 2: Refine to 2-3 most important keywords
         all_keywords = ", ".join(extraction_obj.english_keywords)
         refinement_chain = self.refinement_prompt | self.llm | StrOutputParser()
-        refined_keywords = refinement_chain.invoke({"keywords": all_keywords})
+        with upstream_call("openrouter"):
+            refined_keywords = await refinement_chain.ainvoke({"keywords": all_keywords})
 
         return extraction_obj, refined_keywords.strip()
+
+    def extract_keywords_local(self, slide: SlideInput) -> tuple[KeywordExtractionResult, str]:
+        """
+        Extract keywords without an LLM call (used when the latency budget is tight).
+
+        Picks the most frequent non-stopword terms, title words first.
+
+        Args:
+            slide: Slide input data
+
+        Returns:
+            Tuple of (detailed extraction result, refined keywords string)
+        """
+        if slide.image_keywords:
+            explicit_keywords = [k for k in slide.image_keywords if k]
+            return KeywordExtractionResult(english_keywords=explicit_keywords), ", ".join(explicit_keywords[:3])
+
+        texts = [slide.title or ""]
+        if slide.bullets:
+            texts.extend(bullet.get("bullet", "") for bullet in slide.bullets)
+
+        counts: Counter = Counter()
+        for weight, text in enumerate(texts):
+            for word in re.findall(r"[^\W\d_]{3,}", text.lower()):
+                if word not in STOPWORDS:
+                    # Title words (index 0) weigh more than bullet words
+                    counts[word] += 2 if weight == 0 else 1
+
+        keywords = [word for word, _ in counts.most_common(5)]
+        return KeywordExtractionResult(english_keywords=keywords), ", ".join(keywords[:3])
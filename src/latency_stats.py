@@ -0,0 +1,59 @@
+"""Rolling latency statistics per operation (e.g. provider, model)."""
+from __future__ import annotations
+
+from collections import deque
+from typing import Optional
+
+# Number of recent observations kept per key
+WINDOW = 200
+
+
+class LatencyTracker:
+    """Keeps the most recent durations per key and answers percentile queries."""
+
+    def __init__(self, window: int = WINDOW):
+        """
+        Initialize the tracker.
+
+        Args:
+            window: Number of recent observations kept per key
+        """
+        self.window = window
+        self._samples: dict[str, deque] = {}
+
+    def record(self, key: str, seconds: float) -> None:
+        """Record one observed duration."""
+        samples = self._samples.get(key)
+        if samples is None:
+            samples = deque(maxlen=self.window)
+            self._samples[key] = samples
+        samples.append(seconds)
+
+    def count(self, key: str) -> int:
+        """Number of observations currently kept for a key."""
+        return len(self._samples.get(key, ()))
+
+    def percentile(self, key: str, p: float, min_samples: int = 5) -> Optional[float]:
+        """
+        Percentile of the recent durations.
+
+        Args:
+            key: Operation key
+            p: Percentile between 0 and 100
+            min_samples: Return None until at least this many observations exist
+
+        Returns:
+            Duration in seconds or None if there is not enough data
+        """
+        samples = self._samples.get(key)
+        if not samples or len(samples) < min_samples:
+            return None
+        ordered = sorted(samples)
+        rank = (len(ordered) - 1) * max(0.0, min(100.0, p)) / 100.0
+        lower = int(rank)
+        upper = min(lower + 1, len(ordered) - 1)
+        return ordered[lower] + (ordered[upper] - ordered[lower]) * (rank - lower)
+
+
+# Process-wide tracker shared by the generator and orchestrator
+latency_tracker = LatencyTracker()
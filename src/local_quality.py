@@ -0,0 +1,162 @@
+"""Local image quality scoring with Pillow and NumPy (SightEngine substitute)."""
+from __future__ import annotations
+
+import asyncio
+import io
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+
+import numpy as np
+from PIL import Image
+
+from .config import config
+
+# Analysis size for the downsampled global metrics (sharpness, exposure, contrast)
+ANALYSIS_MAX_SIDE = 512
+# Full-resolution crop used for the JPEG blockiness estimate (multiple of 8)
+BLOCKINESS_CROP = 512
+
+_EXECUTOR: Optional[ProcessPoolExecutor] = None
+
+
+def _resolution_score(width: int, height: int) -> float:
+    """1.0 at >= 2 megapixels, scaling down linearly below."""
+    return min(1.0, (width * height) / 2_000_000)
+
+
+def _sharpness_score(gray: np.ndarray) -> float:
+    """Variance of the 4-neighbour Laplacian, squashed into 0-1."""
+    center = gray[1:-1, 1:-1]
+    laplacian = (
+        gray[:-2, 1:-1] + gray[2:, 1:-1] + gray[1:-1, :-2] + gray[1:-1, 2:] - 4.0 * center
+    )
+    variance = float(laplacian.var())
+    return variance / (variance + 150.0)
+
+
+def _exposure_score(gray: np.ndarray) -> float:
+    """Penalize clipped shadows/highlights and a mean far from mid-grey."""
+    histogram = np.bincount(gray.astype(np.uint8).ravel(), minlength=256)
+    total = histogram.sum() or 1
+    clipped = (histogram[:6].sum() + histogram[250:].sum()) / total
+    mean_offset = abs(float(gray.mean()) - 128.0) / 128.0
+    return max(0.0, 1.0 - 1.5 * clipped - 0.5 * mean_offset)
+
+
+def _contrast_score(gray: np.ndarray) -> float:
+    """RMS contrast relative to a well-exposed photo."""
+    return min(1.0, float(gray.std()) / 64.0)
+
+
+def _artifact_score(gray: np.ndarray) -> float:
+    """
+    Estimate JPEG blockiness on a full-resolution crop.
+
+    Compares luminance steps across 8-pixel block boundaries with steps inside
+    blocks; clean images have a ratio close to 1.
+    """
+    h, w = gray.shape
+    ch = min(h, BLOCKINESS_CROP) // 8 * 8
+    cw = min(w, BLOCKINESS_CROP) // 8 * 8
+    if ch < 16 or cw < 16:
+        return 1.0
+    top = (h - ch) // 2 // 8 * 8
+    left = (w - cw) // 2 // 8 * 8
+    crop = gray[top:top + ch, left:left + cw]
+
+    col_diff = np.abs(np.diff(crop, axis=1))
+    row_diff = np.abs(np.diff(crop, axis=0))
+    col_boundary = np.arange(col_diff.shape[1]) % 8 == 7
+    row_boundary = np.arange(row_diff.shape[0]) % 8 == 7
+
+    boundary = col_diff[:, col_boundary].mean() + row_diff[row_boundary, :].mean()
+    inner = col_diff[:, ~col_boundary].mean() + row_diff[~row_boundary, :].mean()
+    if inner <= 1e-6:
+        return 1.0
+    ratio = float(boundary / inner)
+    return max(0.0, min(1.0, 1.0 - (ratio - 1.0) / 0.5))
+
+
+def compute_quality(data: bytes, original_size: Optional[tuple[int, int]] = None) -> float:
+    """
+    Compute a 0-1 quality score from encoded image bytes.
+
+    Combines resolution, Laplacian-variance sharpness, exposure, contrast and a
+    JPEG artifact estimate. Runs synchronously; use ``score_quality_local`` from
+    async code.
+
+    The bytes are a provider rendition (Unsplash ``regular`` is 1080px wide,
+    Pexels ``large2x`` up to 1880px), so their pixel count says more about the
+    provider than about the photo. Resolution is therefore scored from the
+    original dimensions reported by the provider and left out without them.
+
+    Args:
+        data: Encoded image (JPEG, PNG, WebP, ...)
+        original_size: (width, height) of the original image, if known
+
+    Returns:
+        Quality score (0-1)
+    """
+    with Image.open(io.BytesIO(data)) as img:
+        width, height = img.size
+        gray_image = img.convert("L")
+
+    full = np.asarray(gray_image, dtype=np.float32)
+    artifacts = _artifact_score(full)
+
+    factor = max(1, max(width, height) // ANALYSIS_MAX_SIDE)
+    small_image = gray_image.reduce(factor) if factor > 1 else gray_image
+    small = np.asarray(small_image, dtype=np.float32)
+
+    score = (
+        0.35 * _sharpness_score(small)
+        + 0.20 * _exposure_score(small)
+        + 0.10 * _contrast_score(small)
+        + 0.10 * artifacts
+    )
+    if original_size:
+        score += 0.25 * _resolution_score(*original_size)
+    else:
+        score /= 0.75
+    return round(max(0.0, min(1.0, score)), 4)
+
+
+def start_executor() -> ProcessPoolExecutor:
+    """
+    Create the shared process pool (no-op if it exists).
+
+    The API creates it at startup; workers are spawned rather than forked so
+    they never inherit the threads of the serving process (score cache
+    writer, default executor).
+    """
+    global _EXECUTOR
+    if _EXECUTOR is None:
+        _EXECUTOR = ProcessPoolExecutor(
+            max_workers=config.local_quality_workers,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+    return _EXECUTOR
+
+
+def shutdown_executor() -> None:
+    """Stop the process pool's workers (API shutdown); blocks until they exit."""
+    global _EXECUTOR
+    if _EXECUTOR is not None:
+        _EXECUTOR.shutdown(cancel_futures=True)
+        _EXECUTOR = None
+
+
+async def score_quality_local(data: bytes, original_size: Optional[tuple[int, int]] = None) -> float:
+    """
+    Score image quality locally in the process pool.
+
+    Args:
+        data: Encoded image bytes
+        original_size: (width, height) of the original image, if known
+
+    Returns:
+        Quality score (0-1)
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(start_executor(), compute_quality, data, original_size)
@@ -0,0 +1,149 @@
+"""Process-wide metrics rendered in the Prometheus text exposition format."""
+from __future__ import annotations
+
+import bisect
+from typing import Callable, Iterable, Optional
+
+# Histogram bucket upper bounds in seconds (upstream calls range from ~50ms to minutes)
+DEFAULT_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0, 120.0)
+
+# A sample produced at scrape time: (labels, value)
+Sample = tuple[dict[str, str], float]
+
+
+class _Histogram:
+    """Cumulative bucket counts, sum and count of one labelled series."""
+
+    def __init__(self, buckets: tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels: dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(str(value))}"' for name, value in labels.items()) + "}"
+
+
+def _format_value(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+class MetricsRegistry:
+    """
+    Counters and histograms keyed by name and labels, plus scrape-time gauges.
+
+    Counters and histograms are updated inline (``inc``/``observe``); values
+    that already live elsewhere (cache sizes, queue depths) are read by
+    collectors registered with ``register_collector`` when ``render`` runs.
+    Label values must come from small fixed sets (route templates, provider
+    names, status codes) to keep the number of series bounded.
+    """
+
+    def __init__(self, buckets: tuple[float, ...] = DEFAULT_BUCKETS):
+        """
+        Initialize the registry.
+
+        Args:
+            buckets: Histogram bucket upper bounds in seconds
+        """
+        self.buckets = buckets
+        self._help: dict[str, tuple[str, str]] = {}
+        self._counters: dict[str, dict[tuple, float]] = {}
+        self._histograms: dict[str, dict[tuple, _Histogram]] = {}
+        self._collectors: dict[str, Callable[[], Iterable[Sample]]] = {}
+
+    def describe(self, name: str, metric_type: str, help_text: str) -> None:
+        """Set the TYPE and HELP lines of a metric."""
+        self._help[name] = (metric_type, help_text)
+
+    def inc(self, name: str, labels: Optional[dict[str, str]] = None, value: float = 1.0) -> None:
+        """Increase a counter."""
+        series = self._counters.setdefault(name, {})
+        key = tuple(sorted((labels or {}).items()))
+        series[key] = series.get(key, 0.0) + value
+
+    def observe(self, name: str, seconds: float, labels: Optional[dict[str, str]] = None) -> None:
+        """Record one duration in a histogram."""
+        series = self._histograms.setdefault(name, {})
+        key = tuple(sorted((labels or {}).items()))
+        histogram = series.get(key)
+        if histogram is None:
+            histogram = _Histogram(self.buckets)
+            series[key] = histogram
+        histogram.observe(seconds)
+
+    def register_collector(
+        self, name: str, metric_type: str, help_text: str, collect: Callable[[], Iterable[Sample]]
+    ) -> None:
+        """
+        Add a metric whose samples are read at scrape time.
+
+        Args:
+            name: Metric name
+            metric_type: "gauge" or "counter"
+            help_text: HELP line
+            collect: Returns (labels, value) samples
+        """
+        self.describe(name, metric_type, help_text)
+        self._collectors[name] = collect
+
+    def _header(self, lines: list[str], name: str, default_type: str) -> None:
+        metric_type, help_text = self._help.get(name, (default_type, ""))
+        if help_text:
+            lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {metric_type}")
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text exposition format (version 0.0.4)."""
+        lines: list[str] = []
+
+        for name, series in sorted(self._counters.items()):
+            self._header(lines, name, "counter")
+            for key, value in series.items():
+                lines.append(f"{name}{_format_labels(dict(key))} {_format_value(value)}")
+
+        for name, series in sorted(self._histograms.items()):
+            self._header(lines, name, "histogram")
+            for key, histogram in series.items():
+                labels = dict(key)
+                cumulative = 0
+                for bound, count in zip(histogram.buckets + (float("inf"),), histogram.counts):
+                    cumulative += count
+                    le = "+Inf" if bound == float("inf") else _format_value(bound)
+                    lines.append(f"{name}_bucket{_format_labels({**labels, 'le': le})} {cumulative}")
+                lines.append(f"{name}_sum{_format_labels(labels)} {_format_value(histogram.sum)}")
+                lines.append(f"{name}_count{_format_labels(labels)} {histogram.count}")
+
+        for name, collect in self._collectors.items():
+            try:
+                samples = list(collect())
+            except Exception as exc:
+                # A failing collector must not break the whole scrape
+                print(f"[metrics] collector {name} failed: {exc}")
+                continue
+            self._header(lines, name, "gauge")
+            for labels, value in samples:
+                lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+
+        return "\n".join(lines) + "\n"
+
+
+# Process-wide registry shared by the API, pipeline stages and upstream calls
+metrics = MetricsRegistry()
+metrics.describe("imagegen_http_requests_total", "counter", "HTTP requests by endpoint and status")
+metrics.describe("imagegen_http_request_duration_seconds", "histogram", "HTTP request duration by endpoint and status")
+metrics.describe("imagegen_stage_duration_seconds", "histogram", "Pipeline stage duration")
+metrics.describe("imagegen_upstream_requests_total", "counter", "Upstream calls by provider and status")
+metrics.describe("imagegen_upstream_duration_seconds", "histogram", "Upstream call duration by provider and status")
@@ -0,0 +1,167 @@
+"""Micro-batching of requests to self-hosted scoring services."""
+from __future__ import annotations
+
+import asyncio
+import contextvars
+import logging
+import time
+from typing import Awaitable, Callable, Generic, List, Optional, TypeVar
+
+import httpx
+
+from .request_timing import record_call
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+# Status codes meaning "this service has no batch endpoint"
+UNSUPPORTED_STATUS = (404, 405, 501)
+
+
+class MicroBatcher(Generic[T, R]):
+    """
+    Collects concurrent requests for a short window and sends them as one batch.
+
+    Callers ``await submit(item)`` and receive their own result; the batch
+    response is demultiplexed by position. If the service has no batch
+    endpoint, requests are sent one by one and the batch endpoint is re-probed
+    after ``reprobe_after`` seconds.
+
+    Batches run in an empty context, so their upstream calls are not charged
+    to whichever caller happened to start the window; instead every caller's
+    wait is recorded as one call to ``provider`` in its own request timings.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        provider: str,
+        batch_fn: Callable[[List[T]], Awaitable[List[R]]],
+        single_fn: Callable[[T], Awaitable[R]],
+        window_ms: float = 5.0,
+        max_batch: int = 16,
+        reprobe_after: float = 300.0,
+    ):
+        """
+        Initialize the batcher.
+
+        Args:
+            name: Name used in log messages
+            provider: Upstream service the items are sent to (request timings and traces)
+            batch_fn: Sends a list of items, returns results in the same order
+            single_fn: Sends one item (fallback for services without batch endpoint)
+            window_ms: How long to wait for more items after the first one
+            max_batch: Flush immediately once this many items are pending
+            reprobe_after: Seconds before retrying a batch endpoint that was missing
+        """
+        self.logger = logging.getLogger(__name__)
+        self.name = name
+        self.provider = provider
+        self.batch_fn = batch_fn
+        self.single_fn = single_fn
+        self.window = window_ms / 1000.0
+        self.max_batch = max(1, max_batch)
+        self.reprobe_after = reprobe_after
+        self.batches_sent = 0
+        self.items_sent = 0
+        self._pending: list[tuple[T, asyncio.Future]] = []
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        self._unsupported_until = 0.0
+        self._tasks: set[asyncio.Task] = set()
+
+    @property
+    def batch_supported(self) -> bool:
+        """Whether the batch endpoint is currently assumed to exist."""
+        return time.monotonic() >= self._unsupported_until
+
+    async def submit(self, item: T) -> R:
+        """
+        Queue an item and wait for its result.
+
+        Args:
+            item: Request item
+
+        Returns:
+            Result for this item
+        """
+        if not self.batch_supported:
+            return await self.single_fn(item)
+
+        loop = asyncio.get_running_loop()
+        future: asyncio.Future = loop.create_future()
+        self._pending.append((item, future))
+
+        if len(self._pending) >= self.max_batch:
+            self._flush()
+        elif self._flush_handle is None:
+            self._flush_handle = loop.call_later(self.window, self._flush, context=contextvars.Context())
+
+        started_at = time.monotonic()
+        status = "ok"
+        try:
+            return await future
+        except asyncio.CancelledError:
+            status = "cancelled"
+            raise
+        except Exception:
+            status = "error"
+            raise
+        finally:
+            record_call(self.provider, time.monotonic() - started_at, status, batched=True)
+
+    def _flush(self) -> None:
+        """Hand the pending items to a background task."""
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+
+        # Callers that were cancelled while waiting are dropped from the batch
+        batch = [(item, fut) for item, fut in self._pending if not fut.done()]
+        self._pending = []
+        if not batch:
+            return
+
+        task = asyncio.get_running_loop().create_task(self._run(batch), context=contextvars.Context())
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, batch: list[tuple[T, asyncio.Future]]) -> None:
+        """Send a batch and resolve each caller's future."""
+        items = [item for item, _ in batch]
+
+        if len(items) > 1 and self.batch_supported:
+            try:
+                results = await self.batch_fn(items)
+                if len(results) != len(items):
+                    raise ValueError(f"expected {len(items)} results, got {len(results)}")
+                self.batches_sent += 1
+                self.items_sent += len(items)
+                for (_, future), result in zip(batch, results):
+                    if not future.done():
+                        future.set_result(result)
+                return
+            except httpx.HTTPStatusError as exc:
+                if exc.response.status_code in UNSUPPORTED_STATUS:
+                    self._unsupported_until = time.monotonic() + self.reprobe_after
+                    self.logger.info(
+                        "%s batch endpoint unavailable (status %s); sending per image",
+                        self.name,
+                        exc.response.status_code,
+                    )
+                else:
+                    self.logger.warning("%s batch failed, sending per image: %s", self.name, exc)
+            except Exception as exc:
+                self.logger.warning("%s batch failed, sending per image: %s", self.name, exc)
+
+        await asyncio.gather(*[self._run_single(item, future) for item, future in batch])
+
+    async def _run_single(self, item: T, future: asyncio.Future) -> None:
+        """Send one item and resolve its future."""
+        try:
+            result = await self.single_fn(item)
+        except Exception as exc:
+            if not future.done():
+                future.set_exception(exc)
+            return
+        if not future.done():
+            future.set_result(result)
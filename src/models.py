@@ -29,6 +29,16 @@ class SlideInput(BaseModel):
     colors: Optional[ColorConfig] = None
     ai_model: Literal["auto", "flux", "banana", "imagen", "google_banana"] = "auto"
 
+    # Generation reuse: identical generations are shared within a deck (or globally)
+    deck_id: Optional[str] = None
+    force_fresh: bool = False  # bypass the generation reuse index
+
+    # Scheduling priority of AI generations (interactive requests are served first)
+    priority: Literal["interactive", "background"] = "interactive"
+
+    # Latency budget for the whole request; optional stages are degraded to meet it
+    latency_budget_ms: Optional[int] = None
+
 
 class KeywordExtractionResult(BaseModel):
     """Result from keyword extraction."""
@@ -50,6 +60,9 @@ class ImageRef(BaseModel):
     regular_url: str
     full_url: str
     source: str  # "unsplash" or "pexels"
+    thumb_url: Optional[str] = None  # small preview used for perceptual hashing
+    width: Optional[int] = None  # original dimensions reported by the provider
+    height: Optional[int] = None
     photographer: Optional[str] = None
     photographer_url: Optional[str] = None
 
@@ -70,6 +83,49 @@ class ScoredImage(BaseModel):
     scores: QualityScore
 
 
+class ImagePayload(BaseModel):
+    """Image produced by a generator: raw bytes, a provider URL, or a stored image."""
+
+    data: Optional[bytes] = None
+    media_type: str = "image/jpeg"
+    url: Optional[str] = None
+    image_id: Optional[str] = None  # set once stored in generated_cache
+    reuse_key: Optional[tuple] = None  # reuse index entry to record once a URL image is stored
+
+
+class PrefetchRequest(BaseModel):
+    """Slides of a deck to process in the background."""
+
+    deck_id: str
+    slides: List[SlideInput]
+
+
+class GenerationResult(BaseModel):
+    """Outcome of one generation call: the image or the error, with provider and timings."""
+
+    image: Optional[ImagePayload] = None
+    model: Optional[str] = None
+    provider: Optional[str] = None  # scheduler lane / upstream API
+    error: Optional[str] = None
+    reused: bool = False  # served from the generation reuse index
+    timings: Dict[str, float] = {}  # seconds, e.g. {"queue": 0.2, "generate": 14.1}
+
+    @property
+    def ok(self) -> bool:
+        """Whether an image was produced."""
+        return self.image is not None
+
+
+class RequestTimings(BaseModel):
+    """Where the time of one request went (seconds) and which upstream calls it made."""
+
+    total: float = 0.0
+    stages: Dict[str, float] = {}  # e.g. {"keywords": 1.2, "search": 0.8}
+    upstream_calls: Dict[str, int] = {}  # calls per provider, e.g. {"unsplash": 1}
+    upstream_seconds: Dict[str, float] = {}  # summed call durations per provider
+    upstream_errors: Dict[str, int] = {}  # failed calls per provider
+
+
 class ImageResult(BaseModel):
     """Final result containing image URL."""
 
@@ -77,3 +133,5 @@ class ImageResult(BaseModel):
     source: str  # "stock" or "generated"
     keywords: str
     error: Optional[str] = None
+    degradations: List[str] = []  # stages skipped or cheapened to meet the latency budget
+    timings: Optional[RequestTimings] = None  # stage/upstream breakdown (also sent as Server-Timing)
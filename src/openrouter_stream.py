@@ -0,0 +1,225 @@
+"""Incremental parsing of OpenRouter chat completions that carry an image."""
+from __future__ import annotations
+
+import base64
+import binascii
+import json
+import re
+from typing import Optional
+
+# Location of the generated image inside a chat completion
+IMAGE_URL_PATH = ("choices", 0, "message", "images", 0, "image_url", "url")
+# Small string values kept for error messages
+ERROR_PATHS = {("error", "message"): "error", ("choices", 0, "message", "content"): "content"}
+
+# Caps on everything except the image itself
+MAX_KEY_BYTES = 256
+MAX_TEXT_BYTES = 500
+MAX_URL_BYTES = 8192
+
+_STRING_SPECIAL = re.compile(rb'["\\]')
+_WHITESPACE = b" \t\r\n"
+
+
+class _ImageSink:
+    """Receives the image URL string piece by piece and decodes base64 data URLs."""
+
+    def __init__(self):
+        self._header = bytearray()
+        self._pending = b""
+        self.is_data_url: Optional[bool] = None
+        self.media_type = "application/octet-stream"
+        # Decoded pieces, joined once when the data is read (no growing buffer to copy again)
+        self._chunks: list[bytes] = []
+        self.error: Optional[str] = None
+
+    def feed(self, raw: bytes) -> None:
+        """Add the next raw (still JSON-escaped) piece of the URL string."""
+        if self.error:
+            return
+        if self.is_data_url is None:
+            self._header += raw
+            if not self._header.startswith(b"data:"[: len(self._header)]):
+                self.is_data_url = False
+            elif b"," in self._header:
+                header, _, rest = bytes(self._header).partition(b",")
+                self._header = bytearray()
+                self.is_data_url = True
+                media_type = header[5:].split(b";")[0].replace(b"\\/", b"/").decode("ascii", "replace")
+                self.media_type = media_type or self.media_type
+                self._decode(rest)
+            elif len(self._header) > MAX_KEY_BYTES:
+                self.error = "Malformed data URL header"
+            return
+        if self.is_data_url:
+            self._decode(raw)
+        elif len(self._header) < MAX_URL_BYTES:
+            self._header += raw
+
+    def _decode(self, raw: bytes) -> None:
+        # Only "\/" and line escapes can appear inside JSON-encoded base64
+        if b"\\" in raw:
+            raw = raw.replace(b"\\/", b"/").replace(b"\\n", b"").replace(b"\\r", b"")
+        chunk = self._pending + raw
+        usable = len(chunk) - len(chunk) % 4
+        self._pending = chunk[usable:]
+        if usable:
+            try:
+                self._chunks.append(base64.b64decode(chunk[:usable]))
+            except (binascii.Error, ValueError) as exc:
+                self.error = f"Invalid base64 data: {exc}"
+
+    def finish(self) -> None:
+        """Flush the trailing base64 group."""
+        if self.is_data_url and self._pending and not self.error:
+            try:
+                self._chunks.append(base64.b64decode(self._pending + b"=" * (-len(self._pending) % 4)))
+            except (binascii.Error, ValueError) as exc:
+                self.error = f"Invalid base64 data: {exc}"
+            self._pending = b""
+
+    @property
+    def data(self) -> bytes:
+        """The decoded image bytes."""
+        if len(self._chunks) != 1:
+            self._chunks = [b"".join(self._chunks)]
+        return self._chunks[0]
+
+    @property
+    def url(self) -> Optional[str]:
+        """The URL when the image was delivered as a link rather than inline data."""
+        if self.is_data_url is False and self._header:
+            return json.loads(b'"' + bytes(self._header) + b'"')
+        return None
+
+
+class ImageResponseScanner:
+    """
+    Streaming JSON scanner that extracts the image from a chat completion.
+
+    Feed the response body chunk by chunk. Only the structure of the document
+    is tracked; the image data URL is base64-decoded as it arrives and all other
+    strings are skipped or kept in small bounded buffers, so the encoded body is
+    never resident as a whole.
+    """
+
+    def __init__(self):
+        self.image = _ImageSink()
+        self.found_image = False
+        self.texts: dict[str, str] = {}
+        self.head = bytearray()
+        self.parsed_ok = False
+        # One entry per open container: [key, expecting_key] for objects, [index] for arrays
+        self._stack: list[list] = []
+        self._in_string = False
+        self._escape = False
+        self._string_is_key = False
+        self._string_target: Optional[str] = None
+        self._string_buffer = bytearray()
+
+    def _path(self) -> tuple:
+        return tuple(entry[0] for entry in self._stack)
+
+    def feed(self, chunk: bytes) -> None:
+        """Process the next chunk of the response body."""
+        if len(self.head) < MAX_TEXT_BYTES:
+            self.head += chunk[: MAX_TEXT_BYTES - len(self.head)]
+
+        pos = 0
+        end = len(chunk)
+        while pos < end:
+            if self._in_string:
+                if self._escape:
+                    self._string_part(b"\\" + chunk[pos:pos + 1])
+                    self._escape = False
+                    pos += 1
+                    continue
+                match = _STRING_SPECIAL.search(chunk, pos)
+                stop = match.start() if match else end
+                if stop > pos:
+                    self._string_part(chunk[pos:stop])
+                if not match:
+                    break
+                pos = stop + 1
+                if chunk[stop] == 0x22:  # closing quote
+                    self._end_string()
+                else:
+                    self._escape = True
+                continue
+
+            byte = chunk[pos]
+            pos += 1
+            if byte in _WHITESPACE:
+                continue
+            top = self._stack[-1] if self._stack else None
+            if byte == 0x7B:  # {
+                self._stack.append([None, True])
+            elif byte == 0x5B:  # [
+                self._stack.append([0])
+            elif byte in (0x7D, 0x5D):  # } ]
+                if self._stack:
+                    self._stack.pop()
+                if not self._stack:
+                    self.parsed_ok = True
+            elif byte == 0x3A:  # :
+                if top is not None and len(top) == 2:
+                    top[1] = False
+            elif byte == 0x2C:  # ,
+                if top is not None:
+                    if len(top) == 2:
+                        top[1] = True
+                    else:
+                        top[0] += 1
+            elif byte == 0x22:  # "
+                self._start_string(top)
+
+    def _start_string(self, top: Optional[list]) -> None:
+        self._in_string = True
+        self._string_buffer = bytearray()
+        self._string_is_key = top is not None and len(top) == 2 and top[1]
+        self._string_target = None
+        if self._string_is_key:
+            return
+        path = self._path()
+        if path == IMAGE_URL_PATH:
+            self._string_target = "image"
+            self.found_image = True
+        elif path in ERROR_PATHS:
+            self._string_target = ERROR_PATHS[path]
+
+    def _string_part(self, raw: bytes) -> None:
+        if self._string_target == "image":
+            self.image.feed(raw)
+        elif self._string_is_key:
+            if len(self._string_buffer) < MAX_KEY_BYTES:
+                self._string_buffer += raw
+        elif self._string_target and len(self._string_buffer) < MAX_TEXT_BYTES:
+            self._string_buffer += raw[: MAX_TEXT_BYTES - len(self._string_buffer)]
+
+    def _end_string(self) -> None:
+        self._in_string = False
+        if self._string_target == "image":
+            self.image.finish()
+        elif self._string_is_key or self._string_target:
+            try:
+                text = json.loads(b'"' + bytes(self._string_buffer) + b'"')
+            except ValueError:
+                text = self._string_buffer.decode("utf-8", "replace")
+            if self._string_is_key:
+                self._stack[-1][0] = text
+            else:
+                self.texts[self._string_target] = text
+        self._string_buffer = bytearray()
+
+    def describe_failure(self) -> str:
+        """Short, bounded description of why no image was extracted."""
+        if self.image.error:
+            return self.image.error
+        if "error" in self.texts:
+            return f"OpenRouter error: {self.texts['error']}"
+        if not self.parsed_ok:
+            text = self.head.decode("utf-8", "replace")
+            return f"OpenRouter JSON parse failed: {text}"
+        if "content" in self.texts:
+            return f"No image returned by OpenRouter: {self.texts['content']}"
+        return "No image returned by OpenRouter"
@@ -1,17 +1,29 @@
 """Main orchestration logic for image generation pipeline."""
-from typing import Optional
+import asyncio
+import time
+from collections import deque
+from typing import Any, Optional
 import httpx
 from langchain_openai import ChatOpenAI
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import StrOutputParser
 
-from .models import SlideInput, ImageResult
+from .models import SlideInput, ImageResult, ImagePayload, GenerationResult, RequestTimings
 from .keyword_extractor import KeywordExtractor
 from .image_search import ImageSearcher
 from .image_scorer import ImageScorer
 from .image_generator import ImageGenerator
+from .image_fetcher import ImageFetcher, FetchedImage
+from .score_cache import ScoreCache
 from . import generated_cache
 from .config import config
+from .latency_stats import latency_tracker
+from .generation_scheduler import BACKGROUND, INTERACTIVE, PriorityTicket, generation_priority
+from .stock_hit_rate import StockHitRate
+from .acceptance import AcceptancePolicy
+from .request_budget import RequestBudget, current_budget, get_budget
+from .request_timing import current_timings, upstream_call, upstream_request
+from .flight_recorder import event, flight_recorder
 
 
 class ImageOrchestrator:
@@ -20,9 +32,17 @@ class ImageOrchestrator:
     def __init__(self):
         """Initialize the orchestrator."""
         self.keyword_extractor = KeywordExtractor()
-        self.image_searcher = ImageSearcher()
-        self.image_scorer = ImageScorer()
+        self.image_fetcher = ImageFetcher()
+        self.score_cache = ScoreCache()
+        self.image_searcher = ImageSearcher(fetcher=self.image_fetcher, score_cache=self.score_cache)
+        self.image_scorer = ImageScorer(score_cache=self.score_cache, fetcher=self.image_fetcher)
         self.image_generator = ImageGenerator()
+        self.stock_hit_rate = StockHitRate()
+        self.acceptance_policy = AcceptancePolicy()
+        # Start times of speculative generations within the last hour (cost cap)
+        self._speculative_starts: deque = deque()
+        # Stock searches that lost a race and finish in the background
+        self._background_tasks: set[asyncio.Task] = set()
         self.translator_llm = ChatOpenAI(
             model=config.gemini_model,
             openai_api_base="https://openrouter.ai/api/v1",
@@ -33,7 +53,7 @@ class ImageOrchestrator:
             ("human", "{text}")
         ])
 
-    async def process_slide(self, slide: SlideInput) -> ImageResult:
+    async def process_slide(self, slide: SlideInput, ticket: Optional[PriorityTicket] = None) -> ImageResult:
         """
         Process a slide to find or generate a suitable image.
 
@@ -43,23 +63,86 @@ class ImageOrchestrator:
         3. Score images for quality and presentation fit
         4. Return best image OR generate new one if none suitable
 
+        With a latency budget (``latency_budget_ms`` or DEFAULT_LATENCY_BUDGET_MS),
+        optional stages are skipped or replaced by cheaper ones when the remaining
+        time does not cover their estimated duration; the result lists the
+        degradations applied. The result's ``timings`` break the request down
+        by stage and upstream service; slow or failed requests are kept in the
+        flight recorder with all spans.
+
         Args:
             slide: Slide input data
+            ticket: Generation priority ticket (defaults to one for ``slide.priority``);
+                pass one to be able to promote the request while it runs
 
         Returns:
             Image result with URL and metadata
         """
+        if ticket is None:
+            ticket = PriorityTicket(BACKGROUND if slide.priority == "background" else INTERACTIVE)
+        budget = RequestBudget.from_ms(slide.latency_budget_ms or config.default_latency_budget_ms)
+        timings = RequestTimings()
+        token = current_budget.set(budget)
+        timings_token = current_timings.set(timings)
+        trace = flight_recorder.start(
+            "process_slide",
+            title=slide.title,
+            image_mode=slide.image_mode,
+            ai_model=slide.ai_model,
+            priority=slide.priority,
+            deck_id=slide.deck_id,
+            latency_budget_ms=slide.latency_budget_ms,
+        )
+        status, outcome = "error", {}
+        try:
+            result = await self._process_slide(slide, ticket)
+            status = "failed" if result.source == "failed" else "ok"
+            outcome = {"source": result.source, "error": result.error}
+        except asyncio.CancelledError:
+            status = "cancelled"
+            raise
+        except Exception as exc:
+            outcome = {"error": str(exc)}
+            raise
+        finally:
+            flight_recorder.finish(trace, status, degradations=list(budget.degradations), **outcome)
+            current_timings.reset(timings_token)
+            current_budget.reset(token)
+        timings.total = time.monotonic() - budget.started_at
+        result.degradations = list(budget.degradations)
+        result.timings = timings
+        return result
+
+    async def _process_slide(self, slide: SlideInput, ticket: PriorityTicket) -> ImageResult:
+        """Pipeline of process_slide, running under the request's budget."""
+        budget = get_budget()
         print(f"Processing slide: {slide.title}")
         print(f"Image mode: {slide.image_mode}, AI model: {slide.ai_model}")
 
+        # Applies to generations started by this request's task only
+        generation_priority.set(ticket)
+
         slide = await self._ensure_english(slide)
 
-        # Step 1: Extract keywords
-        extraction_result, refined_keywords = self.keyword_extractor.extract_keywords(slide)
+        # Scenario styles and AI-only mode go straight to generation, without stock search
+        style_key = (slide.style or "").lower()
+        style_forces_ai = style_key in ("flat_illustration", "fine_line")
+        skip_stock = style_forces_ai or slide.image_mode == "ai_only"
+
+        # Step 1: Extract keywords (locally when the LLM call and the stock stages after it
+        # do not fit the budget)
+        stages = ("keywords",) if skip_stock else ("keywords", "search", "score")
+        if slide.image_keywords or budget.can_afford(*stages):
+            with budget.stage("keywords"):
+                extraction_result, refined_keywords = await self.keyword_extractor.extract_keywords(slide)
+        else:
+            budget.degrade("local_keywords")
+            extraction_result, refined_keywords = self.keyword_extractor.extract_keywords_local(slide)
         print(f"Keywords: {refined_keywords}")
 
         if extraction_result.skip:
             print("Slide content not suitable for image generation")
+            event("branch", taken="skip")
             return ImageResult(
                 url="",
                 source="none",
@@ -67,73 +150,209 @@ class ImageOrchestrator:
             )
 
         # If style enforces AI-only (scenario keys), skip stock search
-        style_key = (slide.style or "").lower()
-        if style_key in ("flat_illustration", "fine_line"):
+        if style_forces_ai:
             print(f"Style '{style_key}' forces AI generation, skipping stock search")
+            event("branch", taken="style_forces_ai", style=style_key)
             return await self._generate_ai_image(slide, refined_keywords)
 
         # Check if AI-only mode
         if slide.image_mode == "ai_only":
             print("AI-only mode: Skipping stock photo search")
+            event("branch", taken="ai_only")
             return await self._generate_ai_image(slide, refined_keywords)
 
-        # Step 2: Search for stock images (unless ai_only)
-        print("Searching stock photo services...")
-        search_results = await self.image_searcher.search_all(
-            query=refined_keywords,
-            per_page=10
-        )
-        print(f"Found {len(search_results)} images")
+        # Auto mode: start generation alongside the stock search when stock is likely to miss
+        if slide.image_mode == "auto" and self._should_speculate(slide, refined_keywords):
+            event("branch", taken="speculative_race")
+            return await self._race_stock_and_generation(slide, refined_keywords)
 
-        # If stock_only mode and no results, return empty
-        if not search_results and slide.image_mode == "stock_only":
-            print("Stock-only mode: No images found")
+        # Steps 2-4: Search, score and pick a stock image
+        stock_result = await self._find_stock_image(slide, refined_keywords)
+        if stock_result:
+            return stock_result
+
+        # No suitable images
+        if slide.image_mode == "stock_only":
+            print("Stock-only mode: No suitable images found")
             return ImageResult(
                 url="",
                 source="none",
                 keywords=refined_keywords
             )
 
-        if not search_results:
-            # No images found - generate one (if auto mode)
-            return await self._generate_ai_image(slide, refined_keywords)
+        # Generate AI image as fallback
+        print("No suitable stock images found, generating...")
+        event("branch", taken="generate_fallback")
+        return await self._generate_ai_image(slide, refined_keywords)
 
-        # Step 3: Score images
-        print("Scoring images...")
-        scored_images = await self.image_scorer.score_images(
-            search_results,
-            topic=refined_keywords
-        )
+    async def _find_stock_image(self, slide: SlideInput, keywords: str) -> Optional[ImageResult]:
+        """
+        Search stock photo services and return the best suitable image.
 
-        # Step 4: Filter and sort
-        suitable_images = self.image_scorer.filter_and_sort(scored_images)
+        The outcome feeds the stock hit rate used for speculative generation.
 
-        if suitable_images:
-            # Return best matching stock image
-            best_image = suitable_images[0]
-            print(f"Selected stock image from {best_image.image_ref.source}")
-            print(f"  Quality: {best_image.scores.quality_score:.2f}")
-            print(f"  Presentation fit: {best_image.scores.presentation_score}")
-            print(f"  URL: {best_image.image_ref.full_url}")
+        Args:
+            slide: Slide input data
+            keywords: Refined search keywords
 
-            return ImageResult(
-                url=best_image.image_ref.full_url,
-                source=f"stock_{best_image.image_ref.source}",
-                keywords=refined_keywords
+        Returns:
+            Image result for the best stock image or None if none is suitable
+        """
+        budget = get_budget()
+
+        # Step 2: Search for stock images (fewer candidates when time is short)
+        per_page = 10
+        if not budget.can_afford("search", "score"):
+            budget.degrade("fewer_candidates")
+            per_page = 4
+        print("Searching stock photo services...")
+        with budget.stage("search"):
+            search_results = await self.image_searcher.search_all(
+                query=keywords,
+                per_page=per_page
             )
-        else:
-            # No suitable images
-            if slide.image_mode == "stock_only":
-                print("Stock-only mode: No suitable images found")
-                return ImageResult(
-                    url="",
-                    source="none",
-                    keywords=refined_keywords
+        print(f"Found {len(search_results)} images")
+
+        scored_images = []
+        suitable_images = []
+        if search_results:
+            # Step 3: Score images (presentation fit is optional)
+            skip_presentation = not budget.can_afford("score")
+            if skip_presentation:
+                budget.degrade("skipped_presentation_scoring")
+            print("Scoring images...")
+            with budget.stage("score"):
+                scored_images = await self.image_scorer.score_images(
+                    search_results,
+                    topic=keywords,
+                    skip_presentation=skip_presentation
                 )
-            else:
-                # Generate AI image as fallback
-                print("No suitable stock images found, generating...")
-                return await self._generate_ai_image(slide, refined_keywords)
+
+            # Step 4: Filter and sort
+            suitable_images = self.image_scorer.filter_and_sort(scored_images)
+
+        self.stock_hit_rate.record(keywords, slide.style, bool(suitable_images))
+        event("stock_candidates", found=len(search_results), suitable=len(suitable_images))
+        if not suitable_images:
+            # Near-misses within the tolerance band (or any safe candidate when
+            # generation does not fit the budget) beat the slow path
+            near_miss, reason = self.acceptance_policy.select_near_miss(
+                scored_images,
+                slide.image_mode,
+                generation_affordable=budget.can_afford("generate")
+            )
+            if near_miss is None:
+                return None
+            budget.degrade("near_miss_stock")
+            event("near_miss", reason=reason, source=near_miss.image_ref.source)
+            print(
+                f"Returning near-miss stock image from {near_miss.image_ref.source} ({reason}, "
+                f"composite {self.acceptance_policy.composite(near_miss.scores):.2f})"
+            )
+            return ImageResult(
+                url=near_miss.image_ref.full_url,
+                source=f"stock_{near_miss.image_ref.source}",
+                keywords=keywords
+            )
+
+        # Return best matching stock image
+        best_image = suitable_images[0]
+        print(f"Selected stock image from {best_image.image_ref.source}")
+        print(f"  Quality: {best_image.scores.quality_score:.2f}")
+        print(f"  Presentation fit: {best_image.scores.presentation_score}")
+        print(f"  URL: {best_image.image_ref.full_url}")
+
+        return ImageResult(
+            url=best_image.image_ref.full_url,
+            source=f"stock_{best_image.image_ref.source}",
+            keywords=keywords
+        )
+
+    def _should_speculate(self, slide: SlideInput, keywords: str) -> bool:
+        """
+        Decide whether to generate in parallel with the stock search.
+
+        Speculation starts when the learned stock hit probability for the slide's
+        keywords and style is below SPECULATIVE_MISS_THRESHOLD and the hourly cap
+        of speculative generations (SPECULATIVE_MAX_PER_HOUR) is not used up.
+        """
+        if not config.speculative_generation:
+            return False
+
+        hit_probability, observed = self.stock_hit_rate.predict(keywords, slide.style)
+        if observed == 0 or hit_probability >= config.speculative_miss_threshold:
+            return False
+
+        now = time.monotonic()
+        while self._speculative_starts and now - self._speculative_starts[0] > 3600:
+            self._speculative_starts.popleft()
+        if len(self._speculative_starts) >= config.speculative_max_per_hour:
+            print("Speculative generation cap reached, searching stock first")
+            return False
+
+        self._speculative_starts.append(now)
+        print(f"Stock hit probability {hit_probability:.2f}, generating speculatively")
+        return True
+
+    async def _race_stock_and_generation(self, slide: SlideInput, keywords: str) -> ImageResult:
+        """
+        Run stock search and AI generation concurrently; the first qualifying image wins.
+
+        A suitable stock image cancels the generation. A successful generation
+        is returned right away while the stock search finishes in the
+        background, so its hit/miss outcome still feeds the stock hit rate. If
+        one path fails (or raises), the other one is awaited.
+        """
+        stock_task = asyncio.create_task(self._find_stock_image(slide, keywords))
+        generation_task = asyncio.create_task(self._generate_ai_image(slide, keywords))
+        try:
+            done, _ = await asyncio.wait(
+                {stock_task, generation_task}, return_when=asyncio.FIRST_COMPLETED
+            )
+
+            if stock_task in done:
+                stock_result = self._stock_outcome(stock_task)
+                if stock_result:
+                    print("Stock image found first, cancelling speculative generation")
+                    event("race_won", winner="stock")
+                    return stock_result
+                return await generation_task
+
+            try:
+                generated = generation_task.result()
+            except Exception as exc:
+                generated = self._generation_failed(keywords, f"Speculative generation failed: {exc}")
+            if generated.source != "failed":
+                print("Speculative generation finished first, stock search continues in the background")
+                event("race_won", winner="generation")
+                self._finish_in_background(stock_task)
+                return generated
+            await asyncio.wait({stock_task})
+            return self._stock_outcome(stock_task) or generated
+        finally:
+            for task in (stock_task, generation_task):
+                if not task.done() and task not in self._background_tasks:
+                    task.cancel()
+
+    @staticmethod
+    def _stock_outcome(task: asyncio.Task) -> Optional[ImageResult]:
+        """Result of a finished stock search task; a failed search counts as no result."""
+        try:
+            return task.result()
+        except Exception as exc:
+            print(f"Stock search failed: {exc}")
+            return None
+
+    def _finish_in_background(self, task: asyncio.Task) -> None:
+        """Keep a stock search running after its request returned (it records the hit rate)."""
+        self._background_tasks.add(task)
+
+        def finished(done: asyncio.Task) -> None:
+            self._background_tasks.discard(done)
+            if not done.cancelled() and done.exception() is not None:
+                print(f"Background stock search failed: {done.exception()}")
+
+        task.add_done_callback(finished)
 
     async def _generate_ai_image(self, slide: SlideInput, keywords: str) -> ImageResult:
         """
@@ -162,70 +381,56 @@ class ImageOrchestrator:
         if slide.colors:
             print(f"  Colors: primary={slide.colors.primary}, secondary={slide.colors.secondary}")
 
-        image_url = await self.image_generator.generate_from_keywords(
-            keywords=keywords,
-            model=ai_model,
-            style=slide.style,
-            colors=slide.colors,
-            slide=slide
-        )
+        if config.hedged_generation:
+            return await self._generate_hedged(slide, keywords, ai_model)
 
-        base_url = config.public_base_url.rstrip("/") if getattr(config, "public_base_url", None) else "http://localhost:8080"
+        # Build the prompt once; the safety retry below reuses it
+        try:
+            with get_budget().stage("prompt"):
+                final_prompt = await self.image_generator.build_final_prompt(
+                    keywords, slide.style, slide.colors, slide
+                )
+        except Exception as exc:
+            return self._generation_failed(keywords, f"Prompt generation failed: {exc}")
+
+        with get_budget().stage("generate"):
+            generation = await self.image_generator.generate_from_keywords(
+                keywords=keywords,
+                model=ai_model,
+                style=slide.style,
+                colors=slide.colors,
+                slide=slide,
+                final_prompt=final_prompt,
+                deck_id=slide.deck_id,
+                force_fresh=slide.force_fresh
+            )
+        self._trace_generation(generation)
 
-        if image_url:
-            # If OpenRouter returned a data URL, store it and serve via /generated/{id}
-            served_url = image_url
-            if image_url.startswith("data:"):
-                try:
-                    image_id = generated_cache.store_data_url(image_url)
-                    path = f"/generated/{image_id}"
-                    served_url = f"{base_url}{path}"
-                except Exception as exc:
-                    print(f"Failed to cache data URL: {exc}")
-            elif ai_model == "flux" and image_url.startswith("http"):
-                # Download Flux image and serve via generated cache
-                try:
-                    async with httpx.AsyncClient(timeout=30.0) as client:
-                        resp = await client.get(image_url)
-                        resp.raise_for_status()
-                        media_type = resp.headers.get("content-type", "application/octet-stream")
-                        image_id = generated_cache.store_bytes(resp.content, media_type)
-                        path = f"/generated/{image_id}"
-                        served_url = f"{base_url}{path}"
-                except Exception as exc:
-                    print(f"Failed to download/cache Flux image: {exc}")
+        image = generation.image
+        if image:
+            served_url = await self._store_generated(image, ai_model)
 
             # Nudity check for generated images (skip on errors/quotas)
-            nudity_score = None
-            try:
-                nudity_data = await self.image_scorer.check_nudity(served_url)
-                nudity_score = self.image_scorer.extract_nudity_safe_score(nudity_data)
-                print(f"Nudity score for generated image: {nudity_score}")
-            except Exception as exc:
-                print(f"Nudity check skipped/failed: {exc}")
+            nudity_score = await self._check_generated_safety(image, served_url)
 
             # If unsafe, regenerate once with google_banana regardless of selected model
             if nudity_score is not None and nudity_score < config.min_nudity_safe_score:
+                self._forget_unsafe(image)
                 print("Generated image not safe enough, regenerating with google_banana")
-                retry_url = await self.image_generator.generate_from_keywords(
+                event("safety_retry", model=ai_model, nudity_score=nudity_score)
+                retry = await self.image_generator.generate_from_keywords(
                     keywords=keywords,
                     model="google_banana",
                     style=slide.style,
                     colors=slide.colors,
-                    slide=slide
+                    slide=slide,
+                    final_prompt=final_prompt,
+                    deck_id=slide.deck_id,
+                    force_fresh=True
                 )
-                if retry_url:
-                    served_url = retry_url
-                    if retry_url.startswith("data:"):
-                        try:
-                            image_id = generated_cache.store_data_url(retry_url)
-                            path = f"/generated/{image_id}"
-                            served_url = f"{base_url}{path}"
-                        except Exception as exc:
-                            print(f"Failed to cache retry data URL: {exc}")
-                    else:
-                        # No download/cache for google_banana; return as is
-                        served_url = retry_url
+                self._trace_generation(retry)
+                if retry.image:
+                    served_url = await self._store_generated(retry.image, "google_banana")
                     print(f"Regenerated image with google_banana: {served_url}")
                     source = "generated_google_banana"
                     return ImageResult(
@@ -235,7 +440,7 @@ class ImageOrchestrator:
                         error=None
                     )
                 else:
-                    print("Retry generation with google_banana failed")
+                    print(f"Retry generation with google_banana failed: {retry.error}")
 
             print(f"Generated image: {served_url}")
             source = f"generated_{ai_model}"
@@ -246,17 +451,202 @@ class ImageOrchestrator:
                 error=None
             )
         else:
-            error_detail = self.image_generator.last_error or "Image generation failed"
-            print(f"Image generation failed: {error_detail}")
-            error_url = "/static/error.png"
-            if getattr(config, "public_base_url", None):
-                error_url = f"{config.public_base_url.rstrip('/')}{error_url}"
-            return ImageResult(
-                url=error_url,
-                source="failed",
+            return self._generation_failed(keywords, generation.error or "Image generation failed")
+
+    @staticmethod
+    def _trace_generation(generation: GenerationResult) -> None:
+        """Record a generation outcome in the request's trace."""
+        event(
+            "generation",
+            model=generation.model,
+            provider=generation.provider,
+            reused=generation.reused or None,
+            error=generation.error,
+            **{f"{name}_s": round(seconds, 3) for name, seconds in generation.timings.items()},
+        )
+
+    def _generation_failed(self, keywords: str, error_detail: str) -> ImageResult:
+        """Result pointing at the error image."""
+        print(f"Image generation failed: {error_detail}")
+        error_url = "/static/error.png"
+        if getattr(config, "public_base_url", None):
+            error_url = f"{config.public_base_url.rstrip('/')}{error_url}"
+        return ImageResult(
+            url=error_url,
+            source="failed",
+            keywords=keywords,
+            error=error_detail
+        )
+
+    async def _store_generated(self, image: ImagePayload, ai_model: str) -> str:
+        """
+        Make sure a generated image is stored and return the URL to serve.
+
+        Byte payloads are already stored by the generator; FLUX delivery URLs are
+        downloaded because they expire, and recorded in the generation reuse
+        index. Other URLs are returned unchanged.
+        """
+        base_url = config.public_base_url.rstrip("/") if getattr(config, "public_base_url", None) else "http://localhost:8080"
+
+        if image.image_id is None and image.data is not None:
+            image.image_id = generated_cache.store_bytes(image.data, image.media_type)
+        elif image.image_id is None and ai_model == "flux" and (image.url or "").startswith("http"):
+            # Download Flux image and serve via generated cache
+            try:
+                async with httpx.AsyncClient(timeout=30.0) as client:
+                    resp = await upstream_request("flux", client.get(image.url))
+                    resp.raise_for_status()
+                    image.media_type = resp.headers.get("content-type", "application/octet-stream")
+                    image.data = resp.content
+                    image.image_id = generated_cache.store_bytes(image.data, image.media_type)
+                    if image.reuse_key is not None:
+                        generated_cache.record_generation(image.reuse_key, image.image_id)
+            except Exception as exc:
+                print(f"Failed to download/cache Flux image: {exc}")
+
+        if image.image_id:
+            return f"{base_url}/generated/{image.image_id}"
+        return image.url or ""
+
+    def _forget_unsafe(self, image: ImagePayload) -> None:
+        """Keep an image that failed the safety check out of the reuse index."""
+        if image.image_id:
+            generated_cache.forget_generation(image.image_id)
+
+    async def _check_generated_safety(self, image: ImagePayload, served_url: str) -> Optional[float]:
+        """
+        Nudity safe score of a generated image, or None if the check failed.
+
+        Images we hold as bytes are checked in memory (classifier hook or upload)
+        instead of having the checker fetch our own public URL.
+        """
+        image_data = None
+        if image.data is None and image.image_id:
+            cached = generated_cache.get_image(image.image_id)
+            if cached:
+                image.data, image.media_type = cached.data, cached.media_type
+        if image.data is not None:
+            image_data = FetchedImage(image.data, image.media_type)
+        try:
+            with get_budget().stage("safety"):
+                nudity_data = await self.image_scorer.check_nudity(
+                    served_url, image_data, sightengine_upload=True
+                )
+            nudity_score = self.image_scorer.extract_nudity_safe_score(nudity_data)
+            print(f"Nudity score for generated image: {nudity_score}")
+            return nudity_score
+        except Exception as exc:
+            print(f"Nudity check skipped/failed: {exc}")
+            return None
+
+    def _hedge_providers(self, primary: str) -> list[str]:
+        """Providers raced in hedged mode: the requested one first, then configured alternates."""
+        available = {
+            "google_banana": bool(config.google_ai_studio_api_key),
+            "banana": bool(config.openrouter_api_key),
+            "imagen": bool(config.openrouter_api_key),
+            "flux": bool(config.flux_api_key),
+        }
+        providers = [primary]
+        for name in config.hedge_providers.split(","):
+            name = name.strip()
+            if name and name not in providers and available.get(name):
+                providers.append(name)
+        return providers
+
+    def _hedge_delay(self, model: str) -> float:
+        """Seconds to wait on a provider before starting the next one."""
+        observed = latency_tracker.percentile(f"generate:{model}", config.hedge_percentile)
+        delay = observed if observed is not None else config.hedge_default_delay
+        return max(config.hedge_min_delay, delay)
+
+    async def _generate_hedged(self, slide: SlideInput, keywords: str, primary: str) -> ImageResult:
+        """
+        Race generation providers and keep the first image that passes the safety check.
+
+        The next provider starts when the current ones have not returned within the
+        provider's latency percentile (HEDGE_PERCENTILE), or immediately when one
+        fails. At most HEDGE_MAX_PARALLEL providers run at once; the rest are
+        cancelled as soon as a safe image is available. The ``generate`` stage
+        covers the whole race (until the first safe image or the last failure).
+        """
+        try:
+            with get_budget().stage("prompt"):
+                final_prompt = await self.image_generator.build_final_prompt(
+                    keywords, slide.style, slide.colors, slide
+                )
+        except Exception as exc:
+            return self._generation_failed(keywords, f"Prompt generation failed: {exc}")
+        providers = self._hedge_providers(primary)
+        errors: list[str] = []
+
+        async def attempt(model: str) -> Optional[str]:
+            generation = await self.image_generator.generate_from_keywords(
                 keywords=keywords,
-                error=error_detail
+                model=model,
+                slide=slide,
+                final_prompt=final_prompt,
+                deck_id=slide.deck_id,
+                force_fresh=slide.force_fresh
             )
+            self._trace_generation(generation)
+            image = generation.image
+            if not image:
+                errors.append(f"{model}: {generation.error or 'no result'}")
+                return None
+            served_url = await self._store_generated(image, model)
+            nudity_score = await self._check_generated_safety(image, served_url)
+            if nudity_score is not None and nudity_score < config.min_nudity_safe_score:
+                self._forget_unsafe(image)
+                errors.append(f"{model}: image failed safety check ({nudity_score:.3f})")
+                return None
+            return served_url
+
+        pending: dict[asyncio.Task, str] = {}
+        queue = list(providers)
+        last_launch: dict[str, Any] = {}
+
+        def launch() -> None:
+            model = queue.pop(0)
+            print(f"[Hedge] starting {model}")
+            event("hedge_launch", model=model)
+            pending[asyncio.create_task(attempt(model))] = model
+            last_launch.update(model=model, at=time.monotonic())
+
+        try:
+            with get_budget().stage("generate"):
+                launch()
+                while pending:
+                    timeout = None
+                    if queue and len(pending) < config.hedge_max_parallel:
+                        hedge_at = last_launch["at"] + self._hedge_delay(last_launch["model"])
+                        timeout = max(0.0, hedge_at - time.monotonic())
+                    done, _ = await asyncio.wait(
+                        set(pending), timeout=timeout, return_when=asyncio.FIRST_COMPLETED
+                    )
+                    if not done:
+                        launch()
+                        continue
+                    for task in done:
+                        model = pending.pop(task)
+                        served_url = None if task.exception() else task.result()
+                        if task.exception():
+                            errors.append(f"{model}: {task.exception()}")
+                        if served_url:
+                            print(f"[Hedge] {model} won: {served_url}")
+                            return ImageResult(
+                                url=served_url,
+                                source=f"generated_{model}",
+                                keywords=keywords,
+                                error=None
+                            )
+                    if queue and len(pending) < config.hedge_max_parallel:
+                        launch()
+        finally:
+            for task in pending:
+                task.cancel()
+
+        return self._generation_failed(keywords, "; ".join(errors) or "Image generation failed")
 
     async def _ensure_english(self, slide: SlideInput) -> SlideInput:
         """
@@ -273,18 +663,29 @@ class ImageOrchestrator:
             if self._is_probably_english(all_text):
                 return slide
 
-            def translate_text(text: str) -> str:
-                chain = self.translation_prompt | self.translator_llm | StrOutputParser()
-                return chain.invoke({"text": text}).strip()
+            budget = get_budget()
+            if not budget.can_afford("translate", "keywords", "search", "score"):
+                budget.degrade("skipped_translation")
+                return slide
 
-            new_title = translate_text(slide.title) if slide.title else None
-            new_bullets = []
-            if slide.bullets:
-                for bullet in slide.bullets:
-                    txt = bullet.get("bullet")
-                    if txt:
+            async def translate_text(text: str) -> str:
+                chain = self.translation_prompt | self.translator_llm | StrOutputParser()
+                with upstream_call("openrouter"):
+                    return (await chain.ainvoke({"text": text})).strip()
+
+            # Title and bullets are translated concurrently
+            with budget.stage("translate"):
+                bullets = slide.bullets or []
+                translations = await asyncio.gather(
+                    *(translate_text(text) for text in [slide.title or ""] + [b.get("bullet") or "" for b in bullets] if text)
+                )
+                translated_texts = iter(translations)
+                new_title = next(translated_texts) if slide.title else None
+                new_bullets = []
+                for bullet in bullets:
+                    if bullet.get("bullet"):
                         bullet = bullet.copy()
-                        bullet["bullet"] = translate_text(txt)
+                        bullet["bullet"] = next(translated_texts)
                     new_bullets.append(bullet)
 
             slide_dict = slide.model_dump()
@@ -0,0 +1,38 @@
+"""Perceptual hashing (dHash) for near-duplicate image detection."""
+from __future__ import annotations
+
+import io
+
+import numpy as np
+from PIL import Image
+
+HASH_SIZE = 8
+
+
+def dhash(data: bytes, hash_size: int = HASH_SIZE) -> int:
+    """
+    Compute a difference hash of an encoded image.
+
+    The image is reduced to a (hash_size + 1) x hash_size grayscale grid and each
+    bit records whether a pixel is brighter than its right neighbour. Resizing,
+    recompression and small crops change only a few bits.
+
+    Args:
+        data: Encoded image bytes (a thumbnail is enough)
+        hash_size: Grid size; the hash has hash_size ** 2 bits
+
+    Returns:
+        Hash as an integer
+    """
+    with Image.open(io.BytesIO(data)) as img:
+        img.draft("L", (hash_size * 4, hash_size * 4))
+        grid = img.convert("L").resize((hash_size + 1, hash_size), Image.LANCZOS)
+
+    pixels = np.asarray(grid, dtype=np.int16)
+    bits = (pixels[:, 1:] > pixels[:, :-1]).ravel()
+    return int("".join("1" if bit else "0" for bit in bits), 2)
+
+
+def hamming_distance(a: int, b: int) -> int:
+    """Number of differing bits between two hashes."""
+    return bin(a ^ b).count("1")
@@ -0,0 +1,233 @@
+"""Deck prefetch: process slides in the background before they are viewed."""
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import logging
+import time
+from collections import deque
+from typing import TYPE_CHECKING, Optional
+
+from .config import config
+from .generation_scheduler import BACKGROUND, INTERACTIVE, PriorityTicket, generation_scheduler
+from .models import ImageResult, RequestTimings, SlideInput
+from .ttl_cache import TTLCache
+
+if TYPE_CHECKING:
+    from .orchestrator import ImageOrchestrator
+
+logger = logging.getLogger(__name__)
+
+
+def slide_key(slide: SlideInput) -> str:
+    """Cache key of a slide: everything that influences the result, not how it is requested."""
+    content = slide.model_dump(exclude={"deck_id", "force_fresh", "priority", "latency_budget_ms"})
+    return hashlib.sha256(json.dumps(content, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+class _DeckState:
+    """Running prefetch work and budget usage of one deck."""
+
+    def __init__(self, concurrency: int):
+        self.semaphore = asyncio.Semaphore(max(1, concurrency))
+        self.tasks: dict[str, asyncio.Task] = {}
+        self.accepted = 0
+        self.completed = 0
+        self.failed = 0
+        self.updated_at = time.monotonic()
+
+
+class DeckPrefetcher:
+    """
+    Warms a result cache for the slides of a deck.
+
+    Prefetched slides run through ``ImageOrchestrator.process_slide`` with
+    background priority, at most ``PREFETCH_CONCURRENCY`` at a time per deck,
+    at most ``PREFETCH_MAX_SLIDES_PER_DECK`` slides per deck and at most
+    ``PREFETCH_MAX_SLIDES_PER_HOUR`` slides over all decks (so new deck IDs
+    do not bring new budget). Interactive requests for the same slide content
+    get the cached result or join the running prefetch, raising it to
+    interactive priority; a prefetch still queued behind the deck's
+    concurrency limit is cancelled and the slide processed interactively.
+    """
+
+    def __init__(self, orchestrator: "ImageOrchestrator"):
+        """
+        Initialize the prefetcher.
+
+        Args:
+            orchestrator: Orchestrator that processes the slides
+        """
+        self.orchestrator = orchestrator
+        self.results: TTLCache[ImageResult] = TTLCache(
+            max_entries=config.prefetch_max_results,
+            ttl=config.prefetch_result_ttl,
+        )
+        self._decks: dict[str, _DeckState] = {}
+        self._in_flight: dict[str, asyncio.Task] = {}
+        self._tickets: dict[str, PriorityTicket] = {}
+        # Keys of prefetches that hold their deck's semaphore (no longer queued)
+        self._started: set[str] = set()
+        # Acceptance times of prefetched slides within the last hour (all decks)
+        self._accepted_at: deque[float] = deque()
+
+    def prefetch(self, deck_id: str, slides: list[SlideInput]) -> dict:
+        """
+        Enqueue background processing for a deck's slides.
+
+        Args:
+            deck_id: Deck identifier (budget and cancellation scope)
+            slides: Slides expected to be viewed soon
+
+        Returns:
+            Counts of accepted, already cached/running and over-budget slides
+        """
+        self._prune()
+        now = time.monotonic()
+        while self._accepted_at and now - self._accepted_at[0] > 3600:
+            self._accepted_at.popleft()
+        state = self._decks.get(deck_id)
+        if state is None:
+            state = _DeckState(config.prefetch_concurrency)
+            self._decks[deck_id] = state
+        state.updated_at = time.monotonic()
+
+        accepted = cached = over_budget = 0
+        for slide in slides:
+            key = slide_key(slide)
+            if key in self.results or key in self._in_flight:
+                cached += 1
+                continue
+            if (
+                state.accepted >= config.prefetch_max_slides_per_deck
+                or len(self._accepted_at) >= config.prefetch_max_slides_per_hour
+            ):
+                over_budget += 1
+                continue
+            background = slide.model_copy(update={"deck_id": slide.deck_id or deck_id, "priority": "background"})
+            ticket = PriorityTicket(BACKGROUND)
+            task = asyncio.create_task(self._run(state, key, background, ticket))
+            state.tasks[key] = task
+            self._in_flight[key] = task
+            self._tickets[key] = ticket
+            self._accepted_at.append(now)
+            state.accepted += 1
+            accepted += 1
+
+        if over_budget:
+            logger.info("Prefetch budget of deck %s exhausted, skipped %d slides", deck_id, over_budget)
+        return {"deck_id": deck_id, "accepted": accepted, "cached": cached, "over_budget": over_budget}
+
+    async def _run(
+        self, state: _DeckState, key: str, slide: SlideInput, ticket: PriorityTicket
+    ) -> Optional[ImageResult]:
+        try:
+            async with state.semaphore:
+                self._started.add(key)
+                result = await self.orchestrator.process_slide(slide, ticket)
+            if result.source != "failed" and not result.error:
+                self.results.set(key, result)
+                state.completed += 1
+            else:
+                state.failed += 1
+            return result
+        except asyncio.CancelledError:
+            raise
+        except Exception as exc:
+            state.failed += 1
+            print(f"Prefetch failed for slide {slide.title!r}: {exc}")
+            return None
+        finally:
+            state.tasks.pop(key, None)
+            self._in_flight.pop(key, None)
+            self._tickets.pop(key, None)
+            self._started.discard(key)
+            state.updated_at = time.monotonic()
+
+    def cancel(self, deck_id: str) -> int:
+        """
+        Cancel a deck's pending prefetch work.
+
+        The deck keeps its budget usage (cancelled slides still count) until it
+        has been idle for PREFETCH_RESULT_TTL.
+
+        Returns:
+            Number of cancelled slides
+        """
+        state = self._decks.get(deck_id)
+        if state is None:
+            return 0
+        state.updated_at = time.monotonic()
+        tasks = list(state.tasks.values())
+        for task in tasks:
+            task.cancel()
+        return len(tasks)
+
+    def status(self, deck_id: str) -> Optional[dict]:
+        """Progress of a deck's prefetch, or None if the deck is unknown."""
+        state = self._decks.get(deck_id)
+        if state is None:
+            return None
+        return {
+            "deck_id": deck_id,
+            "accepted": state.accepted,
+            "pending": len(state.tasks),
+            "completed": state.completed,
+            "failed": state.failed,
+            "budget": config.prefetch_max_slides_per_deck,
+        }
+
+    async def process_slide(self, slide: SlideInput) -> ImageResult:
+        """
+        Serve a slide from the prefetch cache, falling back to the orchestrator.
+
+        Served prefetch results carry this request's timings (a single
+        ``prefetch`` stage: the lookup or the wait for the running prefetch).
+
+        Args:
+            slide: Slide input data
+
+        Returns:
+            Image result
+        """
+        if not slide.force_fresh:
+            started_at = time.monotonic()
+            key = slide_key(slide)
+            result = self.results.get(key)
+            if result is not None:
+                print(f"Serving prefetched result for slide: {slide.title}")
+                return self._served(result, started_at)
+            task = self._in_flight.get(key)
+            if task is not None and key not in self._started and slide.priority != "background":
+                # Still queued behind the deck's earlier prefetches: the viewer should not wait for those
+                print(f"Cancelling queued prefetch, processing interactively: {slide.title}")
+                task.cancel()
+            elif task is not None:
+                print(f"Joining running prefetch for slide: {slide.title}")
+                ticket = self._tickets.get(key)
+                if ticket is not None and slide.priority != "background":
+                    # The viewer is waiting now: queued generations move ahead of background work
+                    generation_scheduler.promote(ticket, INTERACTIVE)
+                try:
+                    # Shielded so a disconnecting viewer does not cancel the prefetch
+                    result = await asyncio.shield(task)
+                except asyncio.CancelledError:
+                    if not task.cancelled():
+                        raise
+                    result = None
+                if result is not None and result.source != "failed" and not result.error:
+                    return self._served(result, started_at)
+        return await self.orchestrator.process_slide(slide)
+
+    @staticmethod
+    def _served(result: ImageResult, started_at: float) -> ImageResult:
+        """Copy of a prefetched result with the timings of the serving request."""
+        waited = time.monotonic() - started_at
+        return result.model_copy(update={"timings": RequestTimings(total=waited, stages={"prefetch": waited})})
+
+    def _prune(self) -> None:
+        """Forget idle decks whose prefetched results have expired."""
+        cutoff = time.monotonic() - config.prefetch_result_ttl
+        for deck_id in [d for d, s in self._decks.items() if not s.tasks and s.updated_at < cutoff]:
+            del self._decks[deck_id]
@@ -0,0 +1,240 @@
+"""Event-loop lag monitoring and opt-in per-request profiling."""
+from __future__ import annotations
+
+import asyncio
+import cProfile
+import io
+import logging
+import marshal
+import pstats
+import re
+import time
+import uuid
+from collections import deque
+from typing import Any, Awaitable, Optional, TypeVar
+
+from .config import config
+from .metrics import metrics
+
+T = TypeVar("T")
+
+# Functions listed per sort order in a profile report
+TOP_FUNCTIONS = 30
+# Stalls remembered by the lag monitor (enough to cover a long profiled request)
+MAX_STALLS = 2000
+
+# asyncio's debug-mode message for callbacks slower than slow_callback_duration
+_SLOW_CALLBACK = re.compile(r"Executing (?P<handle>.+) took (?P<seconds>[0-9.]+) seconds")
+
+metrics.describe(
+    "imagegen_event_loop_lag_seconds", "histogram",
+    "Delay of the lag monitor's wakeups (time the event loop was blocked)"
+)
+
+
+class LoopLagMonitor:
+    """
+    Measures how late the event loop wakes up a periodic sleeper.
+
+    Every LOOP_LAG_INTERVAL_MS the monitor sleeps and records by how much the
+    wakeup overshot; overshoots above LOOP_STALL_THRESHOLD_MS are remembered as
+    stalls (something ran on the loop without yielding).
+    """
+
+    def __init__(self, interval_ms: Optional[int] = None, stall_threshold_ms: Optional[int] = None):
+        """
+        Initialize the monitor.
+
+        Args:
+            interval_ms: Sleep interval (defaults to LOOP_LAG_INTERVAL_MS; 0 disables the monitor)
+            stall_threshold_ms: Lag recorded as a stall (defaults to LOOP_STALL_THRESHOLD_MS)
+        """
+        self.interval = (interval_ms if interval_ms is not None else config.loop_lag_interval_ms) / 1000.0
+        self.stall_threshold = (
+            stall_threshold_ms if stall_threshold_ms is not None else config.loop_stall_threshold_ms
+        ) / 1000.0
+        self.stalls: deque[tuple[float, float]] = deque(maxlen=MAX_STALLS)  # (monotonic end, lag)
+        self.max_lag = 0.0
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        """Start monitoring on the running loop (no-op when disabled or running)."""
+        if self.interval <= 0 or (self._task is not None and not self._task.done()):
+            return
+        self._task = asyncio.get_running_loop().create_task(self._run(), name="loop-lag-monitor")
+
+    async def stop(self) -> None:
+        """Stop monitoring."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            started_at = time.monotonic()
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            lag = max(0.0, now - started_at - self.interval)
+            metrics.observe("imagegen_event_loop_lag_seconds", lag)
+            self.max_lag = max(self.max_lag, lag)
+            if lag >= self.stall_threshold:
+                self.stalls.append((now, lag))
+
+    def stalls_between(self, start: float, end: float) -> list[tuple[float, float]]:
+        """Stalls that ended within a monotonic time window."""
+        return [(at, lag) for at, lag in self.stalls if start <= at <= end]
+
+
+class _SlowCallbackCollector(logging.Handler):
+    """Collects asyncio's slow-callback warnings while a profile runs."""
+
+    def __init__(self):
+        super().__init__(level=logging.WARNING)
+        self.callbacks: list[dict] = []
+
+    def emit(self, record: logging.LogRecord) -> None:
+        match = _SLOW_CALLBACK.search(record.getMessage())
+        if match:
+            self.callbacks.append({
+                "callback": match.group("handle")[:300],
+                "seconds": float(match.group("seconds")),
+            })
+
+
+class RequestProfiler:
+    """
+    Runs single requests under cProfile and stores the reports.
+
+    cProfile sees the whole event loop thread, so work of concurrent requests
+    appears in the profile too; only one request is profiled at a time. While
+    a profile runs, asyncio debug mode reports callbacks that blocked the loop
+    for longer than LOOP_STALL_THRESHOLD_MS, and the lag monitor's stalls in
+    the window are attached.
+    """
+
+    def __init__(self, monitor: LoopLagMonitor, max_profiles: Optional[int] = None):
+        """
+        Initialize the profiler.
+
+        Args:
+            monitor: Lag monitor whose stalls are attached to reports
+            max_profiles: Reports kept (defaults to PROFILE_MAX_STORED)
+        """
+        self.monitor = monitor
+        self._profiles: deque[dict] = deque(maxlen=max(1, max_profiles or config.profile_max_stored))
+        self._active = False
+
+    async def run(self, work: Awaitable[T], label: str) -> tuple[T, Optional[str]]:
+        """
+        Await work under the profiler.
+
+        Args:
+            work: Coroutine to profile
+            label: Description stored with the report (e.g. the request path)
+
+        Returns:
+            Tuple of (result of the work, profile ID or None if another profile was running)
+        """
+        if self._active:
+            return await work, None
+
+        self._active = True
+        profile_id = uuid.uuid4().hex[:16]
+        loop = asyncio.get_running_loop()
+        previous_debug, previous_slow = loop.get_debug(), loop.slow_callback_duration
+        collector = _SlowCallbackCollector()
+        asyncio_logger = logging.getLogger("asyncio")
+        asyncio_logger.addHandler(collector)
+        loop.slow_callback_duration = self.monitor.stall_threshold
+        loop.set_debug(True)
+
+        profiler = cProfile.Profile()
+        status = "ok"
+        started_at, cpu_started_at = time.monotonic(), time.process_time()
+        profiler.enable()
+        try:
+            return await work, profile_id
+        except BaseException as exc:
+            status = "cancelled" if isinstance(exc, asyncio.CancelledError) else f"error: {exc}"
+            raise
+        finally:
+            profiler.disable()
+            finished_at = time.monotonic()
+            loop.set_debug(previous_debug)
+            loop.slow_callback_duration = previous_slow
+            asyncio_logger.removeHandler(collector)
+            self._store(profile_id, profiler, label, status, started_at, finished_at,
+                        time.process_time() - cpu_started_at, collector.callbacks)
+            self._active = False
+
+    def _store(
+        self,
+        profile_id: str,
+        profiler: cProfile.Profile,
+        label: str,
+        status: str,
+        started_at: float,
+        finished_at: float,
+        cpu_seconds: float,
+        slow_callbacks: list[dict],
+    ) -> None:
+        profiler.create_stats()
+        stalls = self.monitor.stalls_between(started_at, finished_at)
+        self._profiles.append({
+            "profile_id": profile_id,
+            "label": label,
+            "status": status,
+            "created_at": time.time(),
+            "wall_seconds": round(finished_at - started_at, 4),
+            "cpu_seconds": round(cpu_seconds, 4),
+            "event_loop": {
+                "stall_threshold_ms": round(self.monitor.stall_threshold * 1000),
+                "stalls": len(stalls),
+                "blocked_seconds": round(sum(lag for _, lag in stalls), 4),
+                "max_stall_seconds": round(max((lag for _, lag in stalls), default=0.0), 4),
+                "slow_callbacks": sorted(slow_callbacks, key=lambda c: c["seconds"], reverse=True)[:TOP_FUNCTIONS],
+            },
+            "top_cumulative": _top_functions(profiler, "cumulative"),
+            "top_self": _top_functions(profiler, "tottime"),
+            "_pstats": marshal.dumps(profiler.stats),
+        })
+
+    def list(self) -> list[dict]:
+        """Summaries of the stored profiles, newest first."""
+        return [
+            {key: value for key, value in report.items() if key not in ("top_cumulative", "top_self", "_pstats")}
+            for report in reversed(self._profiles)
+        ]
+
+    def get(self, profile_id: str) -> Optional[dict]:
+        """A stored report (including the raw pstats data under ``_pstats``)."""
+        for report in self._profiles:
+            if report["profile_id"] == profile_id:
+                return report
+        return None
+
+
+def _top_functions(profiler: cProfile.Profile, sort: str) -> list[dict[str, Any]]:
+    """Most expensive functions of a profile by the given pstats sort key."""
+    stats = pstats.Stats(profiler, stream=io.StringIO())
+    stats.sort_stats(sort)
+    rows = []
+    for func in stats.fcn_list[:TOP_FUNCTIONS]:
+        _, calls, self_seconds, cumulative_seconds, _ = stats.stats[func]
+        filename, line, name = func
+        rows.append({
+            "function": f"{filename}:{line}({name})",
+            "calls": calls,
+            "self_seconds": round(self_seconds, 5),
+            "cumulative_seconds": round(cumulative_seconds, 5),
+        })
+    return rows
+
+
+# Process-wide monitor (started with the app) and profiler
+loop_monitor = LoopLagMonitor()
+request_profiler = RequestProfiler(loop_monitor)
@@ -2,6 +2,9 @@
 
 from typing import TypedDict
 
+# Bump when any prompt below changes so cached generation prompts are not reused
+PROMPT_VERSION = "1"
+
 
 class ScenarioConfig(TypedDict):
     """Configuration for a single scenario (e.g., flat_illustration, fine_line, photorealistic).
@@ -0,0 +1,97 @@
+"""Per-request latency budget shared by all pipeline stages."""
+from __future__ import annotations
+
+import contextvars
+import time
+from contextlib import contextmanager
+from typing import Iterator, Optional
+
+from .flight_recorder import event
+from .latency_stats import latency_tracker
+from .request_timing import record_stage
+
+# Fallback stage durations (seconds) until enough observations exist
+DEFAULT_STAGE_ESTIMATES = {
+    "translate": 2.0,
+    "keywords": 4.0,
+    "search": 3.0,
+    "score": 6.0,
+    "generate": 30.0,
+}
+# Percentile of observed stage durations used as the estimate
+ESTIMATE_PERCENTILE = 90
+
+
+class RequestBudget:
+    """
+    Deadline of one request plus the degradations applied to meet it.
+
+    Stages are timed with ``with budget.stage("search"): ...``; the durations
+    feed the latency tracker, whose percentiles are the estimates used by
+    ``can_afford``. A budget without a deadline affords everything.
+    """
+
+    def __init__(self, seconds: Optional[float] = None):
+        """
+        Initialize the budget.
+
+        Args:
+            seconds: Time allowed for the request (None = unlimited)
+        """
+        self.started_at = time.monotonic()
+        self.deadline = self.started_at + seconds if seconds else None
+        self.degradations: list[str] = []
+
+    @classmethod
+    def from_ms(cls, milliseconds: Optional[int]) -> "RequestBudget":
+        """Budget from a millisecond value; None or non-positive means unlimited."""
+        return cls(milliseconds / 1000.0 if milliseconds and milliseconds > 0 else None)
+
+    def remaining(self) -> Optional[float]:
+        """Seconds left, or None without a deadline."""
+        if self.deadline is None:
+            return None
+        return max(0.0, self.deadline - time.monotonic())
+
+    @staticmethod
+    def estimate(stage: str) -> float:
+        """Expected duration of a stage in seconds."""
+        observed = latency_tracker.percentile(f"stage:{stage}", ESTIMATE_PERCENTILE)
+        return observed if observed is not None else DEFAULT_STAGE_ESTIMATES.get(stage, 1.0)
+
+    def can_afford(self, *stages: str) -> bool:
+        """Whether the remaining time covers the estimated duration of all given stages."""
+        remaining = self.remaining()
+        if remaining is None:
+            return True
+        return remaining >= sum(self.estimate(stage) for stage in stages)
+
+    def degrade(self, name: str) -> None:
+        """Record a degradation applied to stay within the budget."""
+        if name not in self.degradations:
+            self.degradations.append(name)
+            event("degraded", degradation=name, remaining_s=self.remaining())
+            print(f"[budget] {name} ({self.remaining():.1f}s left)" if self.deadline else f"[budget] {name}")
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """Time a pipeline stage (also reported in the request's timings)."""
+        started_at = time.monotonic()
+        try:
+            yield
+        finally:
+            elapsed = time.monotonic() - started_at
+            latency_tracker.record(f"stage:{name}", elapsed)
+            record_stage(name, elapsed)
+
+
+# Budget of the request handled by the current task
+current_budget: contextvars.ContextVar[Optional[RequestBudget]] = contextvars.ContextVar(
+    "current_budget", default=None
+)
+
+
+def get_budget() -> RequestBudget:
+    """Budget of the current request (an unlimited one outside a request)."""
+    budget = current_budget.get()
+    return budget if budget is not None else RequestBudget()
@@ -0,0 +1,139 @@
+"""Per-request stage timings and upstream call counts."""
+from __future__ import annotations
+
+import asyncio
+import contextvars
+import time
+from contextlib import contextmanager
+from typing import Awaitable, Iterator, Optional
+
+import httpx
+
+from .flight_recorder import add_span
+from .metrics import metrics
+from .models import RequestTimings
+
+# Timings of the request handled by the current task (shared with its subtasks)
+current_timings: contextvars.ContextVar[Optional[RequestTimings]] = contextvars.ContextVar(
+    "current_timings", default=None
+)
+
+
+def record_stage(name: str, seconds: float) -> None:
+    """Record time spent in a pipeline stage (metrics and the current request's timings)."""
+    metrics.observe("imagegen_stage_duration_seconds", seconds, {"stage": name})
+    add_span(name, "stage", seconds)
+    timings = current_timings.get()
+    if timings is not None:
+        timings.stages[name] = timings.stages.get(name, 0.0) + seconds
+
+
+class UpstreamCall:
+    """One call to an external service; the caller may set the status and response size."""
+
+    def __init__(self, provider: str):
+        self.provider = provider
+        self.status: Optional[str] = None
+        self.bytes: Optional[int] = None
+        self.started_at = time.monotonic()
+
+    @property
+    def failed(self) -> bool:
+        """Whether the call raised or answered with an HTTP error status."""
+        return _failed(self.status or "ok")
+
+
+def _failed(status: str) -> bool:
+    return not (status == "ok" or (status.isdigit() and int(status) < 400))
+
+
+def record_call(provider: str, seconds: float, status: str = "ok", **attrs) -> None:
+    """
+    Record a call to an external service in the current request's trace and timings.
+
+    ``upstream_call`` does this for calls made by the request itself. Calls
+    shared by several requests (micro-batches) are counted once in the metrics
+    and recorded with this function for every request that waited on them.
+
+    Args:
+        provider: Upstream service
+        seconds: Time the request spent on the call
+        status: "ok", an HTTP status code or "timeout"/"cancelled"/"error"
+        attrs: Extra span attributes
+    """
+    add_span(provider, "upstream", seconds, status=status, **attrs)
+    timings = current_timings.get()
+    if timings is not None:
+        timings.upstream_calls[provider] = timings.upstream_calls.get(provider, 0) + 1
+        timings.upstream_seconds[provider] = timings.upstream_seconds.get(provider, 0.0) + seconds
+        if _failed(status):
+            timings.upstream_errors[provider] = timings.upstream_errors.get(provider, 0) + 1
+
+
+@contextmanager
+def upstream_call(provider: str, **attrs) -> Iterator[UpstreamCall]:
+    """
+    Count and time a call to an external service for the current request.
+
+    The status is "ok" unless the caller sets one (e.g. the HTTP status code);
+    exceptions set "timeout", "cancelled" or "error". The call is also recorded
+    in the metrics and as a span of the request's trace.
+
+    Args:
+        provider: Upstream service (e.g. "unsplash", "sightengine", "openrouter")
+        attrs: Extra span attributes (e.g. attempt number of a retry)
+    """
+    call = UpstreamCall(provider)
+    try:
+        yield call
+    except asyncio.CancelledError:
+        call.status = "cancelled"
+        raise
+    except httpx.TimeoutException:
+        call.status = "timeout"
+        raise
+    except Exception:
+        if call.status is None or not call.failed:
+            call.status = "error"
+        raise
+    finally:
+        elapsed = time.monotonic() - call.started_at
+        labels = {"provider": provider, "status": call.status or "ok"}
+        metrics.inc("imagegen_upstream_requests_total", labels)
+        metrics.observe("imagegen_upstream_duration_seconds", elapsed, labels)
+        record_call(provider, elapsed, labels["status"], bytes=call.bytes, **attrs)
+
+
+async def upstream_request(provider: str, request: Awaitable[httpx.Response], **attrs) -> httpx.Response:
+    """
+    Await an httpx request as an upstream call, recording its status code and size.
+
+    Args:
+        provider: Upstream service
+        request: Pending request, e.g. ``client.get(url)``
+        attrs: Extra span attributes
+
+    Returns:
+        The response
+    """
+    with upstream_call(provider, **attrs) as call:
+        response = await request
+        call.status = str(response.status_code)
+        call.bytes = len(response.content)
+        return response
+
+
+def server_timing(timings: RequestTimings) -> str:
+    """
+    Format timings as a Server-Timing header value.
+
+    Stages are reported as ``<stage>;dur=<ms>``, upstream services as
+    ``up-<provider>;dur=<ms>;desc="<calls> calls"`` and the whole request as
+    ``total``. Overlapping work (concurrent calls) is summed per entry.
+    """
+    entries = [f"{name};dur={seconds * 1000:.1f}" for name, seconds in timings.stages.items()]
+    for provider, calls in timings.upstream_calls.items():
+        seconds = timings.upstream_seconds.get(provider, 0.0)
+        entries.append(f'up-{provider};dur={seconds * 1000:.1f};desc="{calls} calls"')
+    entries.append(f"total;dur={timings.total * 1000:.1f}")
+    return ", ".join(entries)
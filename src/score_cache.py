@@ -0,0 +1,392 @@
+"""Persistent score cache for stock images (SQLite with an in-memory front)."""
+from __future__ import annotations
+
+import asyncio
+import logging
+import queue
+import sqlite3
+import threading
+import time
+from contextlib import nullcontext
+from pathlib import Path
+from typing import Optional
+
+from .config import config
+from .ttl_cache import TTLCache
+
+# Seconds the writer waits after the first queued write so a slide's scores share one commit
+WRITE_BATCH_DELAY = 0.05
+# Upper bound of rows written per transaction
+WRITE_BATCH_SIZE = 500
+
+_SCORE_INSERT = (
+    "INSERT OR REPLACE INTO image_scores (kind, source, image_id, topic, score) VALUES (?, ?, ?, ?, ?)"
+)
+_HASH_INSERT = "INSERT OR REPLACE INTO image_hashes (source, image_id, dhash) VALUES (?, ?, ?)"
+
+# Score kinds; only "presentation" depends on the topic
+SCORE_KINDS = ("quality", "quality_local", "nudity", "presentation")
+
+# Memory front marker for keys that are not on disk either (negative lookups are cached)
+_ABSENT = object()
+
+
+class ScoreCache:
+    """
+    Caches per-image scores so repeat stock candidates cost no network calls.
+
+    Stock photos never change, so quality and nudity scores are keyed by
+    ``(source, image_id)``. Presentation fit depends on the slide topic and is
+    keyed by ``(source, image_id, topic)``. Perceptual hashes used for
+    near-duplicate detection are stored alongside. Reads are served from an
+    in-memory LRU front, which also remembers keys SQLite does not have;
+    SQLite keeps the data across restarts. ``load_scores``/``load_hash`` read
+    a candidate's rows into the front in a worker thread, so the lookups after
+    them do not query SQLite on the event loop. Writes are queued and
+    committed in batches by a writer thread with its own connection, so no
+    commit (fsync) runs on the event loop either.
+    """
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        enabled: Optional[bool] = None,
+        max_memory_entries: Optional[int] = None,
+    ):
+        """
+        Initialize the score cache.
+
+        Args:
+            path: SQLite file path (defaults to SCORE_CACHE_PATH)
+            enabled: Whether caching is active (defaults to SCORE_CACHE_ENABLED)
+            max_memory_entries: Size of each in-memory front (defaults to SCORE_CACHE_MEMORY_ENTRIES)
+        """
+        self.logger = logging.getLogger(__name__)
+        self.enabled = config.score_cache_enabled if enabled is None else enabled
+        self.path = path or config.score_cache_path
+        max_entries = max_memory_entries or config.score_cache_memory_entries
+        # Values are scores/hashes or _ABSENT
+        self._memory: TTLCache[object] = TTLCache(max_entries=max_entries)
+        self._hashes: TTLCache[object] = TTLCache(max_entries=max_entries)
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        # Connection for load_*() in worker threads (the main one for ":memory:")
+        self._reader: Optional[sqlite3.Connection] = None
+        self._reader_lock = self._lock
+        self._writes: queue.SimpleQueue = queue.SimpleQueue()
+        self._writer: Optional[threading.Thread] = None
+        self.hits = 0
+        self.misses = 0
+
+        if self.enabled:
+            try:
+                self._conn = self._open()
+                if self.path == ":memory:":
+                    self._reader = self._conn
+                else:
+                    self._reader, self._reader_lock = self._connect(), threading.Lock()
+                self._writer = threading.Thread(target=self._write_loop, name="score-cache-writer", daemon=True)
+                self._writer.start()
+            except Exception as exc:
+                # Keep the in-memory front working even if the disk is unavailable
+                self.logger.warning("Score cache persistence disabled (%s): %s", self.path, exc)
+                self._conn = None
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, check_same_thread=False)
+        # WAL with synchronous=NORMAL: commits do not fsync, a crash loses at most the last writes
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def _open(self) -> sqlite3.Connection:
+        """Open the SQLite database and create tables."""
+        if self.path != ":memory:":
+            Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        conn = self._connect()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS image_scores ("
+            " kind TEXT NOT NULL,"
+            " source TEXT NOT NULL,"
+            " image_id TEXT NOT NULL,"
+            " topic TEXT NOT NULL DEFAULT '',"
+            " score REAL NOT NULL,"
+            " updated_at REAL NOT NULL DEFAULT (strftime('%s', 'now')),"
+            " PRIMARY KEY (kind, source, image_id, topic))"
+        )
+        # Hashes are 64-bit unsigned, which does not fit SQLite's signed INTEGER; store hex
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS image_hashes ("
+            " source TEXT NOT NULL,"
+            " image_id TEXT NOT NULL,"
+            " dhash TEXT NOT NULL,"
+            " PRIMARY KEY (source, image_id))"
+        )
+        conn.commit()
+        return conn
+
+    @staticmethod
+    def _key(kind: str, source: str, image_id: str, topic: str = "") -> tuple:
+        return (kind, source, image_id, topic.strip().lower())
+
+    def get(self, kind: str, source: str, image_id: Optional[str], topic: str = "") -> Optional[float]:
+        """
+        Look up a cached score.
+
+        Args:
+            kind: Score kind ("quality", "quality_local", "nudity" or "presentation")
+            source: Stock provider ("unsplash" or "pexels")
+            image_id: Provider image ID
+            topic: Topic for topic-dependent scores
+
+        Returns:
+            Cached score or None on miss
+        """
+        if not self.enabled or not image_id:
+            return None
+
+        key = self._key(kind, source, image_id, topic)
+        with self._lock:
+            cached = self._memory.get(key)
+            if cached is None:
+                # Not loaded: read it here (on the caller's thread) and remember the outcome
+                cached = self._read_score(key)
+                if cached is None:
+                    self.misses += 1
+                    return None
+                self._memory.set(key, cached)
+            if cached is _ABSENT:
+                self.misses += 1
+                return None
+            self.hits += 1
+            return cached
+
+    def _read_score(self, key: tuple) -> object:
+        """Score of a key from SQLite, _ABSENT, or None if it could not be read (caller holds the lock)."""
+        if self._conn is None:
+            return _ABSENT
+        try:
+            row = self._conn.execute(
+                "SELECT score FROM image_scores WHERE kind=? AND source=? AND image_id=? AND topic=?",
+                key,
+            ).fetchone()
+        except sqlite3.Error as exc:
+            self.logger.warning("Score cache read failed: %s", exc)
+            return None
+        return _ABSENT if row is None else row[0]
+
+    def set(self, kind: str, source: str, image_id: Optional[str], score: float, topic: str = "") -> None:
+        """
+        Store a score.
+
+        Args:
+            kind: Score kind ("quality", "quality_local", "nudity" or "presentation")
+            source: Stock provider ("unsplash" or "pexels")
+            image_id: Provider image ID
+            score: Score to store
+            topic: Topic for topic-dependent scores
+        """
+        if not self.enabled or not image_id:
+            return
+
+        key = self._key(kind, source, image_id, topic)
+        with self._lock:
+            self._memory.set(key, float(score))
+        if self._writer is not None:
+            self._writes.put((_SCORE_INSERT, (*key, float(score))))
+
+    def get_quality(self, source: str, image_id: Optional[str]) -> Optional[float]:
+        """Cached quality score for a stock image."""
+        return self.get("quality", source, image_id)
+
+    def set_quality(self, source: str, image_id: Optional[str], score: float) -> None:
+        """Store the quality score for a stock image."""
+        self.set("quality", source, image_id, score)
+
+    def get_local_quality(self, source: str, image_id: Optional[str]) -> Optional[float]:
+        """Cached local (Pillow/NumPy) quality score for a stock image."""
+        return self.get("quality_local", source, image_id)
+
+    def set_local_quality(self, source: str, image_id: Optional[str], score: float) -> None:
+        """Store the local (Pillow/NumPy) quality score for a stock image."""
+        self.set("quality_local", source, image_id, score)
+
+    def get_nudity(self, source: str, image_id: Optional[str]) -> Optional[float]:
+        """Cached nudity safe score for a stock image."""
+        return self.get("nudity", source, image_id)
+
+    def set_nudity(self, source: str, image_id: Optional[str], score: float) -> None:
+        """Store the nudity safe score for a stock image."""
+        self.set("nudity", source, image_id, score)
+
+    def get_presentation(self, source: str, image_id: Optional[str], topic: str) -> Optional[float]:
+        """Cached presentation fit score for a stock image and topic."""
+        return self.get("presentation", source, image_id, topic)
+
+    def set_presentation(self, source: str, image_id: Optional[str], topic: str, score: float) -> None:
+        """Store the presentation fit score for a stock image and topic."""
+        self.set("presentation", source, image_id, score, topic)
+
+    def get_hash(self, source: str, image_id: Optional[str]) -> Optional[int]:
+        """
+        Look up the stored perceptual hash of a stock image.
+
+        Args:
+            source: Stock provider ("unsplash" or "pexels")
+            image_id: Provider image ID
+
+        Returns:
+            dHash value or None on miss
+        """
+        if not self.enabled or not image_id:
+            return None
+
+        key = (source, image_id)
+        with self._lock:
+            cached = self._hashes.get(key)
+            if cached is None:
+                cached = self._read_hash(key)
+                if cached is None:
+                    return None
+                self._hashes.set(key, cached)
+            return None if cached is _ABSENT else cached
+
+    def _read_hash(self, key: tuple) -> object:
+        """Hash of a key from SQLite, _ABSENT, or None if it could not be read (caller holds the lock)."""
+        if self._conn is None:
+            return _ABSENT
+        try:
+            row = self._conn.execute(
+                "SELECT dhash FROM image_hashes WHERE source=? AND image_id=?",
+                key,
+            ).fetchone()
+        except sqlite3.Error as exc:
+            self.logger.warning("Hash cache read failed: %s", exc)
+            return None
+        return _ABSENT if row is None else int(row[0], 16)
+
+    async def load_scores(self, source: str, image_id: Optional[str], topic: str = "") -> None:
+        """
+        Read all cached scores of a stock image into the memory front.
+
+        One SELECT in a worker thread replaces up to one per score kind on the
+        event loop; kinds SQLite does not have are remembered as misses.
+
+        Args:
+            source: Stock provider ("unsplash" or "pexels")
+            image_id: Provider image ID
+            topic: Topic of the presentation fit score
+        """
+        if not self.enabled or not image_id or self._reader is None:
+            return
+        keys = [self._key(kind, source, image_id, topic if kind == "presentation" else "") for kind in SCORE_KINDS]
+        with self._lock:
+            keys = [key for key in keys if key not in self._memory]
+        if keys:
+            await asyncio.to_thread(self._load_scores, source, image_id, keys)
+
+    def _load_scores(self, source: str, image_id: str, keys: list[tuple]) -> None:
+        try:
+            with self._reader_lock:
+                rows = self._reader.execute(
+                    "SELECT kind, topic, score FROM image_scores WHERE source=? AND image_id=?",
+                    (source, image_id),
+                ).fetchall()
+        except sqlite3.Error as exc:
+            self.logger.warning("Score cache read failed: %s", exc)
+            return
+        stored = {(kind, source, image_id, topic): score for kind, topic, score in rows}
+        with self._lock:
+            for key in keys:
+                # Scores set while the SELECT ran are newer than the disk
+                if key not in self._memory:
+                    self._memory.set(key, stored.get(key, _ABSENT))
+
+    async def load_hash(self, source: str, image_id: Optional[str]) -> None:
+        """
+        Read the stored perceptual hash of a stock image into the memory front (worker thread).
+
+        Args:
+            source: Stock provider ("unsplash" or "pexels")
+            image_id: Provider image ID
+        """
+        if not self.enabled or not image_id or self._reader is None:
+            return
+        key = (source, image_id)
+        with self._lock:
+            if key in self._hashes:
+                return
+        await asyncio.to_thread(self._load_hash, key)
+
+    def _load_hash(self, key: tuple) -> None:
+        try:
+            with self._reader_lock:
+                row = self._reader.execute(
+                    "SELECT dhash FROM image_hashes WHERE source=? AND image_id=?",
+                    key,
+                ).fetchone()
+        except sqlite3.Error as exc:
+            self.logger.warning("Hash cache read failed: %s", exc)
+            return
+        with self._lock:
+            if key not in self._hashes:
+                self._hashes.set(key, _ABSENT if row is None else int(row[0], 16))
+
+    def set_hash(self, source: str, image_id: Optional[str], value: int) -> None:
+        """
+        Store the perceptual hash of a stock image.
+
+        Args:
+            source: Stock provider ("unsplash" or "pexels")
+            image_id: Provider image ID
+            value: dHash value
+        """
+        if not self.enabled or not image_id:
+            return
+
+        key = (source, image_id)
+        with self._lock:
+            self._hashes.set(key, value)
+        if self._writer is not None:
+            self._writes.put((_HASH_INSERT, (*key, f"{value:016x}")))
+
+    def _write_loop(self) -> None:
+        """Commit queued writes in batches (runs on the writer thread)."""
+        # An in-memory database exists per connection, so it is shared with the readers
+        in_memory = self.path == ":memory:"
+        conn = self._conn if in_memory else self._connect()
+        lock = self._lock if in_memory else nullcontext()
+        while True:
+            batch = [self._writes.get()]
+            if batch[0] is not None:
+                time.sleep(WRITE_BATCH_DELAY)
+                while len(batch) < WRITE_BATCH_SIZE and batch[-1] is not None:
+                    try:
+                        batch.append(self._writes.get_nowait())
+                    except queue.Empty:
+                        break
+            rows = [write for write in batch if write is not None]
+            if rows:
+                try:
+                    with lock, conn:
+                        for statement in (_SCORE_INSERT, _HASH_INSERT):
+                            params = [row for sql, row in rows if sql is statement]
+                            if params:
+                                conn.executemany(statement, params)
+                except sqlite3.Error as exc:
+                    self.logger.warning("Score cache write failed (%d rows): %s", len(rows), exc)
+            if batch[-1] is None:
+                if not in_memory:
+                    conn.close()
+                return
+
+    def close(self) -> None:
+        """Write the queued scores, stop the writer thread and close the reader connection."""
+        if self._writer is not None:
+            writer, self._writer = self._writer, None
+            self._writes.put(None)
+            writer.join()
+        if self._reader is not None and self._reader is not self._conn:
+            with self._reader_lock:
+                reader, self._reader = self._reader, None
+                reader.close()
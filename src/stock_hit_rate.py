@@ -0,0 +1,74 @@
+"""Learned likelihood that stock search finds a suitable image for a slide."""
+from __future__ import annotations
+
+from typing import Optional
+
+from .ttl_cache import TTLCache
+
+# Weight of older observations after each new one (exponential decay)
+DECAY = 0.95
+# Pseudo-observations of the prior (hit rate 0.5)
+PRIOR_HITS = 1.0
+PRIOR_MISSES = 1.0
+
+
+class StockHitRate:
+    """
+    Keeps decayed hit/miss counts of stock search per keyword and style.
+
+    A slide's hit probability is the mean posterior hit rate of its keywords
+    and style; keys never seen before contribute the prior.
+    """
+
+    def __init__(self, max_keys: int = 5000):
+        """
+        Initialize the tracker.
+
+        Args:
+            max_keys: Maximum number of keywords/styles remembered (LRU)
+        """
+        self._counts: TTLCache[tuple[float, float]] = TTLCache(max_entries=max_keys)
+
+    @staticmethod
+    def _keys(keywords: str, style: Optional[str]) -> list[str]:
+        keys = [f"kw:{k.strip().lower()}" for k in keywords.split(",") if k.strip()][:5]
+        if style:
+            keys.append(f"style:{style.strip().lower()}")
+        return keys
+
+    def record(self, keywords: str, style: Optional[str], hit: bool) -> None:
+        """
+        Record the outcome of a stock search.
+
+        Args:
+            keywords: Refined search keywords (comma-separated)
+            style: Slide style
+            hit: Whether a suitable stock image was found
+        """
+        for key in self._keys(keywords, style):
+            hits, misses = self._counts.get(key) or (0.0, 0.0)
+            self._counts.set(key, (hits * DECAY + (1.0 if hit else 0.0), misses * DECAY + (0.0 if hit else 1.0)))
+
+    def predict(self, keywords: str, style: Optional[str]) -> tuple[float, int]:
+        """
+        Estimate the probability that stock search succeeds.
+
+        Args:
+            keywords: Refined search keywords (comma-separated)
+            style: Slide style
+
+        Returns:
+            Tuple of (hit probability, number of keys with observations)
+        """
+        keys = self._keys(keywords, style)
+        if not keys:
+            return PRIOR_HITS / (PRIOR_HITS + PRIOR_MISSES), 0
+
+        rates = []
+        observed = 0
+        for key in keys:
+            hits, misses = self._counts.get(key) or (0.0, 0.0)
+            if hits or misses:
+                observed += 1
+            rates.append((hits + PRIOR_HITS) / (hits + misses + PRIOR_HITS + PRIOR_MISSES))
+        return sum(rates) / len(rates), observed
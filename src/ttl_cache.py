@@ -0,0 +1,118 @@
+"""Small in-memory LRU cache with per-entry expiry."""
+from __future__ import annotations
+
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Generic, Hashable, Optional, TypeVar
+
+V = TypeVar("V")
+
+
+class TTLCache(Generic[V]):
+    """
+    LRU cache whose entries expire after a fixed time-to-live.
+
+    Optionally bounded by total size as well as entry count; ``sizeof`` maps a
+    value to its size in bytes. Hit/miss counters are kept for observability.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 1024,
+        ttl: Optional[float] = None,
+        max_bytes: Optional[int] = None,
+        sizeof: Optional[Callable[[V], int]] = None,
+    ):
+        """
+        Initialize the cache.
+
+        Args:
+            max_entries: Maximum number of entries kept
+            ttl: Seconds before an entry expires (None = never)
+            max_bytes: Maximum total size of all values (requires sizeof)
+            sizeof: Function returning the size of a value in bytes
+        """
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.sizeof = sizeof
+        self.hits = 0
+        self.misses = 0
+        self.current_bytes = 0
+        self._entries: "OrderedDict[Hashable, tuple[float, V, int]]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return self._lookup(key) is not None
+
+    def _lookup(self, key: Hashable) -> Optional[tuple[float, V, int]]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at = entry[0]
+        if expires_at and expires_at < time.monotonic():
+            self._remove(key)
+            return None
+        return entry
+
+    def _remove(self, key: Hashable) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.current_bytes -= entry[2]
+
+    def get(self, key: Hashable, default: Any = None) -> Optional[V]:
+        """Return a cached value (refreshing its LRU position) or ``default``."""
+        entry = self._lookup(key)
+        if entry is None:
+            self.misses += 1
+            return default
+        self.hits += 1
+        self._entries.move_to_end(key)
+        return entry[1]
+
+    def set(self, key: Hashable, value: V, ttl: Optional[float] = None) -> None:
+        """
+        Store a value.
+
+        Args:
+            key: Cache key
+            value: Value to store
+            ttl: Override of the default time-to-live for this entry
+        """
+        size = self.sizeof(value) if self.sizeof else 0
+        if self.max_bytes is not None and size > self.max_bytes:
+            # Never let a single oversized value flush the whole cache
+            return
+
+        self._remove(key)
+        ttl = self.ttl if ttl is None else ttl
+        expires_at = time.monotonic() + ttl if ttl else 0.0
+        self._entries[key] = (expires_at, value, size)
+        self.current_bytes += size
+
+        while len(self._entries) > self.max_entries or (
+            self.max_bytes is not None and self.current_bytes > self.max_bytes
+        ):
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+
+    def pop(self, key: Hashable, default: Any = None) -> Optional[V]:
+        """Remove and return a value."""
+        entry = self._lookup(key)
+        if entry is None:
+            return default
+        self._remove(key)
+        return entry[1]
+
+    def clear(self) -> None:
+        """Drop all entries."""
+        self._entries.clear()
+        self.current_bytes = 0
+
+    @property
+    def hit_ratio(self) -> float:
+        """Fraction of lookups served from the cache."""
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
@@ -0,0 +1,51 @@
+"""Shared fixtures."""
+import pytest
+
+from src import orchestrator as orchestrator_module
+from src.config import config
+from src.orchestrator import ImageOrchestrator
+
+# Collaborator attribute of ImageOrchestrator -> class it is constructed from
+COLLABORATORS = {
+    "keyword_extractor": "KeywordExtractor",
+    "image_searcher": "ImageSearcher",
+    "image_scorer": "ImageScorer",
+    "image_generator": "ImageGenerator",
+}
+
+
+class Unused:
+    """Stand-in for a collaborator the test does not expect to be called."""
+
+    def __init__(self, name: str):
+        self._name = name
+
+    def __getattr__(self, attr):
+        raise AssertionError(f"unexpected use of {self._name}.{attr}")
+
+
+@pytest.fixture
+def make_orchestrator(monkeypatch, tmp_path):
+    """
+    Build an ImageOrchestrator through its constructor with stubbed collaborators.
+
+    Collaborators passed by attribute name (e.g. ``image_generator=FakeGenerator()``)
+    replace the real ones; the others are ``Unused`` stubs. The score cache is a
+    real one in a temporary directory.
+    """
+    monkeypatch.setattr(config, "score_cache_path", str(tmp_path / "score_cache.sqlite3"))
+    built = []
+
+    def factory(**collaborators) -> ImageOrchestrator:
+        unknown = collaborators.keys() - COLLABORATORS.keys()
+        assert not unknown, f"not a collaborator: {sorted(unknown)}"
+        for attr, class_name in COLLABORATORS.items():
+            stub = collaborators.get(attr, Unused(attr))
+            monkeypatch.setattr(orchestrator_module, class_name, lambda *args, stub=stub, **kwargs: stub)
+        orchestrator = ImageOrchestrator()
+        built.append(orchestrator)
+        return orchestrator
+
+    yield factory
+    for orchestrator in built:
+        orchestrator.score_cache.close()
@@ -0,0 +1,73 @@
+"""Per-service bulkheads."""
+import asyncio
+
+import pytest
+
+from src.bulkhead import Bulkhead, BulkheadRejected
+
+
+async def hold(bulkhead, release):
+    async with bulkhead:
+        await release.wait()
+
+
+def test_rejects_fast_once_the_queue_is_full():
+    async def scenario():
+        bulkhead = Bulkhead("test", max_concurrent=1, max_queue=1)
+        release = asyncio.Event()
+        active = asyncio.create_task(hold(bulkhead, release))
+        queued = asyncio.create_task(hold(bulkhead, release))
+        await asyncio.sleep(0)
+        assert (bulkhead.active, bulkhead.queued) == (1, 1)
+
+        with pytest.raises(BulkheadRejected):
+            async with bulkhead:
+                pass
+        assert bulkhead.rejected == 1
+
+        release.set()
+        await asyncio.gather(active, queued)
+        assert bulkhead.stats()["completed"] == 2
+
+    asyncio.run(scenario())
+
+
+def test_cancelled_waiter_leaves_the_queue():
+    async def scenario():
+        bulkhead = Bulkhead("test", max_concurrent=1, max_queue=1)
+        release = asyncio.Event()
+        active = asyncio.create_task(hold(bulkhead, release))
+        queued = asyncio.create_task(hold(bulkhead, release))
+        await asyncio.sleep(0)
+
+        queued.cancel()
+        await asyncio.sleep(0)
+        assert bulkhead.queued == 0
+
+        # The freed queue place is usable again
+        waiting = asyncio.create_task(hold(bulkhead, release))
+        await asyncio.sleep(0)
+        assert bulkhead.queued == 1
+        release.set()
+        await asyncio.gather(active, waiting)
+        assert (bulkhead.active, bulkhead.queued, bulkhead.rejected) == (0, 0, 0)
+
+    asyncio.run(scenario())
+
+
+def test_cancelled_call_releases_its_slot():
+    async def scenario():
+        bulkhead = Bulkhead("test", max_concurrent=1, max_queue=0)
+        active = asyncio.create_task(hold(bulkhead, asyncio.Event()))
+        await asyncio.sleep(0)
+        assert bulkhead.active == 1
+
+        active.cancel()
+        await asyncio.sleep(0)
+        assert bulkhead.active == 0
+
+        async with bulkhead:
+            assert bulkhead.active == 1
+        assert bulkhead.rejected == 0
+
+    asyncio.run(scenario())
@@ -0,0 +1,157 @@
+"""FLUX polling and webhook delivery against a local stand-in server (FLUX_API_BASE)."""
+import asyncio
+import time
+import uuid
+from contextlib import asynccontextmanager
+
+import pytest
+import uvicorn
+from fastapi import FastAPI, Request
+
+from src import flux_webhooks
+from src.config import config
+from src.image_generator import ImageGenerator
+
+SAMPLE_URL = "https://delivery.flux/sample.jpg"
+
+
+class StubFlux:
+    """
+    Stand-in for the FLUX API: submit returns a polling URL, polls answer ``statuses`` in order.
+
+    ``on_submit`` / ``on_poll`` hooks run inside the server (same event loop as the test).
+    """
+
+    def __init__(self, statuses, on_submit=None, on_poll=None):
+        self.task_id = uuid.uuid4().hex
+        self.statuses = statuses
+        self.on_submit = on_submit
+        self.on_poll = on_poll
+        self.submitted_at = None
+        self.polls: list[float] = []
+        self.app = FastAPI()
+        self.app.post("/{model}")(self.submit)
+        self.app.get("/poll/{task_id}")(self.poll)
+
+    def payload(self, status: str) -> dict:
+        body = {"id": self.task_id, "status": status}
+        if status == "Ready":
+            body["result"] = {"sample": SAMPLE_URL}
+        return body
+
+    async def submit(self, model: str, request: Request):
+        self.submitted_at = time.monotonic()
+        if self.on_submit:
+            self.on_submit(self)
+        return {"id": self.task_id, "polling_url": f"{request.base_url}poll/{self.task_id}"}
+
+    async def poll(self, task_id: str):
+        self.polls.append(time.monotonic())
+        if self.on_poll:
+            self.on_poll(self)
+        return self.payload(self.statuses[min(len(self.polls), len(self.statuses)) - 1])
+
+
+@asynccontextmanager
+async def serving(stub: StubFlux):
+    server = uvicorn.Server(uvicorn.Config(stub.app, host="127.0.0.1", port=0, log_level="warning", lifespan="off"))
+    task = asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.01)
+    port = server.servers[0].sockets[0].getsockname()[1]
+    try:
+        yield f"http://127.0.0.1:{port}"
+    finally:
+        server.should_exit = True
+        await task
+
+
+@pytest.fixture(autouse=True)
+def fast_polling(monkeypatch):
+    # A fresh model name keeps completion times of other tests out of the initial delay
+    monkeypatch.setattr(config, "flux_model", f"stub-{uuid.uuid4().hex[:8]}")
+    monkeypatch.setattr(config, "flux_poll_initial_delay", 0.05)
+    monkeypatch.setattr(config, "flux_poll_interval", 0.02)
+    monkeypatch.setattr(config, "flux_poll_backoff", 2.0)
+    monkeypatch.setattr(config, "flux_poll_max_interval", 0.08)
+    monkeypatch.setattr(config, "flux_poll_deadline", 5.0)
+    monkeypatch.setattr(config, "flux_webhook_url", None)
+    monkeypatch.setattr(config, "flux_webhook_secret", None)
+
+
+def generate(stub: StubFlux, monkeypatch):
+    async def scenario():
+        async with serving(stub) as base:
+            monkeypatch.setattr(config, "flux_api_base", base)
+            started_at = time.monotonic()
+            result = await ImageGenerator().generate_with_flux("a cloud")
+            return result, time.monotonic() - started_at
+
+    return asyncio.run(scenario())
+
+
+def enable_webhooks(monkeypatch):
+    monkeypatch.setattr(config, "flux_webhook_url", "https://example.org/flux/webhook")
+    monkeypatch.setattr(config, "flux_webhook_secret", "s3cret")
+    # Polling is only the safety net in webhook mode
+    monkeypatch.setattr(config, "flux_poll_max_interval", 5.0)
+
+
+def test_polls_back_off_exponentially_up_to_the_cap(monkeypatch):
+    stub = StubFlux(["Pending"] * 5 + ["Ready"])
+    result, _ = generate(stub, monkeypatch)
+
+    assert result.image.url == SAMPLE_URL
+    assert len(stub.polls) == 6
+    tolerance = 0.005
+    assert stub.polls[0] - stub.submitted_at >= 0.05 - tolerance
+    gaps = [later - earlier for earlier, later in zip(stub.polls, stub.polls[1:])]
+    for gap, expected in zip(gaps, [0.02, 0.04, 0.08, 0.08, 0.08]):
+        assert gap >= expected - tolerance
+
+
+def test_polling_stops_at_the_deadline(monkeypatch):
+    monkeypatch.setattr(config, "flux_poll_deadline", 0.3)
+    stub = StubFlux(["Pending"])
+    result, elapsed = generate(stub, monkeypatch)
+
+    assert result.error == "FLUX generation timed out after 0s"
+    assert stub.polls
+    assert 0.3 <= elapsed < 1.0
+
+
+def test_failed_status_ends_polling(monkeypatch):
+    stub = StubFlux(["Pending", "Content Moderated", "Ready"])
+    result, _ = generate(stub, monkeypatch)
+
+    assert result.error == "FLUX generation ended with status Content Moderated"
+    assert len(stub.polls) == 2
+
+
+def test_webhook_arriving_before_the_generation_waits(monkeypatch):
+    enable_webhooks(monkeypatch)
+    # Delivered while the submit request is still being answered
+    stub = StubFlux(["Pending"], on_submit=lambda stub: flux_webhooks.resolve(stub.payload("Ready")))
+    result, elapsed = generate(stub, monkeypatch)
+
+    assert result.image.url == SAMPLE_URL
+    assert stub.polls == []
+    assert elapsed < 1.0
+    assert flux_webhooks._EARLY.get(stub.task_id) is None
+
+
+def test_webhook_arriving_after_a_poll(monkeypatch):
+    enable_webhooks(monkeypatch)
+
+    def deliver_later(stub):
+        if len(stub.polls) == 1:
+            asyncio.get_running_loop().call_later(0.05, flux_webhooks.resolve, stub.payload("Ready"))
+
+    stub = StubFlux(["Pending"], on_poll=deliver_later)
+    result, elapsed = generate(stub, monkeypatch)
+
+    assert result.image.url == SAMPLE_URL
+    # Pushed completion, not the next poll (5s away)
+    assert len(stub.polls) == 1
+    assert elapsed < 1.0
+    assert stub.task_id not in flux_webhooks._WAITERS
@@ -0,0 +1,60 @@
+"""Hedged multi-provider generation."""
+import asyncio
+
+import pytest
+
+from src.models import GenerationResult, ImagePayload, RequestTimings, SlideInput
+from src.request_timing import current_timings
+
+
+class FakeGenerator:
+    def __init__(self, prompt_error=None):
+        self.prompt_error = prompt_error
+
+    async def build_final_prompt(self, keywords, style, colors, slide):
+        if self.prompt_error:
+            raise self.prompt_error
+        return f"prompt for {keywords}"
+
+    async def generate_from_keywords(self, model, **kwargs):
+        return GenerationResult(image=ImagePayload(url=f"https://gen/{model}"), model=model)
+
+
+@pytest.fixture
+def hedged_orchestrator(make_orchestrator):
+    async def store(image, model):
+        return image.url
+
+    async def safety(image, served_url):
+        return 1.0
+
+    def build(generator):
+        orchestrator = make_orchestrator(image_generator=generator)
+        orchestrator._store_generated = store
+        orchestrator._check_generated_safety = safety
+        return orchestrator
+
+    return build
+
+
+def run_hedged(orchestrator):
+    async def scenario():
+        timings = RequestTimings()
+        current_timings.set(timings)
+        result = await orchestrator._generate_hedged(SlideInput(title="Cloud"), "cloud", "google_banana")
+        return result, timings
+
+    return asyncio.run(scenario())
+
+
+def test_prompt_failure_degrades_to_the_error_image(hedged_orchestrator):
+    result, _ = run_hedged(hedged_orchestrator(FakeGenerator(prompt_error=RuntimeError("LLM down"))))
+    assert result.source == "failed"
+    assert "Prompt generation failed: LLM down" in result.error
+
+
+def test_hedged_generation_records_the_generate_stage(hedged_orchestrator):
+    result, timings = run_hedged(hedged_orchestrator(FakeGenerator()))
+    assert result.source == "generated_google_banana"
+    assert result.url == "https://gen/google_banana"
+    assert {"prompt", "generate"} <= set(timings.stages)
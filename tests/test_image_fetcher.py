@@ -0,0 +1,37 @@
+"""Shared downloads of the image fetcher."""
+import asyncio
+
+from src.image_fetcher import FetchedImage, ImageFetcher
+
+
+def test_cancelled_waiter_does_not_cancel_shared_download():
+    async def scenario():
+        fetcher = ImageFetcher(max_concurrency=2, max_bytes=1024, cache_ttl=60, cache_max_bytes=4096)
+        started = asyncio.Event()
+        release = asyncio.Event()
+        downloads = 0
+
+        async def download(url):
+            nonlocal downloads
+            downloads += 1
+            started.set()
+            await release.wait()
+            return FetchedImage(b"jpeg", "image/jpeg")
+
+        fetcher._download = download
+        first = asyncio.create_task(fetcher.fetch("https://img/1"))
+        await started.wait()
+        second = asyncio.create_task(fetcher.fetch("https://img/1"))
+        await asyncio.sleep(0)
+
+        first.cancel()
+        await asyncio.sleep(0)
+        release.set()
+
+        assert await second == FetchedImage(b"jpeg", "image/jpeg")
+        assert first.cancelled()
+        assert downloads == 1
+        assert fetcher.buffers.get("https://img/1") is not None
+        assert not fetcher._inflight
+
+    asyncio.run(scenario())
@@ -0,0 +1,79 @@
+"""Generation prompt cache keys, FLUX webhooks and generation reuse."""
+import asyncio
+
+import httpx
+
+from src.config import config
+from src.image_generator import ImageGenerator
+from src.models import ColorConfig, GenerationResult, ImagePayload, SlideInput
+
+
+def cache_key(slide: SlideInput, keywords: str = "cloud migration"):
+    generator = ImageGenerator.__new__(ImageGenerator)
+    return generator._prompt_cache_key(keywords, slide.style, slide.colors, slide)
+
+
+def test_control_fields_do_not_change_the_prompt_key():
+    slide = SlideInput(title="Cloud", bullets=[{"bullet": "Lift and shift"}], style="flat_illustration")
+    variant = slide.model_copy(update={
+        "deck_id": "deck-1", "force_fresh": True, "priority": "background",
+        "latency_budget_ms": 5000, "image_mode": "ai_only", "ai_model": "flux",
+    })
+    assert cache_key(slide) == cache_key(variant)
+
+
+def test_scenario_key_follows_slide_content():
+    slide = SlideInput(title="Cloud", style="fine_line")
+    assert cache_key(slide) != cache_key(slide.model_copy(update={"title": "Edge"}))
+    assert cache_key(slide, "cloud") == cache_key(slide, "edge")
+
+
+def test_style_key_follows_keywords_style_and_colors_only():
+    slide = SlideInput(title="Cloud", style="modern, minimal")
+    assert cache_key(slide) == cache_key(slide.model_copy(update={"title": "Edge", "bullets": [{"bullet": "x"}]}))
+    assert cache_key(slide, "cloud") != cache_key(slide, "edge")
+    assert cache_key(slide) != cache_key(slide.model_copy(update={"colors": ColorConfig(primary="#000000")}))
+
+
+def test_flux_webhook_requires_a_secret(monkeypatch):
+    generator = ImageGenerator.__new__(ImageGenerator)
+    monkeypatch.setattr(config, "flux_webhook_url", "https://example.org/flux/webhook")
+    monkeypatch.setattr(config, "flux_webhook_secret", None)
+    assert generator._flux_webhook_url() is None
+
+    monkeypatch.setattr(config, "flux_webhook_secret", "s3cret")
+    assert generator._flux_webhook_url() == "https://example.org/flux/webhook?token=s3cret"
+
+
+def test_url_delivered_generations_are_reused_after_download(make_orchestrator, monkeypatch):
+    monkeypatch.setattr(config, "generation_reuse_scope", "global")
+    generator = ImageGenerator()
+    calls = []
+
+    async def generate_image(prompt, model, width, height, tenant=None):
+        calls.append(prompt)
+        return GenerationResult(image=ImagePayload(url="https://delivery.flux/sample.jpg"), model=model)
+
+    generator.generate_image = generate_image
+    orchestrator = make_orchestrator(image_generator=generator)
+
+    def deliver(request):
+        return httpx.Response(200, content=b"jpeg", headers={"content-type": "image/jpeg"})
+
+    async_client = httpx.AsyncClient
+    monkeypatch.setattr(
+        httpx, "AsyncClient", lambda **kwargs: async_client(transport=httpx.MockTransport(deliver), **kwargs)
+    )
+
+    async def scenario():
+        first = await generator.generate_from_keywords("cloud", model="flux", final_prompt="a cloud")
+        served = await orchestrator._store_generated(first.image, "flux")
+        second = await generator.generate_from_keywords("cloud", model="flux", final_prompt="a cloud")
+        return first, served, second
+
+    first, served, second = asyncio.run(scenario())
+    assert served.endswith(f"/generated/{first.image.image_id}")
+    assert second.reused
+    assert second.image.image_id == first.image.image_id
+    assert second.image.data == b"jpeg"
+    assert calls == ["a cloud"]
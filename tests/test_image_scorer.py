@@ -0,0 +1,40 @@
+"""Quality score cache kinds of the image scorer."""
+from src.config import config
+from src.image_scorer import ImageScorer
+from src.models import ImageRef
+from src.score_cache import ScoreCache
+
+IMAGE = ImageRef(index=0, id="42", alt=None, regular_url="https://img/42", full_url="https://img/42", source="pexels")
+
+
+def scorer_with(cache: ScoreCache) -> ImageScorer:
+    scorer = ImageScorer.__new__(ImageScorer)
+    scorer.score_cache = cache
+    return scorer
+
+
+def test_local_scores_are_not_served_as_sightengine_scores(monkeypatch, tmp_path):
+    cache = ScoreCache(path=str(tmp_path / "scores.sqlite3"), enabled=True)
+    cache.set_local_quality("pexels", "42", 0.9)
+    scorer = scorer_with(cache)
+
+    for mode in ("sightengine", "fallback"):
+        monkeypatch.setattr(config, "quality_scorer", mode)
+        assert scorer._cached_quality(IMAGE) is None
+    for mode in ("local", "prefilter"):
+        monkeypatch.setattr(config, "quality_scorer", mode)
+        assert scorer._cached_quality(IMAGE) == 0.9
+    cache.close()
+
+
+def test_prefilter_prefers_sightengine_scores(monkeypatch, tmp_path):
+    cache = ScoreCache(path=str(tmp_path / "scores.sqlite3"), enabled=True)
+    cache.set_local_quality("pexels", "42", 0.3)
+    cache.set_quality("pexels", "42", 0.7)
+    scorer = scorer_with(cache)
+
+    monkeypatch.setattr(config, "quality_scorer", "prefilter")
+    assert scorer._cached_quality(IMAGE) == 0.7
+    monkeypatch.setattr(config, "quality_scorer", "local")
+    assert scorer._cached_quality(IMAGE) == 0.3
+    cache.close()
@@ -0,0 +1,62 @@
+"""Perceptual hashing and near-duplicate collapsing of stock results."""
+import asyncio
+import io
+
+import numpy as np
+from PIL import Image
+
+from src.image_fetcher import ImageFetcher
+from src.image_search import ImageSearcher
+from src.models import ImageRef
+from src.perceptual_hash import dhash, hamming_distance
+
+
+def encode(pixels) -> bytes:
+    buffer = io.BytesIO()
+    Image.fromarray(np.asarray(pixels, dtype=np.uint8)).save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def gradient(width=64, height=48):
+    return np.tile(np.linspace(0, 255, width), (height, 1))
+
+
+def image_ref(source, image_id):
+    url = f"https://{source}/{image_id}"
+    return ImageRef(id=image_id, index=0, alt="", source=source, full_url=url, regular_url=url)
+
+
+def test_hamming_distance_counts_differing_bits():
+    assert hamming_distance(0b1011, 0b1011) == 0
+    assert hamming_distance(0b1011, 0b0010) == 2
+    assert hamming_distance(0, (1 << 64) - 1) == 64
+
+
+def test_dhash_is_stable_under_resizing_and_differs_between_images():
+    original = gradient()
+    resized = np.asarray(Image.fromarray(original.astype(np.uint8)).resize((128, 96)))
+    mirrored = original[:, ::-1]
+
+    assert hamming_distance(dhash(encode(original)), dhash(encode(resized))) <= 2
+    assert hamming_distance(dhash(encode(original)), dhash(encode(mirrored))) > 32
+
+
+def test_collapse_reports_the_matching_original_when_some_hashes_are_missing(capsys):
+    images = [
+        image_ref("unsplash", "unhashable"),
+        image_ref("unsplash", "original"),
+        image_ref("pexels", "other"),
+        image_ref("pexels", "copy"),
+    ]
+    hashes = {"unhashable": None, "original": 0b1111_0000, "other": 0b0000_1111, "copy": 0b1111_0001}
+
+    async def image_hash(ref):
+        return hashes[ref.id]
+
+    searcher = ImageSearcher(fetcher=ImageFetcher(), score_cache=object())
+    searcher.image_hash = image_hash
+    kept = asyncio.run(searcher.collapse_near_duplicates(images))
+
+    assert [ref.id for ref in kept] == ["unhashable", "original", "other"]
+    assert [ref.index for ref in kept] == [0, 1, 2]
+    assert "Near-duplicate dropped: pexels:copy ~ unsplash:original" in capsys.readouterr().out
@@ -0,0 +1,22 @@
+"""Process pool of the local quality scorer."""
+import asyncio
+import io
+
+from PIL import Image
+
+from src import local_quality
+
+
+def test_pool_spawns_workers_and_shuts_down():
+    buffer = io.BytesIO()
+    Image.new("RGB", (64, 64), "gray").save(buffer, format="JPEG")
+
+    executor = local_quality.start_executor()
+    try:
+        assert local_quality.start_executor() is executor
+        assert executor._mp_context.get_start_method() == "spawn"
+        score = asyncio.run(local_quality.score_quality_local(buffer.getvalue(), (64, 64)))
+        assert score == local_quality.compute_quality(buffer.getvalue(), (64, 64))
+    finally:
+        local_quality.shutdown_executor()
+    assert local_quality._EXECUTOR is None
@@ -0,0 +1,130 @@
+"""Micro-batching of scoring requests."""
+import asyncio
+import contextvars
+
+import httpx
+import pytest
+
+from src.micro_batcher import MicroBatcher
+from src.models import RequestTimings
+from src.request_timing import current_timings
+
+caller = contextvars.ContextVar("caller", default=None)
+
+
+class FakeService:
+    def __init__(self, batch_error=None, single_error=None):
+        self.batch_error = batch_error
+        self.single_error = single_error
+        self.batches = []
+        self.singles = []
+        self.batch_callers = []
+
+    async def batch(self, items):
+        self.batches.append(list(items))
+        self.batch_callers.append(caller.get())
+        if self.batch_error:
+            raise self.batch_error
+        return [item * 10 for item in items]
+
+    async def single(self, item):
+        self.singles.append(item)
+        if self.single_error:
+            raise self.single_error
+        return item * 10
+
+
+def make_batcher(service, window_ms=20.0, max_batch=16):
+    return MicroBatcher("Test", "test_service", service.batch, service.single, window_ms=window_ms, max_batch=max_batch)
+
+
+def http_error(status):
+    request = httpx.Request("POST", "http://scoring/batch")
+    return httpx.HTTPStatusError(f"{status}", request=request, response=httpx.Response(status, request=request))
+
+
+def test_merges_up_to_max_batch_and_flushes_the_rest_after_the_window():
+    service = FakeService()
+
+    async def scenario():
+        batcher = make_batcher(service, window_ms=20.0, max_batch=3)
+        return await asyncio.gather(*[batcher.submit(i) for i in range(5)])
+
+    assert asyncio.run(scenario()) == [0, 10, 20, 30, 40]
+    assert service.batches == [[0, 1, 2], [3, 4]]
+    assert service.singles == []
+
+
+def test_items_after_the_window_go_into_a_new_batch():
+    service = FakeService()
+
+    async def scenario():
+        batcher = make_batcher(service, window_ms=20.0)
+        first = asyncio.gather(batcher.submit(1), batcher.submit(2))
+        await asyncio.sleep(0.05)
+        second = asyncio.gather(batcher.submit(3), batcher.submit(4))
+        return await first, await second
+
+    assert asyncio.run(scenario()) == ([10, 20], [30, 40])
+    assert service.batches == [[1, 2], [3, 4]]
+
+
+@pytest.mark.parametrize("status", [404, 405, 501])
+def test_missing_batch_endpoint_falls_back_to_single_requests(status):
+    service = FakeService(batch_error=http_error(status))
+
+    async def scenario():
+        batcher = make_batcher(service)
+        results = await asyncio.gather(batcher.submit(1), batcher.submit(2))
+        assert not batcher.batch_supported
+        # Later items skip the batch endpoint until it is re-probed
+        results.append(await batcher.submit(3))
+        return results
+
+    assert asyncio.run(scenario()) == [10, 20, 30]
+    assert len(service.batches) == 1
+    assert service.singles == [1, 2, 3]
+
+
+def test_other_batch_errors_fall_back_once_and_keep_batching():
+    service = FakeService(batch_error=http_error(500))
+
+    async def scenario():
+        batcher = make_batcher(service)
+        results = await asyncio.gather(batcher.submit(1), batcher.submit(2))
+        return results, batcher.batch_supported
+
+    assert asyncio.run(scenario()) == ([10, 20], True)
+    assert service.singles == [1, 2]
+
+
+def test_errors_reach_every_waiting_caller():
+    service = FakeService(batch_error=RuntimeError("batch down"), single_error=ValueError("service down"))
+
+    async def scenario():
+        batcher = make_batcher(service)
+        return await asyncio.gather(*[batcher.submit(i) for i in range(3)], return_exceptions=True)
+
+    results = asyncio.run(scenario())
+    assert len(results) == 3
+    assert all(isinstance(result, ValueError) for result in results)
+
+
+def test_batches_run_outside_the_callers_context_and_time_every_waiter():
+    service = FakeService()
+
+    async def submit(batcher, name, item):
+        caller.set(name)
+        timings = RequestTimings()
+        current_timings.set(timings)
+        return await batcher.submit(item), timings
+
+    async def scenario():
+        batcher = make_batcher(service)
+        return await asyncio.gather(*[submit(batcher, f"request-{i}", i) for i in range(3)])
+
+    results = asyncio.run(scenario())
+    assert service.batch_callers == [None]
+    for result, timings in results:
+        assert timings.upstream_calls == {"test_service": 1}
+        assert timings.upstream_seconds["test_service"] > 0
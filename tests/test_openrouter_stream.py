@@ -0,0 +1,34 @@
+"""Streaming extraction of inline images from OpenRouter completions."""
+import base64
+import json
+
+from src.openrouter_stream import ImageResponseScanner
+
+
+def completion(url: str) -> bytes:
+    return json.dumps({
+        "choices": [{"message": {"content": "", "images": [{"image_url": {"url": url}}]}}]
+    }).encode()
+
+
+def scan(body: bytes, chunk_size: int) -> ImageResponseScanner:
+    scanner = ImageResponseScanner()
+    for start in range(0, len(body), chunk_size):
+        scanner.feed(body[start:start + chunk_size])
+    return scanner
+
+
+def test_data_url_is_decoded_across_chunk_boundaries():
+    image = bytes(range(256)) * 40
+    body = completion("data:image/png;base64," + base64.b64encode(image).decode())
+    for chunk_size in (1, 7, 1000, len(body)):
+        scanner = scan(body, chunk_size)
+        assert scanner.found_image and not scanner.image.error
+        assert scanner.image.media_type == "image/png"
+        assert scanner.image.data == image
+        assert isinstance(scanner.image.data, bytes)
+
+
+def test_link_is_returned_as_url():
+    scanner = scan(completion("https://cdn.example.org/a/b.png"), 5)
+    assert scanner.image.url == "https://cdn.example.org/a/b.png"
@@ -0,0 +1,132 @@
+"""Deck prefetch budgets and priority of joined prefetches."""
+import asyncio
+
+from src.config import config
+from src.generation_scheduler import BACKGROUND, INTERACTIVE, GenerationScheduler, PriorityTicket, generation_priority
+from src.models import ImageResult, SlideInput
+from src.prefetch import DeckPrefetcher, slide_key
+
+
+class BlockingOrchestrator:
+    def __init__(self):
+        self.release = asyncio.Event()
+        self.tickets = []
+
+    async def process_slide(self, slide, ticket=None):
+        self.tickets.append(ticket)
+        await self.release.wait()
+        return ImageResult(url=f"https://img/{slide.title}", source="stock_unsplash", keywords="")
+
+
+def slides(count, prefix="slide"):
+    return [SlideInput(title=f"{prefix}-{i}") for i in range(count)]
+
+
+def test_cancel_keeps_the_deck_budget(monkeypatch):
+    monkeypatch.setattr(config, "prefetch_max_slides_per_deck", 3)
+
+    async def scenario():
+        prefetcher = DeckPrefetcher(BlockingOrchestrator())
+        assert prefetcher.prefetch("deck", slides(3))["accepted"] == 3
+        assert prefetcher.cancel("deck") == 3
+        await asyncio.sleep(0)
+        response = prefetcher.prefetch("deck", slides(3, "again"))
+        assert response["accepted"] == 0 and response["over_budget"] == 3
+
+    asyncio.run(scenario())
+
+
+def test_new_deck_ids_share_the_hourly_budget(monkeypatch):
+    monkeypatch.setattr(config, "prefetch_max_slides_per_hour", 4)
+
+    async def scenario():
+        prefetcher = DeckPrefetcher(BlockingOrchestrator())
+        assert prefetcher.prefetch("deck-a", slides(3, "a"))["accepted"] == 3
+        response = prefetcher.prefetch("deck-b", slides(3, "b"))
+        assert response["accepted"] == 1 and response["over_budget"] == 2
+        for deck_id in ("deck-a", "deck-b"):
+            prefetcher.cancel(deck_id)
+        await asyncio.sleep(0)
+
+    asyncio.run(scenario())
+
+
+def test_interactive_request_promotes_joined_prefetch():
+    async def scenario():
+        orchestrator = BlockingOrchestrator()
+        prefetcher = DeckPrefetcher(orchestrator)
+        slide = SlideInput(title="cloud")
+        prefetcher.prefetch("deck", [slide])
+        await asyncio.sleep(0)
+        ticket = orchestrator.tickets[0]
+        assert ticket.priority == BACKGROUND
+
+        viewer = asyncio.create_task(prefetcher.process_slide(slide))
+        await asyncio.sleep(0)
+        assert ticket.priority == INTERACTIVE
+
+        orchestrator.release.set()
+        assert (await viewer).url == "https://img/cloud"
+
+    asyncio.run(scenario())
+
+
+def test_promote_moves_queued_waiters_ahead():
+    async def scenario():
+        scheduler = GenerationScheduler({"flux": (1, 0)})
+        order = []
+        release = asyncio.Event()
+
+        async def generate(name, ticket):
+            generation_priority.set(ticket)
+            async with scheduler.slot("flux"):
+                order.append(name)
+                await release.wait()
+
+        holder = asyncio.create_task(generate("holder", PriorityTicket(INTERACTIVE)))
+        await asyncio.sleep(0)
+        prefetched = PriorityTicket(BACKGROUND)
+        waiters = [
+            asyncio.create_task(generate("other_background", PriorityTicket(BACKGROUND))),
+            asyncio.create_task(generate("prefetched", prefetched)),
+            asyncio.create_task(generate("interactive", PriorityTicket(INTERACTIVE))),
+        ]
+        await asyncio.sleep(0)
+        scheduler.promote(prefetched)
+        release.set()
+        await asyncio.gather(holder, *waiters)
+        assert order == ["holder", "interactive", "prefetched", "other_background"]
+
+    asyncio.run(scenario())
+
+
+def test_queued_prefetch_is_not_joined_when_deck_concurrency_is_saturated(monkeypatch):
+    monkeypatch.setattr(config, "prefetch_concurrency", 1)
+
+    class PrefetchBlockingOrchestrator(BlockingOrchestrator):
+        async def process_slide(self, slide, ticket=None):
+            if ticket is None:
+                self.tickets.append(ticket)
+                return ImageResult(url=f"https://live/{slide.title}", source="stock_unsplash", keywords="")
+            return await super().process_slide(slide, ticket)
+
+    async def scenario():
+        orchestrator = PrefetchBlockingOrchestrator()
+        prefetcher = DeckPrefetcher(orchestrator)
+        deck = slides(3)
+        prefetcher.prefetch("deck", deck)
+        await asyncio.sleep(0)
+        queued = prefetcher._in_flight[slide_key(deck[2])]
+
+        # The first prefetch holds the deck's only slot and never finishes here
+        result = await asyncio.wait_for(prefetcher.process_slide(deck[2]), timeout=1)
+        assert result.url == "https://live/slide-2"
+        assert orchestrator.tickets[-1] is None
+        await asyncio.sleep(0)
+        assert queued.cancelled()
+        assert prefetcher.status("deck")["pending"] == 2
+
+        prefetcher.cancel("deck")
+        await asyncio.sleep(0)
+
+    asyncio.run(scenario())
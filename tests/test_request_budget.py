@@ -0,0 +1,121 @@
+"""End-to-end run of a budgeted slide through the orchestrator."""
+import asyncio
+
+import pytest
+
+from src.flight_recorder import flight_recorder
+from src.image_scorer import ImageScorer
+from src.models import ImageRef, ImageResult, KeywordExtractionResult, QualityScore, ScoredImage, SlideInput
+from src.request_budget import DEFAULT_STAGE_ESTIMATES, RequestBudget
+
+
+class FakeKeywordExtractor:
+    async def extract_keywords(self, slide):
+        raise AssertionError("LLM keyword extraction must be skipped under a tight budget")
+
+    def extract_keywords_local(self, slide):
+        return KeywordExtractionResult(english_keywords=["cloud"]), "cloud"
+
+
+class FakeSearcher:
+    def __init__(self):
+        self.per_page = None
+
+    async def search_all(self, query, per_page):
+        self.per_page = per_page
+        return [
+            ImageRef(id=str(i), index=i, alt="", source="unsplash", full_url=f"https://img/{i}", regular_url=f"https://img/{i}")
+            for i in range(2)
+        ]
+
+
+class FakeScorer:
+    filter_and_sort = ImageScorer.filter_and_sort
+
+    def __init__(self):
+        self.skip_presentation = None
+
+    async def score_images(self, images, topic, skip_presentation=False):
+        self.skip_presentation = skip_presentation
+        # Below MIN_QUALITY_SCORE: nothing passes filter_and_sort
+        return [
+            ScoredImage(image_ref=image, scores=QualityScore(quality_score=0.1 * (i + 1), is_safe=True, nudity_score=1.0))
+            for i, image in enumerate(images)
+        ]
+
+
+@pytest.fixture
+def orchestrator(make_orchestrator):
+    return make_orchestrator(
+        keyword_extractor=FakeKeywordExtractor(),
+        image_searcher=FakeSearcher(),
+        image_scorer=FakeScorer(),
+    )
+
+
+def test_budgeted_slide_degrades_instead_of_failing(orchestrator):
+    slide = SlideInput(title="Cloud migration", image_mode="auto", latency_budget_ms=1)
+
+    result = asyncio.run(orchestrator.process_slide(slide))
+
+    assert result.source == "stock_unsplash"
+    assert result.url == "https://img/1"
+    assert result.error is None
+    assert result.degradations == [
+        "local_keywords", "fewer_candidates", "skipped_presentation_scoring", "near_miss_stock"
+    ]
+    assert orchestrator.image_searcher.per_page == 4
+    assert orchestrator.image_scorer.skip_presentation is True
+    assert result.timings is not None and "search" in result.timings.stages
+
+
+def test_degradations_are_recorded_in_the_trace(orchestrator):
+    recorder_slow, flight_recorder.slow_seconds = flight_recorder.slow_seconds, 0.0
+    try:
+        asyncio.run(orchestrator.process_slide(SlideInput(title="Cloud migration", latency_budget_ms=1)))
+    finally:
+        flight_recorder.slow_seconds = recorder_slow
+
+    trace = flight_recorder.get(flight_recorder.traces()[0]["trace_id"])
+    degraded = [span for span in trace.to_dict()["span_list"] if span["name"] == "degraded"]
+    assert [span["attrs"]["degradation"] for span in degraded] == [
+        "local_keywords", "fewer_candidates", "skipped_presentation_scoring", "near_miss_stock"
+    ]
+
+
+class RecordingKeywordExtractor:
+    def __init__(self):
+        self.used = None
+
+    async def extract_keywords(self, slide):
+        self.used = "llm"
+        return KeywordExtractionResult(english_keywords=["cloud"]), "cloud"
+
+    def extract_keywords_local(self, slide):
+        self.used = "local"
+        return KeywordExtractionResult(english_keywords=["cloud"]), "cloud"
+
+
+@pytest.mark.parametrize(
+    "slide, expected",
+    [
+        (SlideInput(title="Cloud", image_mode="ai_only"), "llm"),
+        (SlideInput(title="Cloud", style="flat_illustration"), "llm"),
+        (SlideInput(title="Cloud", image_mode="auto"), "local"),
+    ],
+)
+def test_keyword_step_reserves_only_the_stages_that_run(make_orchestrator, monkeypatch, slide, expected):
+    # Deterministic estimates: keywords 4s, search + score 9s
+    monkeypatch.setattr(RequestBudget, "estimate", staticmethod(lambda stage: DEFAULT_STAGE_ESTIMATES[stage]))
+    extractor = RecordingKeywordExtractor()
+    orchestrator = make_orchestrator(keyword_extractor=extractor)
+
+    async def generate(slide, keywords):
+        return ImageResult(url="https://gen/1", source="generated_google_banana", keywords=keywords)
+
+    orchestrator._generate_ai_image = generate
+    orchestrator._find_stock_image = generate
+    orchestrator._should_speculate = lambda slide, keywords: False
+
+    asyncio.run(orchestrator.process_slide(slide.model_copy(update={"latency_budget_ms": 8000})))
+    assert extractor.used == expected
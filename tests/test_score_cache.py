@@ -0,0 +1,77 @@
+"""Score cache persistence, memory bounds and off-loop reads."""
+import asyncio
+import threading
+
+from src.score_cache import ScoreCache
+
+
+def test_scores_and_hashes_survive_a_restart(tmp_path):
+    path = str(tmp_path / "scores.sqlite3")
+    cache = ScoreCache(path=path, enabled=True)
+    cache.set_quality("unsplash", "a", 0.8)
+    cache.set_presentation("unsplash", "a", "Cloud ", 0.6)
+    cache.set_hash("unsplash", "a", 2**64 - 1)
+    cache.close()
+
+    reopened = ScoreCache(path=path, enabled=True)
+    assert reopened.get_quality("unsplash", "a") == 0.8
+    assert reopened.get_presentation("unsplash", "a", "cloud") == 0.6
+    assert reopened.get_hash("unsplash", "a") == 2**64 - 1
+    assert reopened.get_nudity("unsplash", "a") is None
+    reopened.close()
+
+
+def test_memory_front_is_bounded_and_falls_back_to_sqlite(tmp_path):
+    cache = ScoreCache(path=str(tmp_path / "scores.sqlite3"), enabled=True, max_memory_entries=2)
+    for image_id in "abc":
+        cache.set_quality("pexels", image_id, 0.5)
+    assert len(cache._memory) == 2
+    cache.close()
+    assert cache.get_quality("pexels", "a") == 0.5
+
+
+def test_misses_are_remembered_in_the_memory_front(tmp_path):
+    cache = ScoreCache(path=str(tmp_path / "scores.sqlite3"), enabled=True)
+    statements = []
+    cache._conn.set_trace_callback(statements.append)
+
+    assert cache.get_nudity("unsplash", "cold") is None
+    assert cache.get_nudity("unsplash", "cold") is None
+    assert cache.get_hash("unsplash", "cold") is None
+    assert cache.get_hash("unsplash", "cold") is None
+    assert len([sql for sql in statements if sql.startswith("SELECT")]) == 2
+
+    # A later score replaces the remembered miss
+    cache.set_nudity("unsplash", "cold", 0.9)
+    assert cache.get_nudity("unsplash", "cold") == 0.9
+    cache.close()
+
+
+def test_load_reads_a_candidate_off_the_event_loop(tmp_path):
+    path = str(tmp_path / "scores.sqlite3")
+    writer = ScoreCache(path=path, enabled=True)
+    writer.set_quality("unsplash", "a", 0.8)
+    writer.set_presentation("unsplash", "a", "cloud", 0.6)
+    writer.set_hash("unsplash", "a", 7)
+    writer.close()
+
+    cache = ScoreCache(path=path, enabled=True)
+    loop_statements, reader_threads = [], []
+    cache._conn.set_trace_callback(loop_statements.append)
+    cache._reader.set_trace_callback(lambda sql: reader_threads.append(threading.get_ident()))
+
+    async def scenario():
+        await cache.load_scores("unsplash", "a", "Cloud")
+        await cache.load_hash("unsplash", "a")
+        return threading.get_ident()
+
+    loop_thread = asyncio.run(scenario())
+    assert reader_threads and loop_thread not in reader_threads
+
+    assert cache.get_quality("unsplash", "a") == 0.8
+    assert cache.get_presentation("unsplash", "a", "cloud") == 0.6
+    assert cache.get_nudity("unsplash", "a") is None
+    assert cache.get_local_quality("unsplash", "a") is None
+    assert cache.get_hash("unsplash", "a") == 7
+    assert loop_statements == []
+    cache.close()
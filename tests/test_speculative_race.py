@@ -0,0 +1,58 @@
+"""Speculative race between stock search and AI generation."""
+import asyncio
+
+import pytest
+
+from src.models import ImageResult, SlideInput
+
+GENERATED = ImageResult(url="https://gen/1", source="generated_google_banana", keywords="cloud")
+
+
+@pytest.fixture
+def racing_orchestrator(make_orchestrator):
+    def build(find_stock, generate):
+        orchestrator = make_orchestrator()
+        orchestrator._find_stock_image = find_stock
+        orchestrator._generate_ai_image = generate
+        return orchestrator
+
+    return build
+
+
+def test_failing_stock_search_falls_through_to_generation(racing_orchestrator):
+    async def find_stock(slide, keywords):
+        raise RuntimeError("unsplash down")
+
+    async def generate(slide, keywords):
+        await asyncio.sleep(0.01)
+        return GENERATED
+
+    orchestrator = racing_orchestrator(find_stock, generate)
+    result = asyncio.run(orchestrator._race_stock_and_generation(SlideInput(title="Cloud"), "cloud"))
+    assert result == GENERATED
+
+
+def test_losing_stock_search_still_records_its_outcome(racing_orchestrator):
+    async def scenario():
+        finished = asyncio.Event()
+
+        async def find_stock(slide, keywords):
+            await asyncio.sleep(0.02)
+            orchestrator.stock_hit_rate.record(keywords, slide.style, False)
+            finished.set()
+            return None
+
+        async def generate(slide, keywords):
+            return GENERATED
+
+        orchestrator = racing_orchestrator(find_stock, generate)
+        result = await orchestrator._race_stock_and_generation(SlideInput(title="Cloud"), "cloud")
+        assert result == GENERATED
+        assert orchestrator._background_tasks
+
+        await asyncio.wait_for(finished.wait(), timeout=1)
+        await asyncio.sleep(0)
+        assert orchestrator.stock_hit_rate.predict("cloud", None)[1] == 1
+        assert not orchestrator._background_tasks
+
+    asyncio.run(scenario())